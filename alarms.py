@@ -0,0 +1,148 @@
+"""
+    Description: Alarm rules (limit, direction, hysteresis, debounce) held in
+    NumPy arrays and evaluated for every channel in one pass per frame. The
+    rules come from alarm_limits.json and are reloaded when the file changes,
+    so limits can be tuned in the pits without restarting the dashboard.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# alarms = AlarmTable.from_file()
+# alarms.set("acc_t", 91.0)                  on every sample (unknown channels are ignored)
+# for channel, active in alarms.evaluate(now): ...   once per frame, only edges come back
+# alarms.maybe_reload()                       every second or so
+
+import json
+import math
+import os
+
+import numpy as np
+
+from dash_log import get_logger
+
+log = get_logger("alarms")
+
+LIMITS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "alarm_limits.json")
+
+
+def load_rules(path=LIMITS_PATH):
+    """[(channel, direction, limit, hysteresis, debounce_s)]; direction +1 = above, -1 = below."""
+    with open(path, encoding="utf-8") as f:
+        cfg = json.load(f)
+    rules = []
+    for r in cfg["rules"]:
+        if ("above" in r) == ("below" in r):
+            raise ValueError(f"rule for '{r.get('channel')}' needs exactly one of 'above'/'below'")
+        direction = 1.0 if "above" in r else -1.0
+        limit = float(r["above"] if "above" in r else r["below"])
+        rules.append((r["channel"], direction, limit,
+                      float(r.get("hysteresis", 0.0)), float(r.get("debounce_s", 0.0))))
+    return rules
+
+
+class AlarmTable:
+    def __init__(self, rules, path=None):
+        self.path = path
+        self._mtime = _mtime(path)
+        self._build(rules)
+
+    @classmethod
+    def from_file(cls, path=LIMITS_PATH):
+        return cls(load_rules(path), path)
+
+    def _build(self, rules, old=None):
+        n = len(rules)
+        self.channels = [r[0] for r in rules]
+        self._rows = {}
+        for i, ch in enumerate(self.channels):
+            self._rows.setdefault(ch, []).append(i)
+        self.direction = np.array([r[1] for r in rules], dtype=np.float64)
+        self.limit = np.array([r[2] for r in rules], dtype=np.float64)
+        self.hysteresis = np.array([r[3] for r in rules], dtype=np.float64)
+        self.debounce = np.array([r[4] for r in rules], dtype=np.float64)
+        # direction-signed so one comparison serves both "above" and "below" rules
+        self._trip = self.direction * self.limit
+        self._clear = self._trip - self.hysteresis
+        self.value = np.full(n, np.nan)
+        self.since = np.full(n, np.nan)      # when the value first went past the limit
+        self.active = np.zeros(n, dtype=bool)
+        if old is not None:
+            # keep the latest values, alarm states and debounce clocks for channels that
+            # still have a rule, so an edit to the file doesn't flicker active alarms off
+            for ch, rows in self._rows.items():
+                old_rows = old.get(ch)
+                if old_rows:
+                    v, active, since = old_rows
+                    self.value[rows] = v
+                    self.active[rows] = active
+                    self.since[rows] = since
+
+    # ————————————————
+    # per sample
+    # ————————————————
+    def set(self, channel, value):
+        rows = self._rows.get(channel)
+        if rows is not None:
+            self.value[rows] = value
+
+    # ————————————————
+    # per frame
+    # ————————————————
+    def evaluate(self, now):
+        """Updates every rule at once. Returns [(channel, active)] for rules that changed state."""
+        x = self.direction * self.value                 # NaN (no data yet) compares False everywhere
+        past = np.where(self.active, x >= self._clear, x >= self._trip)
+        self.since = np.where(past, np.where(np.isnan(self.since), now, self.since), np.nan)
+        active = past & ((now - self.since) >= self.debounce)
+        changed = np.flatnonzero(active != self.active)
+        self.active = active
+        return [(self.channels[i], bool(active[i])) for i in changed]
+
+    def is_active(self, channel):
+        rows = self._rows.get(channel)
+        return bool(rows) and bool(self.active[rows].any())
+
+    def active_channels(self):
+        return sorted({self.channels[i] for i in np.flatnonzero(self.active)})
+
+    def limit_for(self, channel):
+        rows = self._rows.get(channel)
+        return None if not rows else float(self.limit[rows[0]])
+
+    # ————————————————
+    # hot reload
+    # ————————————————
+    def maybe_reload(self):
+        """Re-reads the rules file if it changed. Returns True if new rules were loaded.
+        A broken file is logged and the current rules stay in force."""
+        if self.path is None:
+            return False
+        mtime = _mtime(self.path)
+        if mtime == self._mtime:
+            return False
+        self._mtime = mtime
+        try:
+            rules = load_rules(self.path)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            log.error("alarm_config_error", path=self.path, error=e)
+            return False
+        old = {ch: (float(self.value[rows[0]]), bool(self.active[rows].any()), _earliest(self.since[rows]))
+               for ch, rows in self._rows.items()}
+        self._build(rules, old)
+        log.info("alarm_config_reloaded", rules=len(rules))
+        return True
+
+
+def _earliest(since):
+    """Earliest debounce start among a channel's rows, NaN if none is counting."""
+    since = since[~np.isnan(since)]
+    return float(since.min()) if since.size else math.nan
+
+def _mtime(path):
+    """None when there's no file (or no path), so a missing file isn't a change every poll."""
+    if path is None:
+        return None
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
@@ -0,0 +1,303 @@
+"""
+    Description: SocketCAN ingest. Loads a DBC file, precompiles one struct
+    unpacker plus scale/offset table per message (byte-aligned signals) with a
+    shift/mask fallback for the rest, and decodes frames in batches into the
+    same channel names handle_serial_line uses (acc_v, mtr_t, fault_mc, ...).
+    DBC signal names are the dashboard channel names.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 can_ingest.py --bench                    decode benchmark, frames/sec
+# python3 can_ingest.py --iface vcan0              print decoded channels live
+#
+# Testing without a car (Linux):
+#   sudo modprobe vcan && sudo ip link add dev vcan0 type vcan && sudo ip link set up vcan0
+#   cansend vcan0 6B0#C40D0000B4010000             acc_v=352.4, acc_t=70.0, fault_bms=1
+
+import argparse
+import os
+import re
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from dash_log import get_logger
+
+log = get_logger("can_ingest")
+
+DBC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fsae_dash.dbc")
+
+CAN_FRAME = struct.Struct("=IB3x8s")   # struct can_frame from linux/can.h
+CAN_EFF_FLAG = 0x80000000
+CAN_RTR_FLAG = 0x40000000
+CAN_ERR_FLAG = 0x20000000
+CAN_EFF_MASK = 0x1FFFFFFF
+BATCH_FRAMES = 256
+STALE_S = 1.0
+MAX_BUFFERED = 20000
+
+_BO = re.compile(r"^BO_\s+(\d+)\s+(\w+)\s*:\s*(\d+)")
+_SG = re.compile(r"^\s*SG_\s+(\w+)\s*(?:\w+\s*)?:\s*(\d+)\|(\d+)@([01])([+-])\s*\(([^,]+),([^)]+)\)")
+
+
+# ————————————————
+# DBC loading
+# ————————————————
+class Signal:
+    __slots__ = ("name", "start", "length", "little", "signed", "scale", "offset")
+
+    def __init__(self, name, start, length, little, signed, scale, offset):
+        self.name = name
+        self.start = start
+        self.length = length
+        self.little = little
+        self.signed = signed
+        self.scale = scale
+        self.offset = offset
+
+    def byte_aligned(self):
+        if self.length not in (8, 16, 32):
+            return False
+        # Intel signals start at their LSB, Motorola at their MSB
+        return self.start % 8 == (0 if self.little else 7)
+
+
+def load_dbc(path=DBC_PATH):
+    """{can_id: (message name, dlc, [Signal])}. Only BO_/SG_ lines are read."""
+    messages = {}
+    current = None
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        for line in f:
+            m = _BO.match(line)
+            if m:
+                can_id = int(m.group(1)) & CAN_EFF_MASK   # DBC sets bit 31 for extended ids
+                current = messages[can_id] = (m.group(2), int(m.group(3)), [])
+                continue
+            m = _SG.match(line)
+            if m and current is not None:
+                name, start, length, order, sign, scale, offset = m.groups()
+                current[2].append(Signal(name, int(start), int(length), order == "1",
+                                         sign == "-", float(scale), float(offset)))
+    return messages
+
+
+# ————————————————
+# Precompiled decoders
+# ————————————————
+def _bit_extractor(sig, dlc):
+    mask = (1 << sig.length) - 1
+    sign_bit = 1 << (sig.length - 1)
+    if sig.little:
+        shift = sig.start
+        order = "little"
+    else:
+        # Motorola: start is the MSB in DBC sawtooth numbering
+        msb = (dlc - 1 - sig.start // 8) * 8 + sig.start % 8
+        shift = msb - sig.length + 1
+        order = "big"
+    signed = sig.signed
+
+    def extract(data):
+        raw = (int.from_bytes(data[:dlc], order) >> shift) & mask
+        if signed and raw & sign_bit:
+            raw -= mask + 1
+        return raw
+    return extract
+
+
+class MessageDecoder:
+    def __init__(self, name, dlc, signals):
+        self.name = name
+        self.dlc = dlc
+        aligned = [s for s in signals if s.byte_aligned()]
+        # one struct call per frame covers every byte-aligned signal of the same byte order
+        little = [s for s in aligned if s.little]
+        big = [s for s in aligned if not s.little]
+        group = little if len(little) >= len(big) else big
+        self.struct, self.struct_names, self.struct_scale = self._compile(group, dlc)
+        rest = [s for s in signals if s not in group or self.struct is None]
+        self.extractors = [(s.name, _bit_extractor(s, dlc), s.scale, s.offset) for s in rest]
+
+    @staticmethod
+    def _compile(group, dlc):
+        if not group:
+            return None, (), ()
+        group = sorted(group, key=lambda s: s.start // 8)
+        fmt = "<" if group[0].little else ">"
+        pos = 0
+        for s in group:
+            byte = s.start // 8
+            if byte < pos or byte + s.length // 8 > dlc:
+                return None, (), ()   # overlapping or out of range; let the bit extractor handle it
+            fmt += "x" * (byte - pos) + {8: "b", 16: "h", 32: "i"}[s.length]
+            if not s.signed:
+                fmt = fmt[:-1] + fmt[-1].upper()
+            pos = byte + s.length // 8
+        fmt += "x" * (dlc - pos)
+        return (struct.Struct(fmt), tuple(s.name for s in group),
+                tuple((s.scale, s.offset) for s in group))
+
+    def decode(self, data, out):
+        """Appends (channel, value) pairs for one frame to `out`."""
+        if self.struct is not None:
+            for name, raw, (scale, offset) in zip(self.struct_names, self.struct.unpack_from(data),
+                                                   self.struct_scale):
+                out.append((name, raw * scale + offset))
+        for name, extract, scale, offset in self.extractors:
+            out.append((name, extract(data) * scale + offset))
+
+
+class CanDecoder:
+    def __init__(self, messages):
+        self.decoders = {can_id: MessageDecoder(*msg) for can_id, msg in messages.items()}
+        self.unknown = 0
+
+    @classmethod
+    def from_dbc(cls, path=DBC_PATH):
+        return cls(load_dbc(path))
+
+    def decode_batch(self, frames):
+        """[(can_id, data)] -> [(channel, value)] in frame order."""
+        out = []
+        get = self.decoders.get
+        for can_id, data in frames:
+            dec = get(can_id)
+            if dec is None:
+                self.unknown += 1
+            elif len(data) >= dec.dlc:
+                dec.decode(data, out)
+        return out
+
+
+# ————————————————
+# SocketCAN
+# ————————————————
+def open_can_socket(iface):
+    sock = socket.socket(socket.AF_CAN, socket.SOCK_RAW, socket.CAN_RAW)
+    sock.bind((iface,))
+    return sock
+
+def _unpack_frame(raw, frames):
+    can_id, dlc, data = CAN_FRAME.unpack(raw)
+    if not can_id & (CAN_RTR_FLAG | CAN_ERR_FLAG):
+        frames.append((can_id & CAN_EFF_MASK, data[:dlc]))
+
+def read_frames(sock, max_frames=BATCH_FRAMES, frames=None):
+    """Reads up to max_frames already queued on a non-blocking socket."""
+    frames = [] if frames is None else frames
+    for _ in range(max_frames):
+        try:
+            raw = sock.recv(CAN_FRAME.size)
+        except (BlockingIOError, InterruptedError):
+            break
+        _unpack_frame(raw, frames)
+    return frames
+
+
+class CanSource:
+    """Reads a CAN interface on its own thread and buffers decoded (t, channel, value)."""
+
+    def __init__(self, iface, dbc_path=DBC_PATH, clock=time.monotonic):
+        self.iface = iface
+        self.decoder = CanDecoder.from_dbc(dbc_path)
+        self._clock = clock
+        self.samples = deque(maxlen=MAX_BUFFERED)
+        self.frames = 0
+        self.errors = 0
+        self.last_rx = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"can-{self.iface}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        sock = None
+        while not self._stop.is_set():
+            try:
+                if sock is None:
+                    sock = open_can_socket(self.iface)
+                    sock.settimeout(0.1)
+                try:
+                    # block for the first frame, then sweep whatever else is queued
+                    first = sock.recv(CAN_FRAME.size)
+                except socket.timeout:
+                    continue
+                sock.setblocking(False)
+                frames = []
+                _unpack_frame(first, frames)
+                read_frames(sock, frames=frames)
+                sock.settimeout(0.1)
+            except OSError as e:
+                log.warning("can_error", iface=self.iface, error=e)
+                self.errors += 1
+                if sock is not None:
+                    try:
+                        sock.close()
+                    except OSError:
+                        pass
+                sock = None
+                self._stop.wait(1.0)
+                continue
+            t = self._clock()
+            self.frames += len(frames)
+            self.last_rx = t
+            self.samples.extend((t, key, value) for key, value in self.decoder.decode_batch(frames))
+
+    def poll(self):
+        out = []
+        buf = self.samples
+        while buf:
+            out.append(buf.popleft())
+        return out
+
+    def healthy(self, now=None):
+        if self.last_rx is None:
+            return False
+        return (self._clock() if now is None else now) - self.last_rx < STALE_S
+
+
+# ————————————————
+# CLI / benchmark
+# ————————————————
+def bench(n_frames=200000, dbc_path=DBC_PATH):
+    import random
+    decoder = CanDecoder.from_dbc(dbc_path)
+    ids = list(decoder.decoders)
+    rng = random.Random(1)
+    frames = [(rng.choice(ids), bytes(rng.getrandbits(8) for _ in range(8))) for _ in range(5000)]
+    frames = (frames * (n_frames // len(frames) + 1))[:n_frames]
+    t0 = time.perf_counter()
+    values = 0
+    for i in range(0, n_frames, BATCH_FRAMES):
+        values += len(decoder.decode_batch(frames[i:i + BATCH_FRAMES]))
+    dt = time.perf_counter() - t0
+    print(f"decoded {n_frames} frames ({values} values) in {dt * 1000:.0f} ms: "
+          f"{n_frames / dt:,.0f} frames/s, {values / dt:,.0f} values/s")
+
+def main():
+    parser = argparse.ArgumentParser(description="SocketCAN ingest with DBC decoding")
+    parser.add_argument("--dbc", default=DBC_PATH)
+    parser.add_argument("--iface", help="CAN interface to read, e.g. can0 or vcan0")
+    parser.add_argument("--bench", action="store_true", help="decode benchmark on synthetic frames")
+    args = parser.parse_args()
+
+    if args.bench or not args.iface:
+        bench(dbc_path=args.dbc)
+        return
+    src = CanSource(args.iface, args.dbc).start()
+    while True:
+        for t, key, value in src.poll():
+            print(f"{t:.3f} {key}={value:g}")
+        time.sleep(0.05)
+
+if __name__ == "__main__":
+    main()
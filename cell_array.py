@@ -0,0 +1,147 @@
+"""
+    Description: Per-cell accumulator telemetry. Cell voltages and thermistor
+    temperatures are kept in flat arrays and drawn as a heatmap into a single
+    PIL image that the dashboard blits with one PhotoImage paste.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Teensy line format, one line per accumulator segment (segments numbered from 1):
+#   cv_<seg>=<v0>,<v1>,...   cell voltages for segment <seg> (V)
+#   ct_<seg>=<t0>,<t1>,...   thermistor temps for segment <seg> (°C)
+
+import math
+from array import array
+from PIL import Image
+
+# ————————————————
+# CONFIG
+# ————————————————
+SEGMENTS = 5
+CELLS_PER_SEG = 28
+THERMS_PER_SEG = 28
+
+CELL_V_MIN = 3.0   # drawn full red
+CELL_V_MAX = 4.2   # drawn full green
+CELL_T_MIN = 20.0  # drawn full blue
+CELL_T_MAX = 60.0  # drawn full red
+
+CELL_PX = 7        # size of one cell on screen
+ROW_GAP = 4        # gap between the voltage and temperature maps
+MISSING_COLOR = (40, 40, 40)
+
+
+def _ramp(stops, n=256):
+    # builds an n-entry colour lookup table by linear interpolation between stops
+    lut = []
+    for i in range(n):
+        x = i / (n - 1) * (len(stops) - 1)
+        k = min(int(x), len(stops) - 2)
+        f = x - k
+        a, b = stops[k], stops[k + 1]
+        lut.append(tuple(int(a[c] + (b[c] - a[c]) * f) for c in range(3)))
+    return lut
+
+VOLT_LUT = _ramp([(255, 0, 0), (255, 255, 0), (0, 255, 0)])
+TEMP_LUT = _ramp([(0, 0, 255), (0, 255, 255), (255, 255, 0), (255, 0, 0)])
+
+
+class CellArray:
+    def __init__(self, segments=SEGMENTS, cells_per_seg=CELLS_PER_SEG, therms_per_seg=THERMS_PER_SEG):
+        self.segments = segments
+        self.cells_per_seg = cells_per_seg
+        self.therms_per_seg = therms_per_seg
+        self.volts = array("f", [math.nan]) * (segments * cells_per_seg)
+        self.temps = array("f", [math.nan]) * (segments * therms_per_seg)
+
+    def update_segment(self, kind, seg, values):
+        """Stores one segment of 'v' or 't' readings. Returns False if it doesn't fit."""
+        arr, per = (self.volts, self.cells_per_seg) if kind == "v" else (self.temps, self.therms_per_seg)
+        if not 0 <= seg < self.segments or len(values) > per:
+            return False
+        start = seg * per
+        arr[start:start + len(values)] = array("f", values)
+        return True
+
+    def weakest_cell(self):
+        """(index, voltage) of the lowest reported cell, or None before any data."""
+        best = None
+        for i, v in enumerate(self.volts):
+            if v == v and (best is None or v < best[1]):
+                best = (i, v)
+        return best
+
+    def hottest_therm(self):
+        best = None
+        for i, t in enumerate(self.temps):
+            if t == t and (best is None or t > best[1]):
+                best = (i, t)
+        return best
+
+    def cell_name(self, index):
+        return f"S{index // self.cells_per_seg + 1}C{index % self.cells_per_seg + 1}"
+
+
+class CellHeatmap:
+    """Voltage map on top, temperature map underneath, both in one RGB image."""
+
+    def __init__(self, cells, cell_px=CELL_PX):
+        self.cells = cells
+        self.cell_px = cell_px
+        cols = max(cells.cells_per_seg, cells.therms_per_seg)
+        self.map_h = cells.segments * cell_px
+        self.width = cols * cell_px
+        self.height = 2 * self.map_h + ROW_GAP
+        self.image = Image.new("RGB", (self.width, self.height), "black")
+        self.dirty = False
+        for seg in range(cells.segments):
+            self._paint_segment("v", seg)
+            self._paint_segment("t", seg)
+
+    def update_segment(self, kind, seg, values):
+        if not self.cells.update_segment(kind, seg, values):
+            return False
+        self._paint_segment(kind, seg)
+        return True
+
+    def _paint_segment(self, kind, seg):
+        # only the pixels of the segment that arrived are repainted
+        if kind == "v":
+            arr, per, lut, lo, hi, y0 = (self.cells.volts, self.cells.cells_per_seg,
+                                         VOLT_LUT, CELL_V_MIN, CELL_V_MAX, 0)
+        else:
+            arr, per, lut, lo, hi, y0 = (self.cells.temps, self.cells.therms_per_seg,
+                                         TEMP_LUT, CELL_T_MIN, CELL_T_MAX, self.map_h + ROW_GAP)
+        px = self.cell_px
+        y = y0 + seg * px
+        scale = (len(lut) - 1) / (hi - lo)
+        for col in range(per):
+            v = arr[seg * per + col]
+            if v != v:
+                color = MISSING_COLOR
+            else:
+                color = lut[max(0, min(len(lut) - 1, int((v - lo) * scale)))]
+            # leave a 1px black grid line between cells
+            self.image.paste(color, (col * px, y, col * px + px - 1, y + px - 1))
+        self.dirty = True
+
+    def flush(self, photo):
+        """Blits the image into an ImageTk.PhotoImage if anything changed since last time."""
+        if not self.dirty:
+            return False
+        photo.paste(self.image)
+        self.dirty = False
+        return True
+
+
+def parse_segment_line(key, value):
+    """'cv_3', '3.91,3.92' -> ('v', 2, [3.91, 3.92]); None if key isn't a cell line.
+    Raises ValueError if the segment number or a reading isn't a number; the segment
+    isn't range-checked here, update_segment() rejects one that doesn't exist."""
+    if key.startswith("cv_"):
+        kind = "v"
+    elif key.startswith("ct_"):
+        kind = "t"
+    else:
+        return None
+    seg = int(key[3:]) - 1
+    return kind, seg, [float(x) for x in value.split(",") if x]
@@ -0,0 +1,46 @@
+"""
+    Description: Latest-value store for telemetry channels. Each channel keeps
+    its last value, the time it was sampled and a version counter that bumps
+    on every update, so readers can tell cheaply what changed since they last
+    looked. Channels from secondary boards live under a "<source>." namespace.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+import threading
+
+
+class ChannelStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}      # name -> (t, value, version)
+        self.version = 0       # bumps on any update
+
+    @staticmethod
+    def name(source, key):
+        return f"{source}.{key}" if source else key
+
+    def update(self, name, value, t):
+        with self._lock:
+            self.version += 1
+            self._values[name] = (t, value, self.version)
+            return self.version
+
+    def get(self, name, default=None):
+        entry = self._values.get(name)
+        return default if entry is None else entry[1]
+
+    def entry(self, name):
+        """(t, value, version) or None."""
+        return self._values.get(name)
+
+    def changed_since(self, version):
+        """{name: (t, value, version)} for every channel updated after `version`."""
+        with self._lock:
+            return {k: e for k, e in self._values.items() if e[2] > version}
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._values)
+
+    def names(self):
+        return list(self._values)
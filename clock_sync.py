@@ -0,0 +1,153 @@
+"""
+    Description: Teensy/Pi clock synchronisation over the serial link.
+    The Pi periodically runs an NTP-style four-timestamp exchange, keeps the
+    lowest-delay samples from a sliding window and fits offset + drift with a
+    least-squares line, so Teensy-stamped samples can be mapped onto the Pi
+    clock instead of being stamped whenever the read loop happens to see them.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Wire format:
+#   Pi -> Teensy:  sync@<seq>\n                       (t1 = Pi send time, kept on the Pi)
+#   Teensy -> Pi:  sync=<seq>,<t2_us>,<t3_us>         t2 = Teensy receive, t3 = Teensy reply (micros())
+#   samples:       <key>=<value>@<teensy_us>          optional acquisition stamp on any telemetry line
+
+import time
+from collections import deque
+
+from dash_log import get_logger
+
+log = get_logger("clock_sync")
+
+SYNC_WINDOW = 32          # exchanges kept for the fit
+BEST_FRACTION = 0.5       # fraction of lowest-delay exchanges used for the fit
+MAX_PENDING = 8
+US = 1e-6
+WRAP = 1 << 32            # micros() is a uint32 on the Teensy
+MAX_WRAP_GAP_US = 60_000_000   # a drop is only a wrap if micros() got there this fast going forward
+RESET_JUMP_US = 1_000_000      # any other drop this big means the Teensy restarted
+
+
+class _Unwrapper:
+    """Extends the Teensy's 32-bit micros() counter so it doesn't jump back every ~71 minutes.
+    A drop that can't be a wrap is a Teensy reset: the count starts again from the new value."""
+
+    def __init__(self):
+        self._last = None
+        self._base = 0
+        self.resets = 0
+
+    def __call__(self, raw):
+        raw = int(raw)
+        if self._last is not None and raw > self._last and (self._last - raw) % WRAP < RESET_JUMP_US:
+            return self._base - WRAP + raw     # a late stamp from just before the last wrap
+        if self._last is not None and raw < self._last:
+            if (raw - self._last) % WRAP < MAX_WRAP_GAP_US:
+                self._base += WRAP
+            elif self._last - raw > RESET_JUMP_US:
+                self._base = 0
+                self.resets += 1
+            else:
+                return self._base + raw    # slightly out of order; don't move _last back
+        self._last = raw
+        return self._base + raw
+
+
+class ClockSync:
+    def __init__(self, clock=time.monotonic, window=SYNC_WINDOW):
+        self._clock = clock
+        self._samples = deque(maxlen=window)   # (teensy_mid_s, pi_mid_s, delay_s)
+        self._pending = {}
+        self._seq = 0
+        self._unwrap = _Unwrapper()
+        # pi = a + b * teensy, both in seconds
+        self.a = None
+        self.b = 1.0
+        self.last_delay = None
+        self.fixed = False        # identity(): nothing to fit
+        self._wall_minus_mono = time.time() - time.monotonic()
+
+    @classmethod
+    def identity(cls, clock=time.monotonic):
+        """Stamps already on the Pi clock (latency_trace.LoopbackSerial); replies are ignored."""
+        sync = cls(clock)
+        sync.a = 0.0
+        sync.fixed = True
+        return sync
+
+    @property
+    def synced(self):
+        return self.a is not None
+
+    def request(self, write):
+        """Starts one exchange by writing sync@<seq>; the reply goes to handle_reply()."""
+        self._seq = self._seq % 0xFFFF + 1
+        if len(self._pending) >= MAX_PENDING:
+            self._pending.pop(next(iter(self._pending)))   # oldest reply is never coming
+        self._pending[self._seq] = self._clock()
+        write(f"sync@{self._seq}\n".encode())
+        return self._seq
+
+    def handle_reply(self, value, t4=None):
+        """Feeds the value of a sync=<seq>,<t2>,<t3> line."""
+        if t4 is None:
+            t4 = self._clock()
+        seq, t2, t3 = value.split(",")
+        t1 = self._pending.pop(int(seq), None)
+        if t1 is None or self.fixed:
+            return False
+        t2 = self._teensy_s(t2)
+        t3 = self._teensy_s(t3)
+        delay = (t4 - t1) - (t3 - t2)
+        self.last_delay = delay
+        self._samples.append(((t2 + t3) / 2.0, (t1 + t4) / 2.0, delay))
+        self._fit()
+        return True
+
+    def _teensy_s(self, raw):
+        """Unwrapped Teensy time in seconds; a Teensy reset throws away the fit made before it."""
+        resets = self._unwrap.resets
+        t = self._unwrap(raw) * US
+        if self._unwrap.resets != resets:
+            log.warning("teensy_clock_reset", micros=int(raw))
+            self._samples.clear()
+            if not self.fixed:
+                self.a = None
+                self.b = 1.0
+        return t
+
+    def _fit(self):
+        # exchanges that sat in a buffer somewhere are asymmetric; only trust the quick ones
+        best = sorted(self._samples, key=lambda s: s[2])
+        best = best[:max(1, int(len(best) * BEST_FRACTION))]
+        n = len(best)
+        mx = sum(s[0] for s in best) / n
+        my = sum(s[1] for s in best) / n
+        sxx = sum((s[0] - mx) ** 2 for s in best)
+        if n >= 3 and sxx > 1.0:
+            self.b = sum((s[0] - mx) * (s[1] - my) for s in best) / sxx
+        self.a = my - self.b * mx
+
+    def to_pi(self, teensy_us):
+        """Teensy micros() stamp -> Pi monotonic seconds (None until the first exchange)."""
+        if self.a is None:
+            return None
+        t = self._teensy_s(teensy_us)
+        if self.a is None:
+            return None       # the Teensy just reset; stamps mean nothing until the next exchange
+        return self.a + self.b * t
+
+    def to_wall(self, teensy_us):
+        t = self.to_pi(teensy_us)
+        return None if t is None else t + self._wall_minus_mono
+
+    @property
+    def drift_ppm(self):
+        # positive when the Teensy clock runs fast relative to the Pi
+        return (1.0 / self.b - 1.0) * 1e6
+
+
+def split_stamp(value):
+    """'88.5@123456' -> ('88.5', '123456'); no stamp -> (value, None)."""
+    value, sep, stamp = value.partition("@")
+    return value, (stamp if sep else None)
@@ -0,0 +1,140 @@
+"""
+    Description: Pipelined Pi -> Teensy command channel. Commands are tagged
+    with a sequence number, several can be outstanding at once, acks are
+    matched as they come back through the normal serial read loop, and
+    unanswered commands are retried with a timeout. Nothing here blocks,
+    so the telemetry loop keeps running while commands are in flight.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Wire format:
+#   Pi -> Teensy:  <cmd>@<seq>[ <args>]\n      e.g. "check@7\n", "set@8 fan_duty=60\n"
+#   Teensy -> Pi:  ack=<seq>  or  nak=<seq>    (plain key=value so it rides the telemetry stream)
+
+import time
+from collections import OrderedDict, deque
+from dash_log import get_logger
+
+log = get_logger("command_channel")
+
+MAX_OUTSTANDING = 8      # commands in flight before new ones are queued
+ACK_TIMEOUT_S = 0.25
+MAX_RETRIES = 3
+RTT_HISTORY = 100
+
+
+class _Pending:
+    __slots__ = ("seq", "cmd", "args", "on_done", "first_sent", "last_sent", "tries")
+
+    def __init__(self, seq, cmd, args, on_done):
+        self.seq = seq
+        self.cmd = cmd
+        self.args = args
+        self.on_done = on_done
+        self.first_sent = None
+        self.last_sent = None
+        self.tries = 0
+
+
+class CommandChannel:
+    def __init__(self, write, clock=time.monotonic, timeout_s=ACK_TIMEOUT_S,
+                 max_retries=MAX_RETRIES, max_outstanding=MAX_OUTSTANDING):
+        self._write = write
+        self._clock = clock
+        self.timeout_s = timeout_s
+        self.max_retries = max_retries
+        self.max_outstanding = max_outstanding
+        self._next_seq = 1
+        self._inflight = OrderedDict()   # seq -> _Pending, oldest first
+        self._waiting = deque()          # not sent yet, window full
+        self.rtts = deque(maxlen=RTT_HISTORY)
+        self.counts = {"sent": 0, "acked": 0, "nacked": 0, "retries": 0, "failed": 0}
+
+    def send(self, cmd, args="", on_done=None):
+        """Queues a command and returns its sequence number.
+
+        on_done(ok, rtt_s) is called once: ok=True with the round trip on ack,
+        ok=False with rtt_s=None on nak or after the last retry times out.
+        """
+        seq = self._next_seq
+        self._next_seq = self._next_seq % 0xFFFF + 1
+        p = _Pending(seq, cmd, args, on_done)
+        if len(self._inflight) < self.max_outstanding:
+            self._transmit(p)
+        else:
+            self._waiting.append(p)
+        return seq
+
+    def _transmit(self, p):
+        now = self._clock()
+        if p.first_sent is None:
+            p.first_sent = now
+        p.last_sent = now
+        p.tries += 1
+        self._inflight[p.seq] = p
+        msg = f"{p.cmd}@{p.seq}" + (f" {p.args}" if p.args else "") + "\n"
+        try:
+            self._write(msg.encode())
+            self.counts["sent"] += 1
+        except Exception as e:
+            log.warning("command_write_error", cmd=p.cmd, seq=p.seq, error=e)   # retried by poll() like a lost ack
+
+    def handle_reply(self, key, value):
+        """Feeds an ack/nak line from the read loop. Returns True if it was one."""
+        if key not in ("ack", "nak"):
+            return False
+        p = self._inflight.pop(int(value), None)
+        if p is None:
+            return True     # duplicate ack for a retried command, or stale
+        if key == "ack":
+            # time from the last (re)transmission, so a retry doesn't inflate the sample
+            rtt = self._clock() - p.last_sent
+            self.rtts.append(rtt)
+            self.counts["acked"] += 1
+            self._finish(p, True, rtt)
+        else:
+            self.counts["nacked"] += 1
+            self._finish(p, False, None)
+        return True
+
+    def poll(self):
+        """Retries or fails commands whose ack is overdue. Call periodically from the UI loop."""
+        now = self._clock()
+        for p in list(self._inflight.values()):
+            if now - p.last_sent < self.timeout_s:
+                continue
+            if p.tries <= self.max_retries:
+                self.counts["retries"] += 1
+                self._transmit(p)
+            else:
+                del self._inflight[p.seq]
+                self.counts["failed"] += 1
+                log.warning("command_failed", cmd=p.cmd, seq=p.seq, tries=p.tries)
+                self._finish(p, False, None)
+        self._fill_window()
+
+    def _finish(self, p, ok, rtt):
+        if p.on_done is not None:
+            try:
+                p.on_done(ok, rtt)
+            except Exception as e:
+                log.error("command_callback_error", cmd=p.cmd, error=e)
+        self._fill_window()
+
+    def _fill_window(self):
+        while self._waiting and len(self._inflight) < self.max_outstanding:
+            self._transmit(self._waiting.popleft())
+
+    @property
+    def outstanding(self):
+        return len(self._inflight) + len(self._waiting)
+
+    def stats(self):
+        out = dict(self.counts)
+        out["outstanding"] = self.outstanding
+        if self.rtts:
+            ordered = sorted(self.rtts)
+            out["rtt_last_ms"] = self.rtts[-1] * 1000.0
+            out["rtt_avg_ms"] = sum(ordered) / len(ordered) * 1000.0
+            out["rtt_p95_ms"] = ordered[int(0.95 * (len(ordered) - 1))] * 1000.0
+        return out
@@ -0,0 +1,165 @@
+"""
+    Description: Structured, non-blocking logging for the dashboards. Callers log
+    an event name plus key=value fields; records go through a bounded queue to
+    a listener thread so a slow console never stalls the UI or serial loop.
+    Each event name is rate limited (token bucket) and counted, and the next
+    record that gets through says how many were suppressed in between.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# from dash_log import get_logger
+# log = get_logger("driver_ui")
+# log.warning("serial_parse_error", line=line, error=e)
+#
+# FSAE_LOG_LEVEL=DEBUG python3 driver_ui.py     (default INFO)
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+ROOT_LOGGER = "fsae"
+QUEUE_SIZE = 1000
+RATE_PER_S = 5.0       # sustained records per second per event name
+BURST = 10             # records allowed back to back before limiting kicks in
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per (logger, event name); counts emitted and suppressed records."""
+
+    def __init__(self, rate=RATE_PER_S, burst=BURST, clock=time.monotonic):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._buckets = {}    # (logger, event) -> [tokens, last refill, suppressed since last emit]
+        self.emitted = {}
+        self.suppressed = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        ev = (record.name, record.msg)
+        now = self._clock()
+        with self._lock:
+            b = self._buckets.get(ev)
+            if b is None:
+                b = self._buckets[ev] = [float(self.burst), now, 0]
+            b[0] = min(self.burst, b[0] + (now - b[1]) * self.rate)
+            b[1] = now
+            if b[0] < 1.0:
+                b[2] += 1
+                self.suppressed[ev] = self.suppressed.get(ev, 0) + 1
+                return False
+            b[0] -= 1.0
+            record.suppressed = b[2]
+            b[2] = 0
+            self.emitted[ev] = self.emitted.get(ev, 0) + 1
+        return True
+
+
+class DropCountingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks: a full queue drops the record and counts it."""
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # formatting happens on the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class FieldFormatter(logging.Formatter):
+    """12:03:04.123 WARNING driver_ui serial_parse_error line='x=' error='...' [suppressed=37]"""
+
+    def format(self, record):
+        t = time.strftime("%H:%M:%S", time.localtime(record.created))
+        name = record.name[len(ROOT_LOGGER) + 1:] or record.name
+        parts = [f"{t}.{int(record.msecs):03d}", record.levelname, name, str(record.msg)]
+        for key, value in getattr(record, "fields", {}).items():
+            parts.append(f"{key}={value!r}" if isinstance(value, (str, BaseException)) else f"{key}={value}")
+        if getattr(record, "suppressed", 0):
+            parts.append(f"[suppressed={record.suppressed}]")
+        if record.exc_info:
+            parts.append("\n" + self.formatException(record.exc_info))
+        return " ".join(parts)
+
+
+class EventLogger:
+    """Thin wrapper so call sites pass fields as keyword arguments."""
+
+    def __init__(self, logger):
+        self._logger = logger
+
+    def _log(self, level, event, fields):
+        if self._logger.isEnabledFor(level):
+            self._logger.log(level, event, extra={"fields": fields})
+
+    def debug(self, event, **fields):
+        self._log(logging.DEBUG, event, fields)
+
+    def info(self, event, **fields):
+        self._log(logging.INFO, event, fields)
+
+    def warning(self, event, **fields):
+        self._log(logging.WARNING, event, fields)
+
+    def error(self, event, **fields):
+        self._log(logging.ERROR, event, fields)
+
+
+_handler = None
+_filter = None
+_listener = None
+_setup_lock = threading.Lock()
+
+def setup(level=None, stream=None, rate=RATE_PER_S, burst=BURST):
+    """Installs the queue handler and starts the listener thread. Safe to call more than once."""
+    global _handler, _filter, _listener
+    with _setup_lock:
+        if _listener is not None:
+            return
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(level or os.environ.get("FSAE_LOG_LEVEL", "INFO").upper())
+        if _handler is None:
+            root.propagate = False
+            _filter = RateLimitFilter(rate, burst)
+            _handler = DropCountingQueueHandler(queue.Queue(QUEUE_SIZE))
+            _handler.addFilter(_filter)
+            root.addHandler(_handler)
+            atexit.register(stop)
+        out = logging.StreamHandler(stream or sys.stderr)
+        out.setFormatter(FieldFormatter())
+        _listener = logging.handlers.QueueListener(_handler.queue, out)
+        _listener.start()
+
+def stop():
+    """Flushes whatever is queued and stops the listener thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+def get_logger(name):
+    setup()
+    return EventLogger(logging.getLogger(f"{ROOT_LOGGER}.{name}"))
+
+def stats():
+    """{"emitted": {(logger, event): n}, "suppressed": {...}, "dropped": n}"""
+    if _filter is None:
+        return {"emitted": {}, "suppressed": {}, "dropped": 0}
+    with _filter._lock:
+        return {"emitted": dict(_filter.emitted), "suppressed": dict(_filter.suppressed),
+                "dropped": _handler.dropped}
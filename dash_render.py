@@ -0,0 +1,370 @@
+"""
+    Description: Dashboard renderers for driver_ui.py. WidgetDashboard is the
+    original screen (one Tk Label/Frame/Canvas per value at fixed pixel
+    positions); CanvasDashboard draws the same screen as text and shape items
+    on a single Canvas, with the layout scaled once from the screen size.
+    Both expose the same label attributes (speed_lbl, power_lbl, ...) with a
+    Label-like config(text=, fg=, bg=), plus set_bar() and set_dot().
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 dash_render.py --bench                   frame cost, widget tree vs single canvas
+# python3 dash_render.py --bench --frames 2000
+#
+# driver_ui.py picks the renderer with RENDERER (or FSAE_RENDERER=canvas / framebuffer,
+# see fb_render.py for the X-less one).
+
+import argparse
+import random
+import statistics
+import time
+import tkinter as tk
+import tkinter.font as tkfont
+
+from PIL import Image, ImageTk
+
+from dash_log import get_logger
+
+log = get_logger("dash_render")
+
+# the hard-coded positions below were laid out for the 800x480 Pi display
+# with a 10 px border, i.e. a 780x460 drawing area
+REF_W = 780
+REF_H = 460
+BAR_W = 645
+BAR_H = 50
+FONT_FAMILY = "Mono 91"
+
+
+# ————————————————————————————————————————
+# Original widget tree
+# ————————————————————————————————————————
+class WidgetDashboard:
+    def __init__(self, root, screen_w, screen_h, border, cell_photo, cell_height, logo_path=None):
+        font_14 = (FONT_FAMILY, 14)
+        font_20 = (FONT_FAMILY, 20)
+        font_22 = (FONT_FAMILY, 22)
+        font_36 = (FONT_FAMILY, 36)
+
+        # Border frame
+        border_frame = tk.Frame(root, bg="#660000")
+        border_frame.place(relx=0, rely=0, relwidth=1, relheight=1)
+
+        # Inner content frame
+        inner_frame = tk.Frame(border_frame, bg="black")
+        inner_frame.place(x=border, y=border, width=screen_w - 2 * border, height=screen_h - 2 * border)
+        self.frame = border_frame
+
+        # Bar for motor speed
+        self.bar_canvas = tk.Canvas(inner_frame, bg="gray20", highlightthickness=0)
+        self.bar_canvas.place(x=70, y=20, width=BAR_W, height=BAR_H)
+
+        # Display of Gas and Break
+        self.gas_circle = tk.Canvas(inner_frame, width=50, height=50, bg="black", highlightthickness=0)
+        self.gas_circle.place(x=80 + BAR_W, y=15)
+        self.brake_circle = tk.Canvas(inner_frame, width=50, height=50, bg="black", highlightthickness=0)
+        self.brake_circle.place(x=3, y=15)
+        self.set_dot("gas", "gray25")
+        self.set_dot("brake", "gray25")
+
+        # Left column
+        speed_frame = tk.Frame(inner_frame, bg="black")
+        speed_frame.place(x=30, y=90)
+        tk.Label(speed_frame, text="Motor Speed: ", font=font_20, fg="white", bg="black").pack(side="left")
+        self.speed_lbl = tk.Label(speed_frame, text="### rpm", font=font_36, fg="white", bg="black")
+        self.speed_lbl.pack(side="left")
+
+        def label(x, y, font, fg="white", text=""):
+            lbl = tk.Label(inner_frame, text=text, font=font, fg=fg, bg="black")
+            lbl.place(x=x, y=y)
+            return lbl
+
+        self.power_lbl = label(30, 150, font_22)
+        self.motor_temp_lbl = label(30, 190, font_14)
+        self.motor_cnt_temp_lbl = label(30, 215, font_14)
+        self.coolant_temp_lbl = label(30, 240, font_14)
+        self.acc_temp_lbl = label(30, 265, font_14)
+        self.noncrit_lbl = label(30, 300, (FONT_FAMILY, 16), fg="yellow")
+        self.energy_lbl = label(30, 335, font_14)
+
+        # Right column
+        self.min_voltage_lbl = label(500, 150, font_20)
+        self.max_voltage_lbl = label(500, 190, font_20)
+
+        acc_frame = tk.Frame(inner_frame, bg="black")
+        acc_frame.place(x=500, y=90)
+        tk.Label(acc_frame, text="ACC: ", font=font_20, fg="white", bg="black").pack(side="left")
+        self.acc_lbl = tk.Label(acc_frame, text="### V", font=font_36, fg="white", bg="black")
+        self.acc_lbl.pack(side="left")
+
+        self.sd_lbl = label(500, 235, font_14, text="SD: -")
+
+        # Cell voltage / temperature heatmap
+        tk.Label(inner_frame, image=cell_photo, bg="black", bd=0).place(x=500, y=265)
+        self.weak_cell_lbl = label(500, 270 + cell_height, font_14)
+
+        # State at bottom left
+        self.state_lbl = tk.Label(inner_frame, text="Waiting for Serial Connection",
+                                  font=(FONT_FAMILY, 28, "bold"), fg="yellow", bg="black")
+        self.state_lbl.place(relx=0.025, rely=1.0, y=-30, anchor="sw")
+
+        # Fault banner at the centre
+        self.fault_lbl = tk.Label(inner_frame, text="", font=(FONT_FAMILY, 28, "bold"), fg="white", bg="black")
+        self.fault_lbl.place(x=screen_w // 2 - 10, y=screen_h // 2 - 20, anchor="center")
+
+        # Bronco Racing Logo (bottom right)
+        self.logo = _load_logo(logo_path, 100)
+        if self.logo is not None:
+            tk.Label(inner_frame, image=self.logo, bg="black").place(
+                x=screen_w - 2 * border - 115, y=screen_h - 2 * border - 115)
+
+    def set_bar(self, fraction):
+        fill_w = int(fraction * BAR_W)
+        self.bar_canvas.delete("all")
+        self.bar_canvas.create_rectangle(0, 0, fill_w, BAR_H, fill="lime", width=0)
+
+    def set_dot(self, which, color):
+        canvas = self.gas_circle if which == "gas" else self.brake_circle
+        canvas.delete("all")
+        canvas.create_oval(5, 5, 45, 45, fill=color, width=0)
+
+    def destroy(self):
+        self.frame.destroy()
+
+
+# ————————————————————————————————————————
+# Single canvas
+# ————————————————————————————————————————
+class CanvasText:
+    """A canvas text item that behaves like a Label for config(text=, fg=, bg=).
+    Only attributes that actually changed reach Tk; a non-black bg is drawn as a
+    rectangle behind the text (the fault banner)."""
+
+    PAD = 4
+
+    def __init__(self, canvas, x, y, font, fg="white", text="", anchor="nw"):
+        self.canvas = canvas
+        self.text = text
+        self.fg = fg
+        self.bg = "black"
+        self._bg_item = canvas.create_rectangle(0, 0, 0, 0, width=0, state="hidden")
+        self.item = canvas.create_text(x, y, text=text, fill=fg, font=font, anchor=anchor)
+
+    def config(self, text=None, fg=None, bg=None):
+        opts = {}
+        if text is not None and text != self.text:
+            self.text = opts["text"] = text
+        if fg is not None and fg != self.fg:
+            self.fg = opts["fill"] = fg
+        if opts:
+            self.canvas.itemconfigure(self.item, **opts)
+        if (bg is not None and bg != self.bg) or ("text" in opts and self.bg != "black"):
+            self.bg = bg if bg is not None else self.bg
+            self._draw_bg()
+
+    configure = config
+
+    def _draw_bg(self):
+        if self.bg == "black" or not self.text:
+            self.canvas.itemconfigure(self._bg_item, state="hidden")
+            return
+        x0, y0, x1, y1 = self.canvas.bbox(self.item)
+        p = self.PAD
+        self.canvas.coords(self._bg_item, x0 - p, y0 - p, x1 + p, y1 + p)
+        self.canvas.itemconfigure(self._bg_item, fill=self.bg, state="normal")
+
+
+class Layout:
+    """Positions and font sizes scaled once from the 780x460 reference layout."""
+
+    def __init__(self, screen_w, screen_h, border):
+        self.border = border
+        self.w = screen_w - 2 * border
+        self.h = screen_h - 2 * border
+        self.scale = min(self.w / REF_W, self.h / REF_H)
+
+    def xy(self, x, y):
+        s = self.scale
+        return self.border + x * s, self.border + y * s
+
+    def box(self, x0, y0, x1, y1):
+        return (*self.xy(x0, y0), *self.xy(x1, y1))
+
+    def font(self, size, *style):
+        return (FONT_FAMILY, max(6, round(size * self.scale)), *style)
+
+
+class CanvasDashboard:
+    def __init__(self, root, screen_w, screen_h, border, cell_photo, cell_height, logo_path=None):
+        L = self.layout = Layout(screen_w, screen_h, border)
+        c = self.canvas = tk.Canvas(root, width=screen_w, height=screen_h, bg="#660000",
+                                    highlightthickness=0, bd=0)
+        c.place(x=0, y=0, width=screen_w, height=screen_h)
+        c.create_rectangle(border, border, screen_w - border, screen_h - border, fill="black", width=0)
+
+        # Bar for motor speed: the fill is one rectangle whose right edge moves
+        self._bar_x0, bar_y0, self._bar_x1, bar_y1 = L.box(70, 20, 70 + BAR_W, 20 + BAR_H)
+        c.create_rectangle(self._bar_x0, bar_y0, self._bar_x1, bar_y1, fill="gray20", width=0)
+        self._bar = c.create_rectangle(self._bar_x0, bar_y0, self._bar_x0, bar_y1, fill="lime", width=0)
+        self._bar_y = (bar_y0, bar_y1)
+        self._bar_frac = 0.0
+
+        # Display of Gas and Break
+        self._dots = {
+            "gas": c.create_oval(*L.box(85 + BAR_W, 20, 125 + BAR_W, 60), fill="gray25", width=0),
+            "brake": c.create_oval(*L.box(8, 20, 48, 60), fill="gray25", width=0),
+        }
+        self._dot_colors = {"gas": "gray25", "brake": "gray25"}
+
+        def text(x, y, size, fg="white", value="", anchor="nw", *style):
+            return CanvasText(c, *L.xy(x, y), L.font(size, *style), fg=fg, text=value, anchor=anchor)
+
+        # Left column: caption and big value share a centre line like the packed frames did
+        self.speed_lbl = self._captioned(30, 90, "Motor Speed: ", "### rpm")
+        self.power_lbl = text(30, 150, 22)
+        self.motor_temp_lbl = text(30, 190, 14)
+        self.motor_cnt_temp_lbl = text(30, 215, 14)
+        self.coolant_temp_lbl = text(30, 240, 14)
+        self.acc_temp_lbl = text(30, 265, 14)
+        self.noncrit_lbl = text(30, 300, 16, "yellow")
+        self.energy_lbl = text(30, 335, 14)
+
+        # Right column
+        self.acc_lbl = self._captioned(500, 90, "ACC: ", "### V")
+        self.min_voltage_lbl = text(500, 150, 20)
+        self.max_voltage_lbl = text(500, 190, 20)
+        self.sd_lbl = text(500, 235, 14, value="SD: -")
+
+        # Cell voltage / temperature heatmap (the image itself keeps its pixel size)
+        c.create_image(*L.xy(500, 265), image=cell_photo, anchor="nw")
+        wx, wy = L.xy(500, 265)
+        self.weak_cell_lbl = CanvasText(c, wx, wy + cell_height + 5 * L.scale, L.font(14))
+
+        # State at bottom left, fault banner at the centre
+        self.state_lbl = text(0.025 * REF_W, REF_H - 30, 28, "yellow", "Waiting for Serial Connection", "sw", "bold")
+        self.fault_lbl = text(REF_W / 2, REF_H / 2, 28, "white", "", "center", "bold")
+
+        # Bronco Racing Logo (bottom right)
+        size = round(100 * L.scale)
+        self.logo = _load_logo(logo_path, size)
+        if self.logo is not None:
+            c.create_image(*L.xy(REF_W - 115, REF_H - 115), image=self.logo, anchor="nw")
+
+    def _captioned(self, x, y, caption, placeholder):
+        L, c = self.layout, self.canvas
+        value_font = L.font(36)
+        mid = L.xy(x, y)[1] + tkfont.Font(font=value_font).metrics("linespace") / 2
+        cap = c.create_text(L.xy(x, y)[0], mid, text=caption, fill="white", font=L.font(20), anchor="w")
+        return CanvasText(c, c.bbox(cap)[2], mid, value_font, text=placeholder, anchor="w")
+
+    def set_bar(self, fraction):
+        fraction = max(0.0, min(1.0, fraction))
+        if fraction == self._bar_frac:
+            return
+        self._bar_frac = fraction
+        x = self._bar_x0 + fraction * (self._bar_x1 - self._bar_x0)
+        self.canvas.coords(self._bar, self._bar_x0, self._bar_y[0], x, self._bar_y[1])
+
+    def set_dot(self, which, color):
+        if self._dot_colors[which] != color:
+            self._dot_colors[which] = color
+            self.canvas.itemconfigure(self._dots[which], fill=color)
+
+    def destroy(self):
+        self.canvas.destroy()
+
+
+RENDERERS = {"widgets": WidgetDashboard, "canvas": CanvasDashboard}
+
+def get_renderer(name):
+    # fb_render imports Layout from here, so it is loaded on demand
+    if name == "framebuffer":
+        from fb_render import FramebufferDashboard
+        return FramebufferDashboard
+    return RENDERERS[name]
+
+
+def _load_logo(path, size):
+    if path is None:
+        return None
+    try:
+        img = Image.open(path)
+        img = img.resize((size, size), Image.Resampling.LANCZOS)
+        return ImageTk.PhotoImage(img)
+    except Exception as e:
+        log.warning("logo_load_error", error=e)
+        return None
+
+
+# ————————————————————————————————————————
+# Benchmark
+# ————————————————————————————————————————
+def _frame_values(rng):
+    v = rng.uniform(3.0, 4.2)
+    t = rng.uniform(20, 70)
+    return {
+        "speed_lbl": (f"{rng.uniform(0, 800):.0f} RPM", "white"),
+        "power_lbl": (f"Power: {rng.uniform(0, 80000):.2f} W", "white"),
+        "motor_temp_lbl": (f"Mtr Tmp: {t:.1f} °C", "red" if t > 60 else "white"),
+        "motor_cnt_temp_lbl": (f"Cnt Tmp: {t + 3:.1f} °C", "white"),
+        "coolant_temp_lbl": (f"Cool Tmp: {t - 10:.1f} °C", "white"),
+        "acc_temp_lbl": (f"Acc Tmp: {t - 5:.1f} °C", "white"),
+        "acc_lbl": (f"{v * 140:.1f} V", "white"),
+        "min_voltage_lbl": (f"Min: {v:.3f} V", "red" if v < 3.2 else "white"),
+        "max_voltage_lbl": (f"Max: {v + 0.05:.3f} V", "white"),
+        "energy_lbl": (f"SoC {rng.uniform(0, 100):.0f}%  {rng.uniform(0, 6):.2f} kWh", "white"),
+    }
+
+def bench(frames=1000, width=800, height=480, border=10, seed=1):
+    root = tk.Tk()
+    root.geometry(f"{width}x{height}+0+0")
+    cell_img = Image.new("RGB", (280, 70), "black")
+    cell_photo = ImageTk.PhotoImage(cell_img)
+    results = {}
+    for name, cls in RENDERERS.items():
+        rng = random.Random(seed)
+        ui = cls(root, width, height, border, cell_photo, cell_img.height)
+        root.update()
+        times = []
+        for i in range(frames):
+            t0 = time.perf_counter()
+            for lbl, (text, fg) in _frame_values(rng).items():
+                getattr(ui, lbl).config(text=text, fg=fg)
+            ui.set_bar(rng.random())
+            ui.set_dot("gas", "green" if i % 2 else "gray25")
+            ui.set_dot("brake", "red" if i % 3 == 0 else "gray25")
+            if i % 50 == 0:
+                ui.fault_lbl.config(text="TRACTIVE SYSTEM SHUTDOWN — BMS" if i % 100 else "",
+                                    bg="red" if i % 100 else "black")
+            root.update()   # geometry + redraw, as the mainloop would do when idle
+            times.append(time.perf_counter() - t0)
+        n_widgets = len(_descendants(root))
+        ui.destroy()
+        root.update()
+        times.sort()
+        results[name] = times
+        print(f"{name:8s} {n_widgets:3d} widgets  median {statistics.median(times) * 1000:6.2f} ms  "
+              f"p95 {times[int(len(times) * 0.95)] * 1000:6.2f} ms  "
+              f"max {times[-1] * 1000:6.2f} ms  per frame ({frames} frames)")
+    root.destroy()
+    return results
+
+def _descendants(widget):
+    out = []
+    for child in widget.winfo_children():
+        out.append(child)
+        out.extend(_descendants(child))
+    return out
+
+def main():
+    parser = argparse.ArgumentParser(description="Dashboard renderers")
+    parser.add_argument("--bench", action="store_true", help="frame cost, widget tree vs single canvas")
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--size", default="800x480", help="screen size WxH for the benchmark")
+    args = parser.parse_args()
+    w, h = (int(x) for x in args.size.split("x"))
+    bench(args.frames, w, h)
+
+if __name__ == "__main__":
+    main()
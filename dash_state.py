@@ -0,0 +1,185 @@
+"""
+    Description: Dashboard state logic without any Tk. Faults, state flags,
+    precharge status and the state/fault label texts live here so the driver
+    display and the headless scenario runner (scenario_runner.py) share
+    exactly the same rules.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+from clock_sync import split_stamp
+from derived import PRECHARGE_TARGET, precharge_done, precharge_fraction
+LINK_TIMEOUT_S = 1.0     # no telemetry for this long after the first line -> link lost
+
+CRITICAL_KEYS   = ["IMD", "BMS", "BSPD", "MC", "REAR_TEENSY"]
+NONCRITICAL_KEYS = ["SDCARD", "ACCEL", "UI_STALL"]
+
+
+# ————————————————
+# Faults Dictionary
+# ————————————————
+def new_faults():
+    return {
+        "BMS": 0, #Battery management system (Critical)
+        "IMD": 0, #Insulation monitoring device (Critical)
+        "BSPD": 0, #Brake system plausibility device (Critical)
+        "MC" : 0, #Motor Controller/inverter fault (Critical)
+        "REAR_TEENSY": 0, #Check if Rear-Teensy is connected (Critical)
+        "SDCARD": 0, #SD activity (Non-Critical)
+        "ACCEL": 0, #accelerator warning (Non-Critical)
+        "UI_STALL": 0, #display loop ran late, see ui_watchdog.py (Non-Critical)
+        "INTERLOCK": 0,
+        "TSMS": 0, #Tractive System master Switch
+        "GLVMS": 0, #Grounded Low-Voltage Master Switch
+        "SDBTN": 0, #Shutdown Button
+        "BOTS": 0 #Brake Over-Travel Switch
+    }
+
+# ————————————————
+# UI State Flags Dictionary
+# ————————————————
+def new_state_flags():
+    return {
+        "status": 0,          # 0=not enabled, 1=enabled (from Teensy)
+        "ts_active": 0,       # 0=SDC open, 1=SDC closed / tractive armed
+        "manual_reset_ok": 0, # manual reset latch cleared
+        "brk": 0,
+        "gas": 0,
+        "precharge_active": 0, # 1 while precharge relay is on and charging DC
+        "precharge_ok": 0, # 1 when the IC >= 90%
+        "link_lost": 0,    # 1 when telemetry stopped arriving
+    }
+
+
+class DashState:
+    def __init__(self):
+        self.faults = new_faults()
+        self.state_flags = new_state_flags()
+        self.pack_voltage = 0.0
+        self.ic_voltage = 0.0
+        self.last_rx = None
+        self.parse_errors = 0
+
+    # ————————————————
+    # queries
+    # ————————————————
+    def any_critical_active(self):
+        return any(self.faults[k] == 1 for k in CRITICAL_KEYS)
+
+    def any_noncritical_active(self):
+        return any(self.faults[k] == 1 for k in NONCRITICAL_KEYS)
+
+    def rtd_ready(self):
+        crit_ok = all(self.faults[k] == 0 for k in CRITICAL_KEYS)
+        return crit_ok and self.state_flags.get("precharge_ok", 0) == 1
+
+    def active_faults(self):
+        crit = [k for k in CRITICAL_KEYS if self.faults.get(k, 0) == 1]
+        nonc = [k for k in NONCRITICAL_KEYS if self.faults.get(k, 0) == 1]
+        return crit, nonc
+
+    def state_label(self):
+        """(text, colour) for the state label at the bottom left."""
+        flags = self.state_flags
+        if flags.get("link_lost", 0) == 1:
+            return "LINK LOST", "red"
+
+        # a critical fault with the SDC open reads TRACTIVE SYSTEM OFF here; the
+        # fault banner is what names the fault (the old SHUTDOWN text was always
+        # overwritten by the checks below)
+        if flags.get("precharge_active", 0) == 1 and flags.get("precharge_ok", 0) == 0:
+            return "PRECHARGING…", "yellow"
+
+        if flags.get("ts_active", 0) == 0:
+            return "TRACTIVE SYSTEM OFF", "white"
+
+        if flags.get("status", 0) == 0:
+            return "Ready to Drive", "yellow"
+        return "Enabled", "lime"
+
+    # ————————————————
+    # updates
+    # ————————————————
+    def apply(self, key, value):
+        """Applies one channel value. Returns a set with "state" and/or "faults" if those labels need a redraw."""
+        flags = self.state_flags
+        if key in ("status", "ts_active", "manual_reset_ok", "precharge_active", "precharge_ok"):
+            flags[key] = int(value)
+            return {"state"}
+
+        if key == "sd":
+            self.faults["SDCARD"] = 0 if int(value) else 1
+            return {"faults"}
+
+        if key.startswith("fault_"):
+            fault_name = key.split("_", 1)[1].upper()
+            if fault_name in self.faults:
+                self.faults[fault_name] = int(value)
+                return {"faults", "state"}
+            return set()
+
+        if key in ("brk", "gas"):
+            flags[key] = int(value == 1)
+            return {"state"}
+
+        if key == "ts_v":
+            self.pack_voltage = float(value)
+            return set()
+
+        if key == "ic_v":
+            self.ic_voltage = float(value)
+            fraction = precharge_fraction(self.pack_voltage, self.ic_voltage)
+            flags["precharge_ok"] = 0 if fraction is None else precharge_done(fraction)
+            return {"state"}
+
+        return set()
+
+    def snapshot(self):
+        """Plain-dict copy of the state, for session log keyframes."""
+        return {
+            "faults": dict(self.faults),
+            "state_flags": dict(self.state_flags),
+            "pack_voltage": self.pack_voltage,
+            "ic_voltage": self.ic_voltage,
+        }
+
+    def restore(self, snap):
+        """Loads a snapshot() back; keys missing from an older snapshot keep their defaults."""
+        self.faults.update(snap.get("faults", {}))
+        self.state_flags.update(snap.get("state_flags", {}))
+        self.pack_voltage = snap.get("pack_voltage", self.pack_voltage)
+        self.ic_voltage = snap.get("ic_voltage", self.ic_voltage)
+
+    def mark_rx(self, now):
+        """Call for every line received. Returns True if this clears a lost link."""
+        self.last_rx = now
+        if self.state_flags["link_lost"]:
+            self.state_flags["link_lost"] = 0
+            return True
+        return False
+
+    def tick(self, now):
+        """Checks the link timeout. Returns True if link_lost just changed."""
+        if self.last_rx is None or self.state_flags["link_lost"]:
+            return False
+        if now - self.last_rx > LINK_TIMEOUT_S:
+            self.state_flags["link_lost"] = 1
+            return True
+        return False
+
+    def feed_line(self, line, now):
+        """Headless version of handle_serial_line: parse, apply, count malformed lines."""
+        changed = set()
+        if self.mark_rx(now):
+            changed.add("state")
+        line = line.strip()
+        if "=" not in line:
+            return changed
+        try:
+            key, value = line.split("=")
+            value, _ = split_stamp(value)
+            if key.startswith(("cv_", "ct_")) or key in ("ack", "nak", "sync"):
+                return changed
+            return changed | self.apply(key, float(value))
+        except ValueError:
+            self.parse_errors += 1
+            return changed
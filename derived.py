@@ -0,0 +1,175 @@
+"""
+    Description: Derived channels (vehicle speed, cell spread, pack power,
+    efficiency, precharge) declared as a dependency graph over the raw
+    telemetry channels. Inputs are set as they arrive; evaluate() recomputes
+    only the nodes downstream of inputs that changed, in dependency order,
+    and returns the derived values that changed.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# graph = default_graph()
+# graph.set("mtr_s", 3000.0)              on every sample (channels nothing depends on are ignored)
+# for name, value in graph.evaluate().items(): ...     once per frame
+#
+# New channel: graph.add("name", ("input_a", "input_b"), fn) where fn(a, b) returns the
+# value, or None while it can't be computed (e.g. divide by ~0); inputs may be derived.
+
+import heapq
+import math
+
+# ————————————————
+# CONFIG
+# ————————————————
+GEAR_RATIO = 4.5         # motor turns per wheel turn
+WHEEL_R = 0.228          # m, loaded tyre radius
+PRECHARGE_TARGET = 0.90
+MIN_PACK_PWR_W = 100.0   # below this efficiency is noise, not a number
+MIN_SPEED_KMH = 5.0      # below this Wh/km runs off to infinity
+
+
+class CycleError(ValueError):
+    pass
+
+
+class Node:
+    __slots__ = ("name", "inputs", "fn", "order")
+
+    def __init__(self, name, inputs, fn):
+        self.name = name
+        self.inputs = tuple(inputs)
+        self.fn = fn
+        self.order = 0
+
+
+class DerivedGraph:
+    def __init__(self):
+        self._nodes = {}
+        self._values = {}        # inputs and derived channels, latest value
+        self._downstream = {}    # channel -> derived nodes that read it directly
+        self._dirty = set()
+        self._order = []
+
+    def add(self, name, inputs, fn):
+        if name in self._nodes:
+            raise ValueError(f"derived channel '{name}' is already defined")
+        self._nodes[name] = Node(name, inputs, fn)
+        for src in inputs:
+            self._downstream.setdefault(src, []).append(self._nodes[name])
+        try:
+            self._sort()
+        except CycleError:
+            self._remove(name)
+            raise
+        self._dirty.add(name)
+        return self
+
+    def _remove(self, name):
+        node = self._nodes.pop(name)
+        for src in node.inputs:
+            self._downstream[src].remove(node)
+        self._sort()
+
+    def _sort(self):
+        """Kahn's algorithm over the derived nodes; node.order is its position."""
+        pending = {n.name: sum(src in self._nodes for src in n.inputs) for n in self._nodes.values()}
+        ready = [name for name, count in pending.items() if count == 0]
+        order = []
+        while ready:
+            name = ready.pop()
+            order.append(name)
+            for node in self._downstream.get(name, ()):
+                pending[node.name] -= 1
+                if pending[node.name] == 0:
+                    ready.append(node.name)
+        if len(order) != len(self._nodes):
+            stuck = sorted(set(self._nodes) - set(order))
+            raise CycleError(f"derived channels form a cycle: {', '.join(stuck)}")
+        for i, name in enumerate(order):
+            self._nodes[name].order = i
+        self._order = order
+
+    # ————————————————
+    # per sample
+    # ————————————————
+    def set(self, name, value):
+        """Records a raw input. Returns False if nothing depends on it (or it's a derived name)."""
+        consumers = self._downstream.get(name)
+        if not consumers or name in self._nodes:
+            return False
+        if self._values.get(name) != value:
+            self._values[name] = value
+            self._dirty.update(node.name for node in consumers)
+        return True
+
+    # ————————————————
+    # per frame
+    # ————————————————
+    def evaluate(self):
+        """Recomputes dirty nodes and everything downstream of them. Returns {name: value} that changed;
+        a value that went away (an input missing, or the formula returned None) is reported as None."""
+        if not self._dirty:
+            return {}
+        changed = {}
+        nodes = self._nodes
+        # dependency order; a node whose value changes dirties its consumers further down
+        heap = [(nodes[name].order, name) for name in self._dirty]
+        heapq.heapify(heap)
+        seen = self._dirty
+        self._dirty = set()
+        while heap:
+            node = nodes[heapq.heappop(heap)[1]]
+            args = [self._values.get(src) for src in node.inputs]
+            value = None if None in args else node.fn(*args)
+            if value == self._values.get(node.name) or (value is None and node.name not in self._values):
+                continue
+            if value is None:
+                del self._values[node.name]
+            else:
+                self._values[node.name] = value
+            changed[node.name] = value
+            for consumer in self._downstream.get(node.name, ()):
+                if consumer.name not in seen:
+                    seen.add(consumer.name)
+                    heapq.heappush(heap, (consumer.order, consumer.name))
+        return changed
+
+    def get(self, name, default=None):
+        return self._values.get(name, default)
+
+    def names(self):
+        return list(self._order)
+
+    def inputs(self):
+        return sorted(set(self._downstream) - set(self._nodes))
+
+
+# ————————————————————————————————————————
+# Formulas (also used directly by dash_state.py)
+# ————————————————————————————————————————
+def vehicle_speed_kmh(motor_rpm, gear_ratio=GEAR_RATIO, wheel_r=WHEEL_R):
+    return motor_rpm / gear_ratio * 2 * math.pi * wheel_r * 60 / 1000
+
+def precharge_fraction(ts_v, ic_v):
+    """Inverter-side voltage as a fraction of the pack, or None with no pack voltage."""
+    return ic_v / ts_v if ts_v > 0.0 else None
+
+def precharge_done(fraction):
+    return int(fraction >= PRECHARGE_TARGET)
+
+def efficiency(motor_pwr, pack_pwr):
+    """Motor controller power over power drawn from the pack."""
+    return motor_pwr / pack_pwr if pack_pwr >= MIN_PACK_PWR_W else None
+
+def wh_per_km(pack_pwr, speed_kmh):
+    return pack_pwr / speed_kmh if speed_kmh >= MIN_SPEED_KMH else None
+
+
+def default_graph():
+    return (DerivedGraph()
+            .add("veh_spd", ("mtr_s",), vehicle_speed_kmh)
+            .add("cell_spread", ("max_v", "min_v"), lambda hi, lo: round(hi - lo, 4))
+            .add("pack_pwr", ("acc_v", "acc_i"), lambda v, i: v * i)
+            .add("eff", ("pwr", "pack_pwr"), efficiency)
+            .add("wh_km", ("pack_pwr", "veh_spd"), wh_per_km)
+            .add("pre_frac", ("ts_v", "ic_v"), precharge_fraction))
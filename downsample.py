@@ -0,0 +1,208 @@
+"""
+    Description: Shape-preserving downsampling for session export and charts.
+    Min/max keeps the lowest and highest sample of every bucket, so no spike
+    is ever lost; LTTB (largest triangle three buckets) keeps the one sample
+    per bucket that best preserves the visual shape. Both report how far the
+    reduced series strays from the original.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 downsample.py logs/session.tlog --export out.csv --points 2000
+# python3 downsample.py logs/session.tlog --export out.json --mode minmax --keys mtr_t,min_v
+# python3 downsample.py --bench              1M-sample throughput and error for both modes
+#
+# t_ds, v_ds = reduce(t, v, 2000, "lttb")     in code; for a chart use about 2 points per pixel
+
+import argparse
+import csv
+import json
+import os
+import time
+
+import numpy as np
+
+MODES = ("lttb", "minmax")
+DEFAULT_POINTS = 2000
+
+
+def _buckets(n, n_buckets):
+    """Pads 0..n-1 into an (n_buckets, size) index matrix; -1 marks padding in the last rows."""
+    size = -(-n // n_buckets)
+    n_buckets = -(-n // size)
+    idx = np.arange(n_buckets * size)
+    idx[idx >= n] = -1
+    return idx.reshape(n_buckets, size)
+
+
+# ————————————————————————————————————————
+# Min/max
+# ————————————————————————————————————————
+def minmax(t, v, n_out):
+    """Lowest and highest sample of each of n_out/2 equal-count buckets, in time order.
+    Every local extreme wider than a bucket survives."""
+    t = np.asarray(t, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    n = len(v)
+    if n <= n_out or n_out < 2:
+        return t, v
+    idx = _buckets(n, n_out // 2)
+    pad = idx < 0
+    vals = v[idx]
+    lo = np.where(pad | np.isnan(vals), np.inf, vals).argmin(axis=1)
+    hi = np.where(pad | np.isnan(vals), -np.inf, vals).argmax(axis=1)
+    rows = np.arange(len(idx))
+    keep = np.stack((idx[rows, lo], idx[rows, hi]), axis=1)
+    keep = np.sort(keep, axis=1).ravel()
+    keep = keep[np.r_[True, keep[1:] != keep[:-1]]]   # flat buckets give the same sample twice
+    return t[keep], v[keep]
+
+
+# ————————————————————————————————————————
+# LTTB
+# ————————————————————————————————————————
+def lttb(t, v, n_out):
+    """Largest-triangle-three-buckets. Keeps the first and last samples plus one per bucket.
+    Bucket averages and the padded bucket matrix are built in one vectorized pass; the
+    remaining loop is one row-wise argmax per output point."""
+    t = np.asarray(t, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    n = len(v)
+    if n <= n_out or n_out < 3:
+        return t, v
+    idx = _buckets(n - 2, n_out - 2) + 1
+    pad = idx < 1
+    idx[pad] = 1
+    bt = t[idx]
+    bv = v[idx]
+    counts = (~pad).sum(axis=1)
+    avg_t = np.where(pad, 0.0, bt).sum(axis=1) / counts
+    avg_v = np.where(pad, 0.0, bv).sum(axis=1) / counts
+    # point C for each bucket: the next bucket's average, the last sample for the last bucket
+    ct = np.append(avg_t[1:], t[-1])
+    cv = np.append(avg_v[1:], v[-1])
+
+    keep = np.empty(len(idx) + 2, dtype=np.intp)
+    keep[0] = 0
+    keep[-1] = n - 1
+    at, av = t[0], v[0]
+    for i in range(len(idx)):
+        # twice the triangle area A-P-C; only the argmax matters so the 1/2 and abs sign are folded in
+        area = np.abs((at - ct[i]) * (bv[i] - av) - (at - bt[i]) * (cv[i] - av))
+        area[pad[i]] = -1.0
+        j = idx[i, area.argmax()]
+        keep[i + 1] = j
+        at, av = t[j], v[j]
+    return t[keep], v[keep]
+
+
+def reduce(t, v, n_out=DEFAULT_POINTS, mode="lttb"):
+    """At most n_out points (equal-count buckets can leave a few fewer)."""
+    if mode == "lttb":
+        return lttb(t, v, n_out)
+    if mode == "minmax":
+        return minmax(t, v, n_out)
+    raise ValueError(f"unknown downsampling mode '{mode}' (expected one of {', '.join(MODES)})")
+
+
+# ————————————————————————————————————————
+# Error bounds
+# ————————————————————————————————————————
+def error_bounds(t, v, t_ds, v_ds):
+    """How far the original samples lie from the line through the reduced series.
+    max_abs is the worst case over every original sample, rms the typical one;
+    both are also given as a fraction of the channel's range."""
+    t = np.asarray(t, dtype=np.float64)
+    v = np.asarray(v, dtype=np.float64)
+    if len(v) == 0:
+        return {"max_abs": 0.0, "rms": 0.0, "max_rel": 0.0, "rms_rel": 0.0}
+    err = np.abs(v - np.interp(t, t_ds, v_ds))
+    err = err[~np.isnan(err)]
+    span = float(np.nanmax(v) - np.nanmin(v)) or 1.0
+    max_abs = float(err.max()) if len(err) else 0.0
+    rms = float(np.sqrt(np.mean(err * err))) if len(err) else 0.0
+    return {"max_abs": max_abs, "rms": rms, "max_rel": max_abs / span, "rms_rel": rms / span}
+
+
+# ————————————————————————————————————————
+# Export
+# ————————————————————————————————————————
+def export(path, out, n_out=DEFAULT_POINTS, mode="lttb", keys=None):
+    """Writes every channel (or just `keys`) of a session reduced to n_out points as CSV
+    (channel,t,value rows) or JSON ({channel: {t, v, error}}), chosen by out's extension."""
+    from session_analytics import load_columns
+
+    cols = load_columns(path)
+    reduced = {}
+    for key in sorted(keys or cols):
+        if key not in cols:
+            continue
+        t, v = cols[key]
+        t_ds, v_ds = reduce(t, v, n_out, mode)
+        reduced[key] = (t_ds, v_ds, error_bounds(t, v, t_ds, v_ds), len(v))
+
+    if out.endswith(".json"):
+        doc = {"session": os.path.basename(path), "mode": mode, "channels": {
+            key: {"t": t_ds.tolist(), "v": v_ds.tolist(), "samples": n, "error": err}
+            for key, (t_ds, v_ds, err, n) in reduced.items()}}
+        with open(out, "w", encoding="utf-8") as f:
+            json.dump(doc, f)
+    else:
+        with open(out, "w", newline="", encoding="utf-8") as f:
+            w = csv.writer(f)
+            w.writerow(["channel", "t", "value"])
+            for key, (t_ds, v_ds, _, _) in reduced.items():
+                w.writerows((key, f"{ti:.3f}", f"{vi:.6g}") for ti, vi in zip(t_ds, v_ds))
+    return reduced
+
+
+# ————————————————————————————————————————
+# Benchmark
+# ————————————————————————————————————————
+def _bench_series(n, seed=0):
+    """Telemetry-like: slow drift, a periodic load, noise and a few one-sample spikes."""
+    rng = np.random.default_rng(seed)
+    t = np.cumsum(rng.uniform(0.004, 0.006, n))
+    v = 60 + 20 * np.sin(t / 60) + 8 * np.sin(t / 3) + rng.normal(0, 0.5, n)
+    v[rng.integers(0, n, 20)] += 25
+    return t, v
+
+def bench(n=1_000_000, n_out=DEFAULT_POINTS, repeats=5):
+    t, v = _bench_series(n)
+    print(f"{n:,} samples -> {n_out} points, best of {repeats}")
+    spikes = np.sort(v)[-20:].min()
+    for mode in MODES:
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            t_ds, v_ds = reduce(t, v, n_out, mode)
+            best = min(best, time.perf_counter() - start)
+        err = error_bounds(t, v, t_ds, v_ds)
+        kept = int(np.sum(v_ds >= spikes))
+        print(f"  {mode:<7} {best * 1000:7.1f} ms  {n / best / 1e6:6.1f} M samples/s  "
+              f"max err {err['max_rel'] * 100:5.1f}% of range  rms {err['rms_rel'] * 100:4.2f}%  "
+              f"spikes kept {kept}/20")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Downsample session logs for export and charts")
+    parser.add_argument("log", nargs="?", help="session log file")
+    parser.add_argument("--export", metavar="OUT", help="output file, .csv or .json")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS, help="points per channel")
+    parser.add_argument("--mode", choices=MODES, default="lttb")
+    parser.add_argument("--keys", help="comma-separated channels (default: all)")
+    parser.add_argument("--bench", action="store_true", help="throughput benchmark on 1M samples")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(n_out=args.points)
+        return
+    if not args.log or not args.export:
+        parser.error("a log file and --export are required (or use --bench)")
+    keys = args.keys.split(",") if args.keys else None
+    reduced = export(args.log, args.export, args.points, args.mode, keys)
+    for key, (t_ds, _, err, n) in reduced.items():
+        print(f"{key:<12} {n:>9} -> {len(t_ds):>5}  max err {err['max_abs']:.4g} ({err['max_rel'] * 100:.1f}%)")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,31 @@
 import os
 import tkinter as tk
-import serial
+import threading
 import time
 import math
-from PIL import Image, ImageTk
+from PIL import ImageTk
 from collections import deque
+from cell_array import CellArray, CellHeatmap, parse_segment_line
+from energy import EnergyEstimator, format_summary
+from session_log import SessionLog
+from shutdown import ShutdownCoordinator, write_summary
+from command_channel import CommandChannel
+from clock_sync import ClockSync, split_stamp
+from channel_store import ChannelStore
+from dash_state import DashState, CRITICAL_KEYS, PRECHARGE_TARGET
+from multi_ingest import IngestMux, SerialSource
+from can_ingest import CanSource
+from shm_bus import ShmChannelBus
+from ui_watchdog import UiWatchdog
+from alarms import AlarmTable
+from derived import default_graph
+from metrics import REGISTRY, MetricsServer
+from latency_trace import LatencyTracer
+import dash_log
+from dash_log import get_logger
+from dash_render import get_renderer
+
+log = get_logger("driver_ui")
 
 # ————————————————
 # CONFIG
@@ -14,51 +35,46 @@ BORDER_THICKNESS = 10
 
 #SERIAL_PORT = "/dev/serial0"
 #BAUD_RATE = 19200
+REAR_SERIAL_PORT = None   # e.g. "/dev/ttyACM0" once the rear Teensy is wired to the Pi
+CAN_INTERFACE = None      # e.g. "can0", or "vcan0" on the bench; decoded with fsae_dash.dbc
+BUS_NAME = os.environ.get("FSAE_BUS")   # shared-memory bus from `shm_bus.py --ingest`; the UI then just reads it
+RENDERER = os.environ.get("FSAE_RENDERER", "widgets")   # "widgets", "canvas" (one Tk canvas) or "framebuffer" (no X, see fb_render.py)
+SERIAL_SOURCE = os.environ.get("FSAE_SERIAL", "fake")   # "fake" (built-in sim_tick), "sim[:speed]"/"simproc[:speed]" (vehicle_sim.py) , "loopback" (latency_trace.py) or "none"; FSAE_BUS implies "none"
+METRICS_ADDR = os.environ.get("FSAE_METRICS", "127.0.0.1:9108")   # Prometheus/JSON endpoint (metrics.py); "off" disables
 
 handshake = False
-min_voltage_threshold = 1.0
-max_motor_temp_threshold = 100
-max_controller_temp_threshold = 100
-max_coolant_temp_threshold = 90
-max_acc_temp_threshold = 90
+ALARM_RELOAD_MS = 1000    # alarm_limits.json is re-read this often when it changes
 
 # ————————————————
-# Faults Dictionary
+# Alarm limits (alarm_limits.json, evaluated once per frame in alarms.py)
 # ————————————————
-faults = {
-    "BMS": 0, #Battery management system (Critical)
-    "IMD": 0, #Insulation monitoring device (Critical)
-    "BSPD": 0, #Brake system plausibility device (Critical)
-    "MC" : 0, #Motor Controller/inverter fault (Critical)
-    "REAR_TEENSY": 0, #Check if Rear-Teensy is connected (Critical)
-    "SDCARD": 0, #SD activity (Non-Critical)
-    "ACCEL": 0, #accelerator warning (Non-Critical)
-    "INTERLOCK": 0,
-    "TSMS": 0, #Tractive System master Switch
-    "GLVMS": 0, #Grounded Low-Voltage Master Switch
-    "SDBTN": 0, #Shutdown Button
-    "BOTS": 0 #Brake Over-Travel Switch
-}
-
-CRITICAL_KEYS   = ["IMD", "BMS", "BSPD", "MC", "REAR_TEENSY"]
-NONCRITICAL_KEYS = ["SDCARD", "ACCEL"]
+alarms = AlarmTable.from_file()
 
-def any_critical_active():
-    return any(faults[k] == 1 for k in CRITICAL_KEYS)
+# ————————————————
+# Derived channels (speed, cell spread, pack power... see derived.py), recomputed once per frame
+# ————————————————
+derived = default_graph()
 
-def any_noncritical_active():
-    return any(faults[k] == 1 for k in NONCRITICAL_KEYS)
+# ————————————————
+# Counters bumped in the loops below (everything else is read when scraped, see register_metrics)
+# ————————————————
+parse_errors = REGISTRY.counter("fsae_parse_errors_total", "Telemetry lines that failed to parse")
+handshake_attempts = REGISTRY.counter("fsae_handshake_attempts_total", "pi_ready messages sent to the Teensy")
+link_lost_events = REGISTRY.counter("fsae_link_lost_total", "Times telemetry stopped arriving")
+frame_seconds = REGISTRY.histogram("fsae_frame_seconds", "Time spent per serial/UI update pass")
 
 # ————————————————
-# UI State Flags Dictionary
+# Faults / UI state flags (rules live in dash_state.py)
 # ————————————————
-state_flags = {
-    "status": 0,          # 0=not enabled, 1=enabled (from Teensy)
-    "ts_active": 0,       # 0=SDC open, 1=SDC closed / tractive armed
-    "manual_reset_ok": 0, # manual reset latch cleared
-    "brk": 0,
-    "gas": 0,
-}
+dash = DashState()
+faults = dash.faults
+state_flags = dash.state_flags
+
+def any_critical_active():
+    return dash.any_critical_active()
+
+def any_noncritical_active():
+    return dash.any_noncritical_active()
 
 
 
@@ -77,6 +93,10 @@ class FakeSerial:
     def __init__(self):
         self._rx = deque()
         self._is_open = True
+        self._boot = time.monotonic() - 12.3   # Teensy has been up a while, clock runs 50 ppm fast
+
+    def _teensy_us(self):
+        return int((time.monotonic() - self._boot) * (1 + 50e-6) * 1e6) % (1 << 32)
 
     @property
     def in_waiting(self):
@@ -90,9 +110,16 @@ class FakeSerial:
 
     def write(self, data: bytes):
         text = data.decode(errors="ignore").strip().lower()
-        print(f"[fake serial wrote] {text}")
+        log.debug("fake_serial_write", text=text)
         if "pi_ready" in text:
             self._rx.append(b"rodger\n")
+        elif text.startswith("sync@"):
+            t2 = self._teensy_us()
+            self._rx.append(f"sync={text[5:]},{t2},{self._teensy_us()}\n".encode())
+        elif "@" in text:
+            # pretend the Teensy acks every sequenced command
+            seq = text.split("@", 1)[1].split(" ", 1)[0]
+            self._rx.append(f"ack={seq}\n".encode())
 
     def close(self):
         self._is_open = False
@@ -101,150 +128,276 @@ class FakeSerial:
     def is_open(self):
         return self._is_open
 
-# Use this fake serial instead of the real port
-ser = FakeSerial()
+# Use a fake serial instead of the real port
+def open_fake_serial(spec):
+    name, _, arg = spec.partition(":")
+    if name == "sim":
+        # the physics model, at `arg` x real time
+        from vehicle_sim import SimSerial
+        return SimSerial(seed=1, speed=float(arg or 1.0))
+    if name == "simproc":
+        # same, in a child process (mem_soak.py)
+        from vehicle_sim import SimProcessSerial
+        return SimProcessSerial(seed=1, speed=float(arg or 1.0))
+    if name == "loopback":
+        from latency_trace import LoopbackSerial
+        return LoopbackSerial()
+    return FakeSerial()
+
+# with a bus, the ingest process owns the boards and `shm_bus.py --logger` the session log;
+# the UI opens no port, runs no simulator and writes no log of its own
+ser = None if BUS_NAME or SERIAL_SOURCE == "none" else open_fake_serial(SERIAL_SOURCE)
 # end of temp class
 
+session_log = None if BUS_NAME else SessionLog.open_new(state_fn=dash.snapshot)
+commands = CommandChannel(ser.write if ser is not None else lambda data: None)
+
+# every board gets its own reader thread; the UI only merges what they've read
+ingest_sources = []
+if ser is not None:
+    ingest_sources.append(SerialSource("front", ser=ser))
+    if REAR_SERIAL_PORT:
+        ingest_sources.append(SerialSource("rear", REAR_SERIAL_PORT))
+ingest = IngestMux(ingest_sources).start()
+can_source = CanSource(CAN_INTERFACE).start() if CAN_INTERFACE and not BUS_NAME else None
+bus = ShmChannelBus.attach(BUS_NAME) if BUS_NAME else None
+bus_seen = 0
+# the loopback latency rig stamps lines on the Pi clock already
+clock_sync = ClockSync.identity() if getattr(ser, "shares_pi_clock", False) else ClockSync()
+
 # ——————————————————————
 # Closes the application
 # ——————————————————————
+SHUTDOWN_DRAIN_S = 0.5
+SHUTDOWN_SYNC_S = 2.0
+SHUTDOWN_SUMMARY_S = 1.0
+SHUTDOWN_CLOSE_S = 1.0
+shutting_down = False
+
+def drain_serial(stop):
+    # whatever the Teensy sent before the shutdown command still goes in the log,
+    # logged the way the read loop would have; stop is set if the step overruns
+    deadline = time.monotonic() + SHUTDOWN_DRAIN_S
+    while time.monotonic() < deadline and not stop.is_set():
+        pending = ingest.poll(flush=True)
+        if not pending:
+            break
+        for _, source, line in pending:
+            if stop.is_set():
+                return
+            key, sep, value = line.strip().partition("=")
+            if not sep or key in LINK_KEYS:
+                continue
+            value, stamp = split_stamp(value)
+            if source == "front":
+                log_sample(key, value, stamp)
+            else:
+                session_log.write(f"{ChannelStore.name(source, key)}={value}")
+        stop.wait(0.02)
+
+def write_session_summary(coordinator):
+    write_summary(session_log.path + ".summary.json", {
+        "log": session_log.path,
+        "opened_at": session_log.opened_at,
+        "duration_s": time.time() - session_log.opened_at,
+        "lines": session_log.lines,
+        "energy": energy.snapshot(),
+        "faults": dict(faults),
+        "state_flags": dict(state_flags),
+        "commands": commands.stats(),
+        "ingest": ingest.health(),
+        "clock_drift_ppm": clock_sync.drift_ppm,
+        "latency": tracer.stats(),
+        "shutdown_steps": coordinator.report,
+    })
+
 def close_app(shutdown=0):
+    global shutting_down
+    if shutting_down:
+        return
+    shutting_down = True
+
+    coordinator = ShutdownCoordinator()
+    if session_log is not None:
+        if shutdown:
+            drain_stop = threading.Event()
+            coordinator.add_step("drain serial", lambda: drain_serial(drain_stop), SHUTDOWN_DRAIN_S,
+                                 cancel=drain_stop.set)
+        coordinator.add_step("sync logs", session_log.sync, SHUTDOWN_SYNC_S)
+        coordinator.add_step("session summary", lambda: write_session_summary(coordinator), SHUTDOWN_SUMMARY_S)
+        coordinator.add_step("close log", session_log.close, SHUTDOWN_CLOSE_S)
+    watchdog.stop()
+    if metrics_server is not None:
+        metrics_server.stop()
+    coordinator.run()
+
     try:
-        if ser.is_open:
+        if ser is not None and ser.is_open:
             ser.close()
-            print("✅ Serial port closed.")
+            log.info("serial_closed")
     except Exception as e:
-        print("⚠️ Error closing serial port:", e)
+        log.error("serial_close_error", error=e)
     finally:
         root.destroy()
     
+    dash_log.stop()   # flush queued log lines before the OS goes down
     if shutdown:
         os.system("sudo shutdown now")
 
-# ——————————————————
-# Precharge State
-# ——————————————————
-PRECHARGE_TARGET = 0.90
-pack_voltage = 0.0
-ic_voltage = 0.0
-state_flags.update({
-    "precharge_active": 0, # 1 while precharge relay is on and charging DC
-    "precharge_ok": 0 # 1 when the IC >= 90%
-})
-
 # ——————————————————————
 # Interprets Serial Data
 # ——————————————————————
-def handle_serial_line(line):
-    global handshake, pack_voltage, ic_voltage
+LINK_KEYS = ("sync", "ack", "nak")   # link bookkeeping (clock sync, command acks), not telemetry
+
+def log_sample(key, value, stamp):
+    """Writes a front Teensy sample to the session log. Stamped samples are logged at
+    acquisition time, not arrival time; returns that time on the Pi clock (None if unstamped)."""
+    if stamp is None:
+        session_log.write(f"{key}={value}")
+        return None
+    session_log.write(f"{key}={value}", clock_sync.to_wall(stamp))
+    return clock_sync.to_pi(stamp)
+
+def handle_serial_line(line, t=None):
+    global handshake
     try:
         if not handshake:
-            # Before handshake, only listen for shutdown command
-            if line.strip().lower() == "shutdown":
+            # Before handshake, only listen for shutdown command and the handshake reply
+            response = line.strip().lower()
+            if response == "shutdown":
                 close_app(shutdown=1)
+            elif "rodger" in response:
+                handshake = True
+                state_lbl.config(text="INITIALIZING", fg="lime")
+                log.info("handshake_ok", response=response)
+            elif "=" in response:
+                key, value = response.split("=", 1)
+                commands.handle_reply(key, value)
             return
         
+        if dash.mark_rx(time.monotonic()):
+            update_state_label()
         if "=" not in line:
             return
         key, value = line.strip().split("=")
-        value = float(value)
-
-        if key == "mtr_s":
-            speed_lbl.config(text=f"{value:.0f} RPM")
-            fill_w = int((value / MAX_RPM) * bar_w_max)
-            bar_canvas.delete("all")
-            bar_canvas.create_rectangle(0, 0, fill_w, bar_h, fill="lime", width=0)
-
-        elif key == "pwr":
-            power_lbl.config(text=f"Power: {value:.2f} W")
 
-        elif key == "acc_v":
-            acc_lbl.config(text=f"{value:.1f} V")
-        
-        elif key == "min_v":
-            color = "red" if value <= min_voltage_threshold else "white"
-            min_voltage_lbl.config(text=f"Min: {value:.3f} V", fg=color)
-
-        elif key == "max_v":
-            max_voltage_lbl.config(text=f"Max: {value:.3f} V")
-        
-        elif key == "acc_t":
-            color = "red" if value >= max_acc_temp_threshold else "white"
-            acc_temp_lbl.config(text=f"Acc Tmp: {value:.1f} °C", fg=color)
+        if key == "sync":
+            clock_sync.handle_reply(value, t)
+            return
 
-        elif key == "mtr_t":
-            color = "red" if value >= max_motor_temp_threshold else "white"
-            motor_temp_lbl.config(text=f"Mtr Tmp: {value:.1f} °C", fg=color)
+        value, stamp = split_stamp(value)
+        if commands.handle_reply(key, value):
+            return
+        t_mono = log_sample(key, value, stamp)
 
-        elif key == "cnt_t":
-            color = "red" if value >= max_controller_temp_threshold else "white"
-            motor_cnt_temp_lbl.config(text=f"Cnt Tmp: {value:.1f} °C", fg=color)
+        cell_seg = parse_segment_line(key, value)
+        if cell_seg is not None:
+            if cell_heatmap.update_segment(*cell_seg):
+                schedule_cell_heatmap()
+            return
 
-        elif key == "cool_t":
-            color = "red" if value >= max_coolant_temp_threshold else "white"
-            coolant_temp_lbl.config(text=f"Cool Tmp: {value:.1f} °C", fg=color)
-        
-        elif key == "status":
-            state_flags["status"] = int(value)
-            update_state_label()
+        trace = tracer.begin(key, t_mono, t)
+        value = float(value)
+        tracer.mark(trace, "parse")
+        if t_mono is None:
+            t_mono = time.monotonic() if t is None else t
+        apply_channel(key, value, t_mono)
+        tracer.mark(trace, "state")
+        tracer.commit(trace)
+    
+    except Exception as e:
+        parse_errors.inc()
+        log.warning("serial_parse_error", line=line, error=e)
 
-        elif key == "ts_active":
-            state_flags["ts_active"] = int(value)
-            update_state_label()
 
-        elif key == "manual_reset_ok":
-            state_flags["manual_reset_ok"] = int(value)
-            update_state_label()
+# ——————————————————————————————————————————————
+# Applies one channel value (serial or CAN) to the UI
+# ——————————————————————————————————————————————
+def apply_channel(key, value, t):
+    energy.push(key, value, t)
+    alarms.set(key, value)
+    derived.set(key, value)
 
-        elif key == "sd":
-            active = int(value)
-            sd_lbl.config(
-                text=f"SD: {'Active' if active else 'Idle'}",
-                fg="lime" if active else "white"
-            )
-            faults["SDCARD"] = 0 if active else 1
-            update_fault_label()
-
-        elif key.startswith("fault_"):
-            fault_name = key.split("_", 1)[1].upper()
-            if fault_name in faults:
-                faults[fault_name] = int(value)
-                update_fault_label()   
-                update_state_label()   
-
-        elif key == "brk":
-            on = (value == 1)
-            set_dot(brake_circle, "red" if on else "gray25")
-            state_flags["brk"] = int(on)
-            update_state_label()
+    if key == "mtr_s":
+        speed_lbl.config(text=f"{value:.0f} RPM")
+        ui.set_bar(value / MAX_RPM)
 
-        elif key == "gas":
-            on = (value == 1)
-            set_dot(gas_circle, "green" if on else "gray25")
-            state_flags["gas"] = int(on)
-            update_state_label()
+    elif key == "pwr":
+        power_lbl.config(text=f"Power: {value:.2f} W")
 
-        elif key == "ts_v":
-            pack_voltage = float(value)
+    elif key == "acc_v":
+        acc_lbl.config(text=f"{value:.1f} V")
+    
+    elif key == "min_v":
+        min_voltage_lbl.config(text=f"Min: {value:.3f} V")
 
-        elif key == "ic_v":
-            ic_voltage = float(value)
-            pre_ok = int(pack_voltage > 0.0 and ic_voltage >= PRECHARGE_TARGET * pack_voltage)
-            state_flags["precharge_ok"] = pre_ok
-            update_state_label()
+    elif key == "max_v":
+        max_voltage_lbl.config(text=f"Max: {value:.3f} V")
+    
+    elif key == "acc_t":
+        acc_temp_lbl.config(text=f"Acc Tmp: {value:.1f} °C")
 
-        elif key == "precharge_active":
-            state_flags["precharge_active"] = int(value)
-            update_state_label()
+    elif key == "mtr_t":
+        motor_temp_lbl.config(text=f"Mtr Tmp: {value:.1f} °C")
 
-        elif key == "precharge_ok":
-            state_flags["precharge_ok"] = int(value)
-            update_state_label()
+    elif key == "cnt_t":
+        motor_cnt_temp_lbl.config(text=f"Cnt Tmp: {value:.1f} °C")
 
+    elif key == "cool_t":
+        coolant_temp_lbl.config(text=f"Cool Tmp: {value:.1f} °C")
     
-    except Exception as e:
-        print("Serial parse error:", e)
+    elif key == "sd":
+        active = int(value)
+        sd_lbl.config(
+            text=f"SD: {'Active' if active else 'Idle'}",
+            fg="lime" if active else "white"
+        )
 
+    elif key == "brk":
+        ui.set_dot("brake", "red" if value == 1 else "gray25")
+
+    elif key == "gas":
+        ui.set_dot("gas", "green" if value == 1 else "gray25")
+
+    changed = dash.apply(key, value)
+    if "faults" in changed:
+        update_fault_label()
+    if "state" in changed:
+        update_state_label()
+
+def clear_channel(key):
+    # a derived value that went away (eff at low current): an alarm must not hold on to the old one
+    alarms.set(key, math.nan)
+
+# ——————————————————————————————————————
+# Redraws the cell heatmap (one blit per frame)
+# ——————————————————————————————————————
+cell_heatmap_pending = False
+
+def schedule_cell_heatmap():
+    global cell_heatmap_pending
+    if not cell_heatmap_pending:
+        cell_heatmap_pending = True
+        root.after(50, flush_cell_heatmap)
+
+def flush_cell_heatmap():
+    global cell_heatmap_pending
+    cell_heatmap_pending = False
+    cell_heatmap.flush(cell_photo)
+    weak = cells.weakest_cell()
+    if weak is not None:
+        idx, v = weak
+        alarms.set("cell_min_v", v)
+        weak_cell_lbl.config(text=f"Low: {cells.cell_name(idx)} {v:.3f} V")
+
+# ——————————————————————————————————————
+# Energy / SoC / range (integrated off the UI thread)
+# ——————————————————————————————————————
+energy = EnergyEstimator().start()
+
+def update_energy_label():
+    energy_lbl.config(text=format_summary(energy.snapshot()))
+    root.after(500, update_energy_label)
 
 # ——————————————————
 # Updates fault labels
@@ -252,8 +405,7 @@ def handle_serial_line(line):
 def faults_active():
     return any(val == 1 for val in faults.values())
 def update_fault_label():
-    crit = [k for k in CRITICAL_KEYS if faults.get(k,0) == 1]
-    nonc = [k for k in NONCRITICAL_KEYS if faults.get(k,0) == 1]
+    crit, nonc = dash.active_faults()
 
     if crit:
         fault_lbl.config(
@@ -270,76 +422,170 @@ def update_fault_label():
 # Updates state labels
 # ——————————————————
 def update_state_label():
-    if any_critical_active() and state_flags.get("ts_active",0) == 0:
-        state_lbl.config(text="SHUTDOWN", fg="red")
-
-    if state_flags.get("precharge_active",0) == 1 and state_flags.get("precharge_ok",0) == 0:
-        state_lbl.config(text="PRECHARGING…", fg="yellow")
-        return
-
-    if state_flags.get("ts_active",0) == 0:
-        state_lbl.config(text="TRACTIVE SYSTEM OFF", fg="white")
-        return
-
-    if state_flags.get("status",0) == 0:
-        state_lbl.config(text="Ready to Drive", fg="yellow")
-    else:
-        state_lbl.config(text="Enabled", fg="lime")
-        
+    text, color = dash.state_label()
+    state_lbl.config(text=text, fg=color)
+
+# ——————————————————————————————————————————————
+# Display loop watchdog (late loop -> warning here; stuck loop -> restart via systemd/ui_supervisor.py)
+# ——————————————————————————————————————————————
+def on_ui_alarm(active, late_s):
+    faults["UI_STALL"] = 1 if active else 0
+    update_fault_label()
+
+# ——————————————————————————————————————————————
+# Alarm colours: one vectorized pass per frame, only labels whose alarm changed are touched
+# ——————————————————————————————————————————————
+def update_alarm_labels(now):
+    for channel, active in alarms.evaluate(now):
+        lbl = ALARM_LABELS.get(channel)
+        if lbl is not None:
+            lbl.config(fg="red" if active else "white")
+
+def reload_alarms():
+    if alarms.maybe_reload():
+        # rules may have been added/removed; repaint from the fresh table
+        for channel, lbl in ALARM_LABELS.items():
+            lbl.config(fg="red" if alarms.is_active(channel) else "white")
+    root.after(ALARM_RELOAD_MS, reload_alarms)
 
 # ——————————————————
 # RTD State
 # ——————————————————
 def rtd_ready_now():
-    crit_ok = all(faults[k] == 0 for k in CRITICAL_KEYS)
-    return crit_ok and state_flags.get("precharge_ok",0) == 1
+    return dash.rtd_ready()
 
 # ——————————————————
 # Reads Serial Data
 # ——————————————————
 def read_serial_continuously():
+    start = time.perf_counter()
     try:
-        while ser.in_waiting:
-            line = ser.readline().decode("utf-8", errors="ignore").strip()
-            if line:
-                handle_serial_line(line)
+        for t, source, line in ingest.poll():
+            if source == "front":
+                handle_serial_line(line, t)
+            else:
+                handle_secondary_line(source, line, t)
+        if can_source is not None:
+            for t, key, value in can_source.poll():
+                session_log.write(f"{key}={value:g}")
+                apply_channel(key, value, t)
+        if bus is not None:
+            poll_bus()
+        check_rear_link()
+        now = time.monotonic()
+        for name, value in derived.evaluate().items():
+            if value is None:
+                clear_channel(name)
+            else:
+                apply_channel(name, value, now)
+        update_alarm_labels(now)
+        if dash.tick(now):
+            if state_flags["link_lost"]:
+                link_lost_events.inc()
+            update_state_label()
     except Exception as e:
-        print("Serial read error:", e)
+        log.error("serial_read_error", error=e)
+    frame_seconds.observe(time.perf_counter() - start)
 
     root.after(10, read_serial_continuously)
 
+# ——————————————————————————————————————————————————
+# Channels published by the ingest process (shm_bus.py); it also does the logging
+# ——————————————————————————————————————————————————
+def poll_bus():
+    global bus, bus_seen
+    if bus.stale:
+        # the ingest process restarted on a new bus; versions start over there
+        fresh = bus.reattach()
+        if fresh is None:
+            return
+        bus, bus_seen = fresh, 0
+        log.info("bus_reattached", bus=BUS_NAME)
+    changed = bus.changed_since(bus_seen)
+    if not changed:
+        return
+    if dash.mark_rx(time.monotonic()):
+        update_state_label()
+    for name, (t, value, version) in sorted(changed.items(), key=lambda kv: kv[1][2]):
+        apply_channel(name, value, t)
+        bus_seen = max(bus_seen, version)
+
+# ——————————————————————————————————————————————————
+# Lines from secondary boards go under their own namespace
+# ——————————————————————————————————————————————————
+def handle_secondary_line(source, line, t):
+    key, sep, value = line.strip().partition("=")
+    if not sep:
+        return
+    value, _ = split_stamp(value)   # only the front Teensy's clock is synced
+    name = ChannelStore.name(source, key)
+    session_log.write(f"{name}={value}")
+    try:
+        value = float(value)
+    except ValueError:
+        return
+    # no labels for other boards yet, but alarm_limits.json rules can name them (e.g. "rear.brk_t")
+    apply_channel(name, value, t)
+
+def check_rear_link():
+    rear = ingest.sources.get("rear")
+    if rear is None:
+        return
+    down = 0 if rear.healthy() else 1
+    if faults["REAR_TEENSY"] != down:
+        faults["REAR_TEENSY"] = down
+        update_fault_label()
+        update_state_label()
+
 # ———————————————————————————————
 # Waits for teensy communication
 # ———————————————————————————————
 def wait_for_teensy():
-    global handshake
+    # the "rodger" reply is picked up by read_serial_continuously, so nothing blocks here
+    if handshake:
+        return
+    handshake_attempts.inc()
     try:
         ser.write(b'pi_ready\n')
-        time.sleep(0.3)
-
-        if ser.in_waiting:
-            response = ser.readline().decode(errors="ignore").strip().lower()
-            print(f"Handshake response: '{response}'")
-            if "rodger" in response:
-                handshake = True
-                state_lbl.config(text="INITIALIZING", fg="lime")
-                print("✅ Handshake successful.")
-                root.after(100, read_serial_continuously)
-                return
     except Exception as e:
-        print("Handshake error:", e)
-
-    print("❌ Handshake failed. Retrying...")
-    root.after(1000, wait_for_teensy)
+        log.error("handshake_write_error", error=e)
+
+    root.after(1000, handshake_timeout)
+
+def handshake_timeout():
+    if not handshake:
+        log.info("handshake_retry")
+        wait_for_teensy()
+
+# ——————————————————————————————————————————————
+# Keeps the Teensy clock mapped onto the Pi clock
+# ——————————————————————————————————————————————
+CLOCK_SYNC_MS = 2000
+
+def send_clock_sync():
+    if handshake and not clock_sync.fixed:
+        try:
+            clock_sync.request(ser.write)
+        except Exception as e:
+            log.warning("clock_sync_error", error=e)
+    root.after(CLOCK_SYNC_MS, send_clock_sync)
+
+# ——————————————————————————————————————————————
+# Retries / expires outstanding Teensy commands
+# ——————————————————————————————————————————————
+def poll_commands():
+    commands.poll()
+    root.after(50, poll_commands)
 
 # —————————————————————————————————————————
 # Sends serial check confirmation to teensy
 # —————————————————————————————————————————
+def on_check_done(ok, rtt):
+    if ok:
+        log.info("check_acked", rtt_ms=round(rtt * 1000, 1))
+
 def sendCheck():
-    try:
-        ser.write(b"check\n")
-    except Exception as e:
-        print(e)
+    commands.send("check", on_done=on_check_done)
 
 # ————————————————————————————————————————————————
 # Placeholder until data is recived over serial
@@ -354,24 +600,29 @@ def show_placeholder_data():
     motor_temp_lbl.config(text="Mtr Tmp: ### °C")
     motor_cnt_temp_lbl.config(text="Cnt Tmp: ### °C")
     coolant_temp_lbl.config(text="Cool Tmp: ### °C")
-    bar_canvas.delete("all")
+    ui.set_bar(0)
 
 # ————————————————
 # Force Fullscreen
 # ————————————————
 def wait_for_fullscreen():
     if root.attributes("-fullscreen"):
-        print("✅ Fullscreen is active.")
+        log.info("fullscreen_ok")
         return
     else:
-        print("❌ Not fullscreen yet. Retrying...")
+        log.debug("fullscreen_retry")
         root.attributes("-fullscreen", True)
         root.after(1000, wait_for_fullscreen)
 
 # —————
 # Main
 # —————
-root = tk.Tk()
+if RENDERER == "framebuffer":
+    # only the framebuffer renderer needs fb_render; the Tk renderers never load it
+    from fb_render import FB_DEVICE, Framebuffer, FbImage, FbRoot
+    root = FbRoot(Framebuffer(FB_DEVICE))   # same after()/mainloop() interface, drawn with PIL
+else:
+    root = tk.Tk()
 root.attributes('-fullscreen', True)
 root.configure(bg="#660000")
 root.after(100, wait_for_fullscreen)
@@ -379,135 +630,47 @@ root.after(100, wait_for_fullscreen)
 SCREEN_W = root.winfo_screenwidth()
 SCREEN_H = root.winfo_screenheight()
 
-# Border frame
-border_frame = tk.Frame(root, bg="#660000")
-border_frame.place(relx=0, rely=0, relwidth=1, relheight=1)
-
-# Inner content frame
-inner_frame = tk.Frame(border_frame, bg="black")
-inner_frame.place(
-    x=BORDER_THICKNESS,
-    y=BORDER_THICKNESS,
-    width=SCREEN_W - 2 * BORDER_THICKNESS,
-    height=SCREEN_H - 2 * BORDER_THICKNESS
-)
-
-# ———————————————————
-# Bar for motor speed
-# ———————————————————
-bar_h = 50
-bar_w_max = 645
-bar_canvas = tk.Canvas(inner_frame, bg="gray20", highlightthickness=0)
-bar_canvas.place(x=70, y=20, width=bar_w_max, height=bar_h)
-
-# —————————————————
-# Gauges underneath
-# —————————————————
-font_14 = ("Mono 91", 14)
-font_20 = ("Mono 91", 20)
-font_22 = ("Mono 91", 22)
-font_26 = ("Mono 91", 26)
-font_36 = ("Mono 91", 36)
-
-# ——————————————————
-# Display of Gas and Break
-# ——————————————————
-gas_circle = tk.Canvas(inner_frame, width=50, height=50, bg="black", highlightthickness=0)
-gas_circle.place(x= 80 + bar_w_max, y=15) 
-
-brake_circle = tk.Canvas(inner_frame, width=50, height=50, bg="black", highlightthickness=0)
-brake_circle.place(x= 3, y=15)
-def set_dot(canvas, color):
-    canvas.delete("all")
-    canvas.create_oval(5,5,45,45, fill=color, width = 0)
-
-set_dot(gas_circle, "gray25")
-set_dot(brake_circle, "gray25")
-
-# Left column
-speed_frame = tk.Frame(inner_frame, bg="black")
-speed_frame.place(x=30, y=90)
-speed_text = tk.Label(speed_frame, text="Motor Speed: ", font=font_20, fg="white", bg="black")
-speed_text.pack(side="left")
-speed_lbl = tk.Label(speed_frame, text="### rpm", font=font_36, fg="white", bg="black")
-speed_lbl.pack(side="left")
-
-power_lbl = tk.Label(inner_frame, text="", font=font_22, fg="white", bg="black")
-power_lbl.place(x=30, y=150)
-
-motor_temp_lbl = tk.Label(inner_frame, text="", font=font_14, fg="white", bg="black")
-motor_temp_lbl.place(x=30, y=190)
-
-motor_cnt_temp_lbl = tk.Label(inner_frame, text="", font=font_14, fg="white", bg="black")
-motor_cnt_temp_lbl.place(x=30, y=215)
-
-coolant_temp_lbl = tk.Label(inner_frame, text="", font=font_14, fg="white", bg="black")
-coolant_temp_lbl.place(x=30, y=240)
-
-acc_temp_lbl = tk.Label(inner_frame, text="", font=font_14, fg="white", bg="black")
-acc_temp_lbl.place(x=30, y=265)
-
-noncrit_lbl = tk.Label(inner_frame, text="", font=("Mono 91", 16), fg="yellow", bg="black")
-noncrit_lbl.place(x=30, y=300)
-
-# Right column
-min_voltage_lbl = tk.Label(inner_frame, text="", font=font_20, fg="white", bg="black")
-min_voltage_lbl.place(x=500, y=150)
-
-max_voltage_lbl = tk.Label(inner_frame, text="", font=font_20, fg="white", bg="black")
-max_voltage_lbl.place(x=500, y=190)
-
-acc_frame = tk.Frame(inner_frame, bg="black")
-acc_frame.place(x=500, y=90)
-acc_text = tk.Label(acc_frame, text="ACC: ", font=font_20, fg="white", bg="black")
-acc_text.pack(side="left")
-acc_lbl = tk.Label(acc_frame, text="### V", font=font_36, fg="white", bg="black")
-acc_lbl.pack(side="left")
-
-sd_lbl = tk.Label(inner_frame, text="SD: -", font=font_14, fg="white", bg="black")
-sd_lbl.place(x= 500, y= 235)
-
-# —————————————————————
-# State at bottom left
-# —————————————————————
-state_lbl = tk.Label(
-    inner_frame,
-    text="Waiting for Serial Connection",
-    font=("Mono 91", 28, "bold"),
-    fg="yellow",
-    bg="black"
-)
-state_lbl.place(relx=0.025, rely=1.0, y=-30, anchor="sw")
-
-# —————————————————————
-# Fault banner at bottom center
-# —————————————————————
-fault_lbl = tk.Label(
-    inner_frame,
-    text="",  
-    font=("Mono 91", 28, "bold"),
-    fg="white",
-    bg="black"
-)
-# Place the fault label at the center 
-FAULT_Y = SCREEN_H // 2 
-FAULT_X = SCREEN_W // 2  
-fault_lbl.place(x=FAULT_X - 10, y=FAULT_Y - 20, anchor="center")
-
-# ——————————————————————————————————
-# Bronco Racing Logo (bottom right)
-# ——————————————————————————————————
-try:
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    logo_path = os.path.join(script_dir, "splash.png")
-    img = Image.open(logo_path)
-    img = img.resize((100, 100), Image.Resampling.LANCZOS)
-    photo = ImageTk.PhotoImage(img)
-    logo_lbl = tk.Label(inner_frame, image=photo, bg="black")
-    logo_lbl.image = photo
-    logo_lbl.place(x=SCREEN_W - 2 * BORDER_THICKNESS - 115, y=SCREEN_H - 2 * BORDER_THICKNESS - 115)
-except Exception as e:
-    print("Logo load error:", e)
+# ————————————————————————————————————
+# Cell voltage / temperature heatmap
+# ————————————————————————————————————
+cells = CellArray()
+cell_heatmap = CellHeatmap(cells)
+if RENDERER == "framebuffer":
+    cell_photo = FbImage(cell_heatmap.image)
+else:
+    cell_photo = ImageTk.PhotoImage(cell_heatmap.image)
+
+# ————————————————————————————————————————————————————————
+# Dashboard (widget tree or single canvas, see dash_render.py)
+# ————————————————————————————————————————————————————————
+logo_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "splash.png")
+ui = get_renderer(RENDERER)(root, SCREEN_W, SCREEN_H, BORDER_THICKNESS,
+                            cell_photo, cell_heatmap.height, logo_path)
+
+speed_lbl = ui.speed_lbl
+power_lbl = ui.power_lbl
+motor_temp_lbl = ui.motor_temp_lbl
+motor_cnt_temp_lbl = ui.motor_cnt_temp_lbl
+coolant_temp_lbl = ui.coolant_temp_lbl
+acc_temp_lbl = ui.acc_temp_lbl
+noncrit_lbl = ui.noncrit_lbl
+energy_lbl = ui.energy_lbl
+min_voltage_lbl = ui.min_voltage_lbl
+max_voltage_lbl = ui.max_voltage_lbl
+acc_lbl = ui.acc_lbl
+sd_lbl = ui.sd_lbl
+weak_cell_lbl = ui.weak_cell_lbl
+state_lbl = ui.state_lbl
+fault_lbl = ui.fault_lbl
+
+ALARM_LABELS = {
+    "min_v": min_voltage_lbl,
+    "cell_min_v": weak_cell_lbl,
+    "acc_t": acc_temp_lbl,
+    "mtr_t": motor_temp_lbl,
+    "cnt_t": motor_cnt_temp_lbl,
+    "cool_t": coolant_temp_lbl,
+}
 
 # ————————————————
 # Exit on ESC
@@ -518,8 +681,63 @@ root.bind("<Escape>", lambda event: close_app())
 # Start sequence
 # ————————————————
 show_placeholder_data()
-root.after(1000, wait_for_teensy)
-root.after(500, sendCheck)
+root.after(100, read_serial_continuously)
+if ser is not None:
+    root.after(100, poll_commands)
+    root.after(1500, send_clock_sync)
+    root.after(1000, wait_for_teensy)
+    root.after(500, sendCheck)
+root.after(500, update_energy_label)
+root.after(ALARM_RELOAD_MS, reload_alarms)
+watchdog = UiWatchdog(root, on_alarm=on_ui_alarm).start()
+tracer = LatencyTracer(root)   # fault_*/brk/gas: serial byte -> idle redraw, see latency_trace.py
+
+# ————————————————
+# Metrics endpoint (bench rigs scrape this; see metrics.py)
+# ————————————————
+def register_metrics():
+    sources = ingest.sources
+    per_source = lambda field: (lambda: {name: src.health()[field] for name, src in sources.items()})
+    REGISTRY.counter_fn("fsae_ingest_lines_total", "Lines read per serial source", per_source("lines"), ("source",))
+    REGISTRY.counter_fn("fsae_ingest_errors_total", "Serial read errors per source", per_source("errors"), ("source",))
+    REGISTRY.counter_fn("fsae_ingest_reconnects_total", "Serial reopen attempts per source", per_source("reconnects"), ("source",))
+    REGISTRY.counter_fn("fsae_ingest_overruns_total", "Over-long lines dropped per source", per_source("overruns"), ("source",))
+    REGISTRY.gauge("fsae_ingest_buffered", "Lines read but not yet handled", per_source("buffered"), ("source",))
+    REGISTRY.gauge("fsae_ingest_connected", "1 while the source's port is open", per_source("connected"), ("source",))
+    REGISTRY.gauge("fsae_handshake_ok", "1 once the Teensy answered pi_ready", lambda: handshake)
+    REGISTRY.gauge("fsae_link_lost", "1 while telemetry has stopped", lambda: state_flags["link_lost"])
+    REGISTRY.gauge("fsae_faults_active", "Active faults", lambda: {k: v for k, v in faults.items()}, ("fault",))
+    REGISTRY.counter_fn("fsae_commands_total", "Teensy commands by outcome", lambda: commands.counts, ("result",))
+    if session_log is not None:
+        REGISTRY.counter_fn("fsae_session_log_lines_total", "Lines written to the session log", lambda: session_log.lines)
+    REGISTRY.gauge("fsae_ui_loop_late_seconds", "How late the UI heartbeat ran (recent samples)",
+                   lambda: {q: (None if key not in s else s[key] / 1000)
+                            for s in [watchdog.stats()] for q, key in
+                            (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms"), ("1", "max_ms"))},
+                   ("quantile",))
+    REGISTRY.gauge("fsae_latency_seconds", "Delay from send (or read) to each pipeline stage, traced channels",
+                   tracer.quantiles, ("channel", "stage", "quantile"))
+    REGISTRY.counter_fn("fsae_ui_late_beats_total", "UI heartbeats later than the budget", lambda: watchdog.late_beats)
+    REGISTRY.counter_fn("fsae_ui_stalls_total", "UI loop stalls", lambda: watchdog.stalls)
+    REGISTRY.counter_fn("fsae_log_records_total", "Log records emitted",
+                        lambda: sum(dash_log.stats()["emitted"].values()))
+    REGISTRY.counter_fn("fsae_log_suppressed_total", "Log records dropped by rate limiting",
+                        lambda: sum(dash_log.stats()["suppressed"].values()))
+    REGISTRY.counter_fn("fsae_log_dropped_total", "Log records dropped on a full queue",
+                        lambda: dash_log.stats()["dropped"])
+    if bus is not None:
+        REGISTRY.gauge("fsae_bus_version", "Shared-memory bus update counter", lambda: bus.version)
+    if RENDERER == "framebuffer":
+        REGISTRY.counter_fn("fsae_fb_frames_total", "Framebuffer flushes", lambda: ui.scene.frames)
+        REGISTRY.counter_fn("fsae_fb_bytes_total", "Bytes written to the framebuffer", lambda: root.fb.bytes_written)
+
+metrics_server = None
+if METRICS_ADDR and METRICS_ADDR.lower() != "off":
+    register_metrics()
+    try:
+        metrics_server = MetricsServer(REGISTRY, METRICS_ADDR).start()
+    except OSError as e:
+        log.warning("metrics_unavailable", addr=METRICS_ADDR, error=e)
 
 
 # ————————————————
@@ -536,6 +754,7 @@ ACCEL_PER_SEC      = 300.0   # rpm/s when gas
 BRAKE_DECEL_PER_SEC= 600.0   # rpm/s when brake
 DRAG_PER_SEC       = 120.0   # rpm/s natural coast down
 sim_rpm = 0.0
+sim_seg = 0
 
 # --- helpers to drive faults from the simulator ---
 def set_fault(name, on):
@@ -547,7 +766,7 @@ def clear_all_faults():
 # --------------------------------------------------
 
 def sim_tick():
-    global phase, phase_start, sim_rpm
+    global phase, phase_start, sim_rpm, sim_seg
 
     # --- time bases ---
     real_t = time.time() - t0
@@ -582,6 +801,14 @@ def sim_tick():
     handle_serial_line(f"mtr_s={ui_rpm}\n")
     handle_serial_line(f"pwr={ui_pwr:.2f}\n")
 
+    # --- one accumulator segment per tick, like the BMS round-robin ---
+    sim_seg = sim_seg % cells.segments + 1
+    sag = ui_pwr / 800.0 * 0.15
+    cv = ",".join(f"{4.0 - sag - 0.002 * ((i * 7 + sim_seg) % 11):.3f}" for i in range(cells.cells_per_seg))
+    ct = ",".join(f"{30.0 + 5.0 * math.sin(i / 4.0 + sim_seg) + 20.0 * sag:.1f}" for i in range(cells.therms_per_seg))
+    handle_serial_line(f"cv_{sim_seg}={cv}\n")
+    handle_serial_line(f"ct_{sim_seg}={ct}\n")
+
     if phase == PH_FAULTS:
         handle_serial_line("status=0\n")
         handle_serial_line("ts_active=0\n")
@@ -662,9 +889,11 @@ def sim_tick():
 
 
 
-root.after(1200, sim_tick)
+if SERIAL_SOURCE == "fake" and ser is not None:
+    root.after(1200, sim_tick)
 
 #end of simulator
 
 
-root.mainloop()
+if __name__ == "__main__":
+    root.mainloop()   # mem_soak.py imports this module and runs the loop itself
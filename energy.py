@@ -0,0 +1,177 @@
+"""
+    Description: Incremental energy, state-of-charge and range estimation.
+    Samples are queued from the UI/serial side and integrated on a worker
+    thread in O(1) per sample; dashboards only read a snapshot.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+import queue
+import threading
+import time
+
+# ————————————————
+# CONFIG
+# ————————————————
+PACK_CAPACITY_AH = 13.0       # usable pack capacity
+PACK_NOMINAL_V = 140 * 3.7     # 140s pack; used to turn Ah into kWh for the range estimate
+REST_CURRENT_A = 2.0          # below this the pack counts as resting
+REST_SECONDS = 5.0            # resting this long before trusting min_v as OCV
+OCV_GAIN = 0.05               # how hard each resting sample pulls SoC toward OCV
+MAX_SAMPLE_GAP_S = 1.0        # gaps longer than this are not integrated (link drop)
+
+# resting cell voltage -> state of charge, typical Li-ion NMC curve
+CELL_OCV_TABLE = [
+    (3.00, 0.00), (3.30, 0.05), (3.50, 0.12), (3.60, 0.20), (3.70, 0.35),
+    (3.80, 0.50), (3.90, 0.65), (4.00, 0.80), (4.10, 0.92), (4.20, 1.00),
+]
+
+ENERGY_KEYS = ("pwr", "acc_v", "acc_i", "min_v", "lap")
+
+
+def soc_from_ocv(cell_v):
+    table = CELL_OCV_TABLE
+    if cell_v <= table[0][0]:
+        return table[0][1]
+    for (v0, s0), (v1, s1) in zip(table, table[1:]):
+        if cell_v <= v1:
+            return s0 + (s1 - s0) * (cell_v - v0) / (v1 - v0)
+    return table[-1][1]
+
+
+class EnergyEstimator:
+    def __init__(self, capacity_ah=PACK_CAPACITY_AH, nominal_v=PACK_NOMINAL_V):
+        self.capacity_ah = capacity_ah
+        self.nominal_v = nominal_v
+        self._q = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        # integrator state (worker thread only)
+        self._last_t = None
+        self._last_pwr = 0.0
+        self._pack_v = 0.0
+        self._current = None      # from acc_i if the Teensy sends it
+        self._rest_since = None
+        self._soc = None
+        self._lap_start_t = None
+
+        self._snap = {
+            "wh_used": 0.0, "ah_used": 0.0, "avg_w": 0.0, "peak_w": 0.0,
+            "soc": None, "laps": 0, "wh_per_lap": None, "lap_s": None,
+            "laps_left": None, "time_left_s": None,
+        }
+        self._busy_s = 0.0
+
+    # ————————————————
+    # producer side
+    # ————————————————
+    def push(self, key, value, t=None):
+        """Queues a sample. Safe to call from the Tk thread; never blocks."""
+        if key in ENERGY_KEYS:
+            self._q.put((time.monotonic() if t is None else t, key, value))
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self._snap)
+
+    # ————————————————
+    # worker side
+    # ————————————————
+    def _run(self):
+        while True:
+            item = self._q.get()
+            if item is None:
+                return
+            self.apply(*item)
+
+    def stop(self):
+        self._q.put(None)
+
+    def apply(self, t, key, value):
+        """Integrates one sample. O(1); called from the worker thread."""
+        s = self._snap
+        with self._lock:
+            if key == "pwr":
+                if self._last_t is not None:
+                    dt = t - self._last_t
+                    if 0.0 < dt <= MAX_SAMPLE_GAP_S:
+                        # trapezoid between the previous and current power sample
+                        wh = 0.5 * (self._last_pwr + value) * dt / 3600.0
+                        s["wh_used"] += wh
+                        self._busy_s += dt
+                        amps = self._current
+                        if amps is None and self._pack_v > 0.0:
+                            amps = value / self._pack_v
+                        if amps is not None:
+                            s["ah_used"] += amps * dt / 3600.0
+                            if self._soc is not None:
+                                self._soc -= amps * dt / 3600.0 / self.capacity_ah
+                            self._track_rest(t, amps)
+                        if self._busy_s > 0.0:
+                            s["avg_w"] = s["wh_used"] * 3600.0 / self._busy_s
+                self._last_t = t
+                self._last_pwr = value
+                if value > s["peak_w"]:
+                    s["peak_w"] = value
+
+            elif key == "acc_v":
+                self._pack_v = value
+
+            elif key == "acc_i":
+                self._current = value
+                self._track_rest(t, value)
+
+            elif key == "min_v":
+                ocv_soc = soc_from_ocv(value)
+                if self._soc is None:
+                    self._soc = ocv_soc
+                elif self._rest_since is not None and t - self._rest_since >= REST_SECONDS:
+                    # coulomb count drifts; lean on the resting voltage to pull it back
+                    self._soc += OCV_GAIN * (ocv_soc - self._soc)
+
+            elif key == "lap":
+                laps = int(value)
+                if laps > s["laps"]:
+                    if self._lap_start_t is not None:
+                        s["lap_s"] = t - self._lap_start_t
+                    s["laps"] = laps
+                    s["wh_per_lap"] = s["wh_used"] / laps
+                    self._lap_start_t = t
+
+            self._update_range()
+
+    def _track_rest(self, t, amps):
+        if abs(amps) < REST_CURRENT_A:
+            if self._rest_since is None:
+                self._rest_since = t
+        else:
+            self._rest_since = None
+
+    def _update_range(self):
+        s = self._snap
+        if self._soc is None:
+            return
+        self._soc = max(0.0, min(1.0, self._soc))
+        s["soc"] = self._soc
+        wh_left = self._soc * self.capacity_ah * self.nominal_v
+        if s["wh_per_lap"]:
+            s["laps_left"] = wh_left / s["wh_per_lap"]
+        if s["avg_w"] > 0.0:
+            s["time_left_s"] = wh_left * 3600.0 / s["avg_w"]
+
+
+def format_summary(snap):
+    """Short one-line text for the dashboards."""
+    soc = "--" if snap["soc"] is None else f"{snap['soc'] * 100:.0f}%"
+    text = f"SoC {soc}  {snap['wh_used'] / 1000.0:.2f} kWh"
+    if snap["laps_left"] is not None:
+        text += f"  ~{snap['laps_left']:.1f} laps"
+    elif snap["time_left_s"] is not None:
+        text += f"  ~{snap['time_left_s'] / 60.0:.0f} min"
+    return text
@@ -0,0 +1,563 @@
+"""
+    Description: X-less dashboard backend. The screen is a list of shape, text
+    and image items composed with PIL; changing an item marks its old and new
+    bounding boxes dirty and flush() recomposes only those rectangles and
+    copies them straight into a memory-mapped Linux framebuffer (/dev/fb0), a
+    plain file, or any writable buffer. FbRoot stands in for tk.Tk (after(),
+    mainloop(), ...) so driver_ui.py runs unchanged with RENDERER="framebuffer".
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# FSAE_RENDERER=framebuffer python3 driver_ui.py            straight to /dev/fb0, no X needed
+# FSAE_RENDERER=framebuffer FSAE_FB_DEVICE=/tmp/fb.raw python3 driver_ui.py   same, into a plain 800x480x16 file
+# python3 fb_render.py --out /tmp/fb.raw --size 800x480 --bpp 16 --png /tmp/fb.png
+#     renders a demo into a plain file, prints bytes written per frame and saves a screenshot
+#
+# The console cursor may blink over the dashboard on the Pi: `setterm -cursor off > /dev/tty1`.
+
+import argparse
+import heapq
+import mmap
+import os
+import random
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+from dash_log import get_logger
+from dash_render import BAR_H, BAR_W, REF_H, REF_W, Layout
+
+log = get_logger("fb_render")
+
+FB_DEVICE = os.environ.get("FSAE_FB_DEVICE", "/dev/fb0")
+FB_FILE_GEOMETRY = os.environ.get("FSAE_FB_GEOMETRY", "800x480x16")   # for plain files: WxHxBPP
+FONT_PATHS = (
+    os.environ.get("FSAE_FB_FONT", ""),
+    "/usr/share/fonts/truetype/dejavu/DejaVuSansMono.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+FONT_PX_PER_PT = 96 / 72    # Tk font sizes are points
+BG = "black"
+MERGE_SLACK = 1.3           # merge two dirty rects if their union isn't much bigger than both
+IDLE_S = 0.05               # FbRoot sleeps at most this long between timer checks
+
+# X11 colour names as Tk reads them where PIL differs ("green" is #008000 in CSS)
+_X11_COLORS = {"green": "#00ff00"}
+
+# Tk anchors -> PIL text anchors
+_ANCHORS = {"nw": "lt", "w": "lm", "sw": "lb", "center": "mm", "n": "mt", "ne": "rt", "e": "rm", "se": "rb"}
+
+
+# ————————————————————————————————————————
+# Framebuffer target
+# ————————————————————————————————————————
+class Framebuffer:
+    """A width x height frame in RGB565 (16 bpp), BGR (24 bpp) or BGRX (32 bpp) layout.
+
+    `target` is a framebuffer device or plain file (memory mapped) or a writable
+    buffer such as a bytearray. Device geometry comes from sysfs; files and
+    buffers need width/height/bpp (files default to FSAE_FB_GEOMETRY) and a
+    missing file is created."""
+
+    def __init__(self, target=FB_DEVICE, width=None, height=None, bpp=None, stride=None):
+        self._file = None
+        if isinstance(target, str):
+            if width is None and target.startswith("/dev/"):
+                width, height, bpp, stride = _sysfs_geometry(target)
+            elif width is None:
+                width, height, bpp = (int(v) for v in FB_FILE_GEOMETRY.split("x"))
+            stride = stride or width * bpp // 8
+            size = stride * height
+            if not os.path.exists(target):
+                with open(target, "wb") as f:
+                    f.truncate(size)
+            self._file = open(target, "r+b")
+            buf = mmap.mmap(self._file.fileno(), size)
+        else:
+            stride = stride or width * bpp // 8
+            buf = target
+        if bpp not in (16, 24, 32):
+            raise ValueError(f"unsupported framebuffer depth {bpp} bpp")
+        self.width, self.height, self.bpp, self.stride = width, height, bpp, stride
+        self.buffer = buf
+        self.rows = np.frombuffer(buf, dtype=np.uint8, count=stride * height).reshape(height, stride)
+        self.bytes_written = 0
+
+    def write(self, img, x, y):
+        """Copies an RGB PIL image into the frame with its top-left corner at (x, y)."""
+        w, h = img.size
+        px = np.asarray(img, dtype=np.uint8)
+        if self.bpp == 16:
+            r = px[..., 0].astype(np.uint16)
+            g = px[..., 1].astype(np.uint16)
+            b = px[..., 2].astype(np.uint16)
+            out = ((r >> 3) << 11 | (g >> 2) << 5 | b >> 3).astype("<u2").view(np.uint8)
+        elif self.bpp == 24:
+            out = px[..., ::-1]
+        else:
+            out = np.empty((h, w, 4), dtype=np.uint8)
+            out[..., :3] = px[..., ::-1]
+            out[..., 3] = 255
+        B = self.bpp // 8
+        self.rows[y:y + h, x * B:(x + w) * B] = out.reshape(h, w * B)
+        self.bytes_written += w * h * B
+
+    def close(self):
+        self.rows = None
+        if self._file is not None:
+            self.buffer.close()
+            self._file.close()
+            self._file = None
+
+
+def _sysfs_geometry(device):
+    name = os.path.basename(device)
+    base = f"/sys/class/graphics/{name}"
+
+    def read(attr):
+        with open(os.path.join(base, attr)) as f:
+            return f.read().strip()
+    width, height = (int(v) for v in read("virtual_size").split(","))
+    return width, height, int(read("bits_per_pixel")), int(read("stride"))
+
+
+# ————————————————————————————————————————
+# Scene items
+# ————————————————————————————————————————
+def load_font(size_pt, bold=False):
+    px = max(6, round(size_pt * FONT_PX_PER_PT))
+    for path in FONT_PATHS:
+        if bold and path.endswith(".ttf"):
+            bold_path = path.replace(".ttf", "-Bold.ttf")
+            if os.path.exists(bold_path):
+                path = bold_path
+        if path and os.path.exists(path):
+            return ImageFont.truetype(path, px)
+    return ImageFont.load_default(px)
+
+
+def tk_color(name):
+    """Tk colour name -> something PIL accepts (adds grayNN/greyNN and X11 green)."""
+    name = _X11_COLORS.get(name, name)
+    if name[:4] in ("gray", "grey") and name[4:].isdigit():
+        v = round(int(name[4:]) * 2.55)
+        return (v, v, v)
+    return name
+
+
+class _Item:
+    def __init__(self, scene):
+        self.scene = scene
+        self.visible = True
+
+    def _changed(self, old_box):
+        self.scene.mark_dirty(old_box)
+        self.scene.mark_dirty(self.bbox())
+
+
+class RectItem(_Item):
+    def __init__(self, scene, box, fill, oval=False):
+        super().__init__(scene)
+        self.box = tuple(round(v) for v in box)
+        self.fill = fill
+        self.oval = oval
+
+    def bbox(self):
+        return self.box
+
+    def set(self, box=None, fill=None):
+        old = self.box
+        if box is not None:
+            self.box = tuple(round(v) for v in box)
+        if fill is not None:
+            self.fill = fill
+        self._changed(old)
+
+    def draw(self, draw, img, dx, dy):
+        x0, y0, x1, y1 = self.box
+        if x1 <= x0 or y1 <= y0:
+            return
+        box = (x0 - dx, y0 - dy, x1 - dx - 1, y1 - dy - 1)
+        if self.oval:
+            draw.ellipse(box, fill=tk_color(self.fill))
+        else:
+            draw.rectangle(box, fill=tk_color(self.fill))
+
+
+class FbText(_Item):
+    """Label-like text item: config(text=, fg=, bg=) as on a tk.Label."""
+
+    PAD = 4
+
+    def __init__(self, scene, x, y, font, fg="white", text="", anchor="nw"):
+        super().__init__(scene)
+        self.x, self.y = round(x), round(y)
+        self.font = font
+        self.anchor = _ANCHORS[anchor]
+        self.text = text
+        self.fg = fg
+        self.bg = BG
+        scene.add(self)
+
+    def bbox(self):
+        if not self.text:
+            return (self.x, self.y, self.x, self.y)
+        x0, y0, x1, y1 = self.font.getbbox(self.text, anchor=self.anchor)
+        p = self.PAD
+        return (self.x + x0 - p, self.y + y0 - p, self.x + x1 + p, self.y + y1 + p)
+
+    def config(self, text=None, fg=None, bg=None):
+        if (text is None or text == self.text) and (fg is None or fg == self.fg) \
+                and (bg is None or bg == self.bg):
+            return
+        old = self.bbox()
+        if text is not None:
+            self.text = text
+        if fg is not None:
+            self.fg = fg
+        if bg is not None:
+            self.bg = bg
+        self._changed(old)
+
+    configure = config
+
+    def draw(self, draw, img, dx, dy):
+        if not self.text:
+            return
+        if self.bg != BG:
+            x0, y0, x1, y1 = self.bbox()
+            draw.rectangle((x0 - dx, y0 - dy, x1 - dx - 1, y1 - dy - 1), fill=tk_color(self.bg))
+        draw.text((self.x - dx, self.y - dy), self.text, fill=tk_color(self.fg), font=self.font, anchor=self.anchor)
+
+
+class FbImage(_Item):
+    """Stands in for ImageTk.PhotoImage: paste() updates the pixels and marks them dirty."""
+
+    def __init__(self, image):
+        super().__init__(None)
+        self.image = image.convert("RGB")
+        self.x = self.y = 0
+
+    def place(self, scene, x, y):
+        self.scene = scene
+        self.x, self.y = round(x), round(y)
+        scene.add(self)
+
+    def bbox(self):
+        w, h = self.image.size
+        return (self.x, self.y, self.x + w, self.y + h)
+
+    def paste(self, im, box=None):
+        self.image.paste(im, box)
+        if self.scene is not None:
+            self.scene.mark_dirty(self.bbox())
+
+    def width(self):
+        return self.image.width
+
+    def height(self):
+        return self.image.height
+
+    def draw(self, draw, img, dx, dy):
+        img.paste(self.image, (self.x - dx, self.y - dy))
+
+
+class Scene:
+    """Items in z-order plus the dirty rectangles waiting for flush()."""
+
+    def __init__(self, fb, bg=BG):
+        self.fb = fb
+        self.bg = tk_color(bg)
+        self.items = []
+        self.dirty = [(0, 0, fb.width, fb.height)]
+        self.frames = 0
+
+    def add(self, item):
+        self.items.append(item)
+        self.mark_dirty(item.bbox())
+        return item
+
+    def rect(self, box, fill, oval=False):
+        return self.add(RectItem(self, box, fill, oval))
+
+    def mark_dirty(self, box):
+        x0, y0, x1, y1 = box
+        x0, y0 = max(0, int(x0)), max(0, int(y0))
+        x1, y1 = min(self.fb.width, int(x1 + 0.999)), min(self.fb.height, int(y1 + 0.999))
+        if x1 > x0 and y1 > y0:
+            self.dirty.append((x0, y0, x1, y1))
+
+    def flush(self):
+        """Recomposes and writes every dirty rectangle. Returns the number of rectangles written."""
+        if not self.dirty:
+            return 0
+        rects = _merge_rects(self.dirty)
+        self.dirty = []
+        for x0, y0, x1, y1 in rects:
+            tile = Image.new("RGB", (x1 - x0, y1 - y0), self.bg)
+            draw = ImageDraw.Draw(tile)
+            for item in self.items:
+                if item.visible and _overlaps(item.bbox(), (x0, y0, x1, y1)):
+                    item.draw(draw, tile, x0, y0)
+            self.fb.write(tile, x0, y0)
+        self.frames += 1
+        return len(rects)
+
+    def snapshot(self):
+        """The whole screen as a PIL image (for screenshots/tests)."""
+        img = Image.new("RGB", (self.fb.width, self.fb.height), self.bg)
+        draw = ImageDraw.Draw(img)
+        for item in self.items:
+            if item.visible:
+                item.draw(draw, img, 0, 0)
+        return img
+
+
+def _overlaps(a, b):
+    return a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]
+
+def _area(r):
+    return (r[2] - r[0]) * (r[3] - r[1])
+
+def _merge_rects(rects):
+    """Greedy merge: two rects become their union when that doesn't add much area."""
+    out = []
+    for r in rects:
+        merged = True
+        while merged:
+            merged = False
+            for i, o in enumerate(out):
+                u = (min(r[0], o[0]), min(r[1], o[1]), max(r[2], o[2]), max(r[3], o[3]))
+                if _overlaps(r, o) or _area(u) <= MERGE_SLACK * (_area(r) + _area(o)):
+                    r = u
+                    del out[i]
+                    merged = True
+                    break
+        out.append(r)
+    return out
+
+
+# ————————————————————————————————————————
+# Dashboard
+# ————————————————————————————————————————
+class FramebufferDashboard:
+    """Same screen and interface as dash_render.CanvasDashboard, drawn with PIL."""
+
+    def __init__(self, root, screen_w, screen_h, border, cell_photo, cell_height, logo_path=None):
+        L = self.layout = Layout(screen_w, screen_h, border)
+        scene = self.scene = Scene(root.fb, bg="#660000")
+        root.on_idle = scene.flush
+        scene.rect((border, border, screen_w - border, screen_h - border), BG)
+
+        # Bar for motor speed
+        self._bar_x0, bar_y0, self._bar_x1, bar_y1 = L.box(70, 20, 70 + BAR_W, 20 + BAR_H)
+        scene.rect((self._bar_x0, bar_y0, self._bar_x1, bar_y1), "gray20")
+        self._bar = scene.rect((self._bar_x0, bar_y0, self._bar_x0, bar_y1), "lime")
+        self._bar_y = (bar_y0, bar_y1)
+        self._bar_frac = 0.0
+
+        # Display of Gas and Break
+        self._dots = {
+            "gas": scene.rect(L.box(85 + BAR_W, 20, 125 + BAR_W, 60), "gray25", oval=True),
+            "brake": scene.rect(L.box(8, 20, 48, 60), "gray25", oval=True),
+        }
+
+        fonts = {}
+
+        def font(size, bold=False):
+            key = (size, bold)
+            if key not in fonts:
+                fonts[key] = load_font(size * L.scale, bold)
+            return fonts[key]
+
+        def text(x, y, size, fg="white", value="", anchor="nw", bold=False):
+            return FbText(scene, *L.xy(x, y), font(size, bold), fg=fg, text=value, anchor=anchor)
+
+        def captioned(x, y, caption, placeholder):
+            value_font = font(36)
+            ascent, descent = value_font.getmetrics()
+            cx, cy = L.xy(x, y)
+            mid = cy + (ascent + descent) / 2
+            cap = FbText(scene, cx, mid, font(20), text=caption, anchor="w")
+            return FbText(scene, cap.bbox()[2] - FbText.PAD, mid, value_font, text=placeholder, anchor="w")
+
+        # Left column
+        self.speed_lbl = captioned(30, 90, "Motor Speed: ", "### rpm")
+        self.power_lbl = text(30, 150, 22)
+        self.motor_temp_lbl = text(30, 190, 14)
+        self.motor_cnt_temp_lbl = text(30, 215, 14)
+        self.coolant_temp_lbl = text(30, 240, 14)
+        self.acc_temp_lbl = text(30, 265, 14)
+        self.noncrit_lbl = text(30, 300, 16, "yellow")
+        self.energy_lbl = text(30, 335, 14)
+
+        # Right column
+        self.acc_lbl = captioned(500, 90, "ACC: ", "### V")
+        self.min_voltage_lbl = text(500, 150, 20)
+        self.max_voltage_lbl = text(500, 190, 20)
+        self.sd_lbl = text(500, 235, 14, value="SD: -")
+
+        # Cell voltage / temperature heatmap
+        wx, wy = L.xy(500, 265)
+        cell_photo.place(scene, wx, wy)
+        self.weak_cell_lbl = FbText(scene, wx, wy + cell_height + 5 * L.scale, font(14))
+
+        # State at bottom left, fault banner at the centre
+        self.state_lbl = text(0.025 * REF_W, REF_H - 30, 28, "yellow", "Waiting for Serial Connection", "sw", True)
+        self.fault_lbl = text(REF_W / 2, REF_H / 2, 28, "white", "", "center", True)
+
+        # Bronco Racing Logo (bottom right)
+        if logo_path is not None:
+            try:
+                size = round(100 * L.scale)
+                logo = FbImage(Image.open(logo_path).resize((size, size), Image.Resampling.LANCZOS))
+                logo.place(scene, *L.xy(REF_W - 115, REF_H - 115))
+            except Exception as e:
+                log.warning("logo_load_error", error=e)
+
+    def set_bar(self, fraction):
+        fraction = max(0.0, min(1.0, fraction))
+        if fraction == self._bar_frac:
+            return
+        self._bar_frac = fraction
+        x = self._bar_x0 + fraction * (self._bar_x1 - self._bar_x0)
+        self._bar.set(box=(self._bar_x0, self._bar_y[0], x, self._bar_y[1]))
+
+    def set_dot(self, which, color):
+        dot = self._dots[which]
+        if dot.fill != color:
+            dot.set(fill=color)
+
+    def flush(self):
+        return self.scene.flush()
+
+    def destroy(self):
+        self.scene.items.clear()
+
+
+# ————————————————————————————————————————
+# Tk stand-in
+# ————————————————————————————————————————
+class FbRoot:
+    """The parts of tk.Tk that driver_ui.py uses: timers, a main loop and the
+    screen size. on_idle (the dashboard's flush) runs after every batch of
+    timer callbacks, where Tk would redraw; after_idle callbacks run after it."""
+
+    def __init__(self, fb, clock=time.monotonic):
+        self.fb = fb
+        self.on_idle = None
+        self._idle = []         # after_idle callbacks, run once the frame is flushed
+        self._clock = clock
+        self._timers = []       # heap of (due, seq, fn, args)
+        self._cancelled = set()
+        self._seq = 0
+        self._running = False
+
+    def after(self, ms, fn, *args):
+        self._seq += 1
+        heapq.heappush(self._timers, (self._clock() + ms / 1000.0, self._seq, fn, args))
+        return self._seq
+
+    def after_idle(self, fn, *args):
+        self._idle.append((fn, args))
+
+    def after_cancel(self, timer_id):
+        self._cancelled.add(timer_id)
+
+    def run_pending(self):
+        """Runs every timer that is due, then on_idle. Returns seconds until the next timer."""
+        now = self._clock()
+        while self._running and self._timers and self._timers[0][0] <= now:
+            _, seq, fn, args = heapq.heappop(self._timers)
+            if seq in self._cancelled:
+                self._cancelled.discard(seq)
+                continue
+            try:
+                fn(*args)
+            except Exception as e:
+                log.error("callback_error", callback=getattr(fn, "__name__", repr(fn)), error=e)
+        if self._running and self.on_idle is not None:
+            self.on_idle()
+        idle, self._idle = self._idle, []
+        for fn, args in idle:
+            fn(*args)
+        return self._timers[0][0] - self._clock() if self._timers else IDLE_S
+
+    def mainloop(self):
+        self._running = True
+        while self._running:
+            wait = self.run_pending()
+            if wait > 0 and self._running:
+                time.sleep(min(wait, IDLE_S))
+        self.fb.close()
+
+    def destroy(self):
+        self._running = False
+
+    def attributes(self, *args):
+        return True     # the framebuffer is always "fullscreen"
+
+    def configure(self, **kwargs):
+        pass
+
+    def bind(self, sequence, fn):
+        pass            # no keyboard without X
+
+    def winfo_screenwidth(self):
+        return self.fb.width
+
+    def winfo_screenheight(self):
+        return self.fb.height
+
+
+# ————————————————————————————————————————
+# Demo / test against a plain file
+# ————————————————————————————————————————
+def demo(out, width, height, bpp, frames, png=None, seed=1):
+    fb = Framebuffer(out, width, height, bpp) if out else \
+        Framebuffer(bytearray(width * height * bpp // 8), width, height, bpp)
+    root = FbRoot(fb)
+    cells = FbImage(Image.new("RGB", (280, 70), tk_color("gray30")))
+    ui = FramebufferDashboard(root, width, height, 10, cells, 70)
+    ui.flush()
+    full = fb.bytes_written
+    fb.bytes_written = 0
+    rng = random.Random(seed)
+    t0 = time.perf_counter()
+    rects = 0
+    for i in range(frames):
+        rpm = rng.uniform(0, 800)
+        ui.speed_lbl.config(text=f"{rpm:.0f} RPM")
+        ui.set_bar(rpm / 800)
+        ui.power_lbl.config(text=f"Power: {rng.uniform(0, 80000):.2f} W")
+        ui.min_voltage_lbl.config(text=f"Min: {rng.uniform(3.0, 4.2):.3f} V")
+        ui.set_dot("gas", "green" if i % 2 else "gray25")
+        if i % 50 == 25:
+            ui.fault_lbl.config(text="TRACTIVE SYSTEM SHUTDOWN — BMS", bg="red")
+        elif i % 50 == 0:
+            ui.fault_lbl.config(text="", bg="black")
+        rects += ui.flush()
+    dt = time.perf_counter() - t0
+    print(f"{width}x{height} @ {bpp} bpp: full frame {full} bytes; {frames} frames in {dt * 1000:.0f} ms "
+          f"({frames / dt:.0f} fps), {fb.bytes_written / frames:.0f} bytes and "
+          f"{rects / frames:.1f} rects per frame ({100 * fb.bytes_written / frames / full:.1f}% of a full redraw)")
+    if png:
+        ui.scene.snapshot().save(png)
+        print("screenshot:", png)
+    fb.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Framebuffer dashboard backend demo")
+    parser.add_argument("--out", help="file to use as the framebuffer (default: in-memory buffer)")
+    parser.add_argument("--size", default="800x480")
+    parser.add_argument("--bpp", type=int, default=16, choices=(16, 24, 32))
+    parser.add_argument("--frames", type=int, default=500)
+    parser.add_argument("--png", help="save a screenshot of the final frame")
+    args = parser.parse_args()
+    w, h = (int(x) for x in args.size.split("x"))
+    demo(args.out, w, h, args.bpp, args.frames, args.png)
+
+if __name__ == "__main__":
+    main()
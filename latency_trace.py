@@ -0,0 +1,262 @@
+"""
+    Description: End-to-end latency tracing for the driver-safety channels
+    (fault_*, brk, gas). Each traced sample is stamped when it was sent (the
+    Teensy acquisition stamp, mapped through clock_sync), read off the port,
+    parsed, applied to the dashboard state, queued for redraw and finally when
+    the Tk idle pass that draws it has run. Delays are kept per channel and
+    stage and reported as percentiles. LoopbackSerial is the bench rig: a pty
+    pair with an emulated Teensy on the far end that stamps lines on the Pi's
+    own clock, so "sent" is exact and "read" includes the kernel tty path.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# tracer = LatencyTracer(root)
+# tr = tracer.begin(key, sent, t_read)       None for channels that aren't traced
+# tracer.mark(tr, "parse"); ...; tracer.mark(tr, "state")
+# tracer.commit(tr)                          stamps "sched" and "flush" (after the next redraw)
+# tracer.stats()                             {channel: {stage: {"p50_ms": ..., ...}}}
+#
+# FSAE_SERIAL=loopback python3 driver_ui.py  bench rig: LoopbackSerial in place of FakeSerial
+# python3 latency_trace.py --seconds 10      headless: loopback -> serial ingest -> FbRoot flush
+
+import argparse
+import fnmatch
+import os
+import select
+import statistics
+import threading
+import time
+from collections import deque
+
+import serial
+
+from dash_log import get_logger
+from multi_ingest import BAUD_RATE, READ_TIMEOUT_S
+
+log = get_logger("latency_trace")
+
+TRACED = ("fault_*", "brk", "gas")
+# stage order along the pipeline; each delay is measured from "sent" (or "read" when unstamped)
+STAGES = ("read", "parse", "state", "sched", "flush")
+SAMPLES = 1000            # per channel and stage
+LOOPBACK_HZ = 100         # lines per second per channel from LoopbackSerial
+
+
+class LatencyTracer:
+    def __init__(self, root, patterns=TRACED, clock=time.monotonic, samples=SAMPLES):
+        self.root = root
+        self.patterns = tuple(patterns)
+        self._clock = clock
+        self._samples = samples
+        self._traced = {}          # key -> bool, so fnmatch runs once per channel
+        self._delays = {}          # (key, stage) -> deque of seconds
+        self._pending = []
+        self.traces = 0
+
+    def traced(self, key):
+        hit = self._traced.get(key)
+        if hit is None:
+            hit = self._traced[key] = any(fnmatch.fnmatchcase(key, p) for p in self.patterns)
+        return hit
+
+    def begin(self, key, sent=None, read=None):
+        """A trace for one sample, or None if the channel isn't traced.
+        sent: Pi-clock send/acquisition time if the line was stamped; read: when it came off the port."""
+        if not self.traced(key):
+            return None
+        now = self._clock()
+        return {"key": key, "sent": sent, "read": now if read is None else read}
+
+    def mark(self, trace, stage):
+        if trace is not None:
+            trace[stage] = self._clock()
+
+    def commit(self, trace):
+        """The sample is on the dashboard state; it's on screen after the next idle redraw."""
+        if trace is None:
+            return
+        trace["sched"] = self._clock()
+        if not self._pending:
+            # queued behind the redraw Tk scheduled for the labels this frame touched
+            self.root.after_idle(self._flush)
+        self._pending.append(trace)
+
+    def _flush(self):
+        now = self._clock()
+        pending, self._pending = self._pending, []
+        for trace in pending:
+            trace["flush"] = now
+            self._record(trace)
+
+    def _record(self, trace):
+        origin = trace["sent"]
+        stages = STAGES
+        if origin is None:
+            origin = trace["read"]
+            stages = STAGES[1:]     # without a send stamp, read is the zero point
+        key = trace["key"]
+        for stage in stages:
+            t = trace.get(stage)
+            if t is None:
+                continue
+            buf = self._delays.get((key, stage))
+            if buf is None:
+                buf = self._delays[(key, stage)] = deque(maxlen=self._samples)
+            buf.append(t - origin)
+        self.traces += 1
+
+    def stats(self):
+        """{channel: {stage: {n, p50_ms, p95_ms, p99_ms, max_ms}}}, delays measured from send (or read)."""
+        out = {}
+        for (key, stage), buf in sorted(self._delays.items(), key=lambda kv: (kv[0][0], STAGES.index(kv[0][1]))):
+            lat = sorted(buf)
+            if not lat:
+                continue
+            pct = lambda p: round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 2)
+            out.setdefault(key, {})[stage] = {
+                "n": len(lat),
+                "p50_ms": round(statistics.median(lat) * 1000, 2),
+                "p95_ms": pct(0.95),
+                "p99_ms": pct(0.99),
+                "max_ms": round(lat[-1] * 1000, 2),
+            }
+        return out
+
+    def quantiles(self):
+        """{(channel, stage, quantile): seconds} for the metrics endpoint."""
+        out = {}
+        for key, stages in self.stats().items():
+            for stage, s in stages.items():
+                for q, name in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms"), ("1", "max_ms")):
+                    out[(key, stage, q)] = s[name] / 1000
+        return out
+
+
+# ————————————————————————————————————————
+# Loopback rig
+# ————————————————————————————————————————
+class LoopbackSerial(serial.Serial):
+    """Drop-in for FakeSerial: the Pi end of a pty pair, with a thread on the other
+    end standing in for the Teensy. It writes the traced channels at `hz` per
+    channel, each stamped with the time it was due on the Pi's monotonic clock (in
+    the usual <key>=<value>@<us> format), and answers pi_ready and commands. Lines
+    cross the kernel tty layer and SerialSource's normal fd read, so the "read"
+    stage is what a real port costs, less the USB hop; time spent waiting in the
+    port counts too. Pair it with ClockSync.identity(): the stamps need no mapping."""
+
+    shares_pi_clock = True
+
+    def __init__(self, hz=LOOPBACK_HZ, keys=("brk", "gas", "fault_imd", "fault_bms"), clock=time.monotonic):
+        self.period = 1.0 / hz
+        self.keys = keys
+        self._clock = clock
+        self._teensy_thread = None
+        self._teensy_stop = threading.Event()
+        self._pty_master, self._pty_slave = os.openpty()
+        super().__init__(os.ttyname(self._pty_slave), BAUD_RATE, timeout=READ_TIMEOUT_S)
+        self._teensy_thread = threading.Thread(target=self._teensy, name="loopback-teensy", daemon=True)
+        self._teensy_thread.start()
+
+    def _teensy(self):
+        master = self._pty_master
+        rx = b""
+        n = 0
+        due = self._clock()
+        while not self._teensy_stop.is_set():
+            out = []
+            if select.select([master], [], [], max(0.0, due - self._clock()))[0]:
+                try:
+                    rx += os.read(master, 4096)
+                except OSError:
+                    return     # Pi end closed
+                *commands, rx = rx.split(b"\n")
+                out.extend(self._answer(c) for c in commands)
+            now = self._clock()
+            while due <= now:
+                us = int(due * 1e6)
+                n += 1
+                for key in self.keys:
+                    # brake and gas take turns so the dots actually redraw; faults stay clear
+                    value = int((n // 2) % 2 == (key == "gas")) if key in ("brk", "gas") else 0
+                    out.append(f"{key}={value}@{us}\n".encode())
+                due += self.period
+            data = b"".join(out)
+            try:
+                while data:
+                    data = data[os.write(master, data):]
+            except OSError:
+                return
+
+    @staticmethod
+    def _answer(command):
+        text = command.decode(errors="ignore").strip().lower()
+        if "pi_ready" in text:
+            return b"rodger\n"
+        if "@" in text and not text.startswith("sync@"):
+            return f"ack={text.split('@', 1)[1].split(' ', 1)[0]}\n".encode()
+        return b""
+
+    def close(self):
+        super().close()
+        if self._teensy_thread is not None:
+            self._teensy_stop.set()
+            self._teensy_thread.join(1.0)
+            self._teensy_thread = None
+            os.close(self._pty_master)
+            os.close(self._pty_slave)
+
+
+# ————————————————————————————————————————
+# Headless rig: emulated Teensy -> pty -> SerialSource -> IngestMux -> FbRoot idle pass
+# ————————————————————————————————————————
+def run_loopback(seconds, hz):
+    from clock_sync import ClockSync, split_stamp
+    from fb_render import FbRoot, Framebuffer
+    from multi_ingest import IngestMux, SerialSource
+
+    root = FbRoot(Framebuffer(bytearray(8 * 8 * 2), 8, 8, 16))
+    root.on_idle = lambda: None
+    tracer = LatencyTracer(root)
+    clock_sync = ClockSync.identity()
+    ser = LoopbackSerial(hz)
+    ingest = IngestMux([SerialSource("front", ser=ser)]).start()
+    state = {}
+
+    def poll():
+        for t, _, line in ingest.poll():
+            key, sep, value = line.partition("=")
+            if not sep:
+                continue
+            value, stamp = split_stamp(value)
+            tr = tracer.begin(key, None if stamp is None else clock_sync.to_pi(stamp), t)
+            value = float(value)
+            tracer.mark(tr, "parse")
+            state[key] = value
+            tracer.mark(tr, "state")
+            tracer.commit(tr)
+        root.after(10, poll)
+
+    root.after(10, poll)
+    root.after(int(seconds * 1000), root.destroy)
+    root.mainloop()
+    for source in ingest.sources.values():
+        source.stop()
+        source._thread.join()
+    ser.close()
+    return tracer
+
+def main():
+    parser = argparse.ArgumentParser(description="Loopback latency rig for the serial ingest path")
+    parser.add_argument("--seconds", type=float, default=10.0, help="how long to run")
+    parser.add_argument("--hz", type=float, default=LOOPBACK_HZ, help="lines per second per channel")
+    args = parser.parse_args()
+    tracer = run_loopback(args.seconds, args.hz)
+    print(f"{tracer.traces} samples traced (ms after send)")
+    for key, stages in tracer.stats().items():
+        for stage, s in stages.items():
+            print(f"  {key:<10} {stage:<6} p50 {s['p50_ms']:7.2f}  p95 {s['p95_ms']:7.2f}  "
+                  f"p99 {s['p99_ms']:7.2f}  max {s['max_ms']:7.2f}  (n={s['n']})")
+
+if __name__ == "__main__":
+    main()
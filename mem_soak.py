@@ -0,0 +1,232 @@
+"""
+    Description: Long-session memory soak for driver_ui.py. Imports the
+    dashboard in-process, fed by vehicle_sim telemetry from a child process
+    running faster than real time, samples RSS and Tcl/scene object counts
+    while it runs, and compares tracemalloc snapshots from after warm-up and at the end. Reports
+    growth by allocation site and exits non-zero when it exceeds the budget,
+    so an endurance-length session can be checked on the bench in an hour or two.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 mem_soak.py --minutes 60 --speed 5                  1 h wall = 5 h of telemetry, no X (framebuffer file)
+# xvfb-run python3 mem_soak.py --renderer widgets --minutes 60  the Tk widget tree (bar_canvas/set_dot churn)
+# python3 mem_soak.py --minutes 120 --budget-mb 4 --json logs/soak.json
+#
+# tracemalloc slows the dashboard several times over; if the log shows ui_stall
+# warnings the dashboard can't keep up and --speed should come down.
+
+import argparse
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+WARMUP_S = 30.0           # caches, log buffers and sample windows fill up during this
+SAMPLE_S = 5.0
+BUDGET_MB = 2.0           # traced Python heap growth allowed after warm-up
+RSS_BUDGET_MB = 8.0       # RSS growth allowed after warm-up (allocator slack, Tk, numpy)
+TCL_BUDGET = 50           # growth allowed in any Tcl/scene object count
+SPEED = 5.0               # telemetry seconds per wall second (what a traced Pi-class loop keeps up with)
+TOP_SITES = 15
+FRAMES = 4                # traceback depth kept by tracemalloc
+
+
+def rss_bytes():
+    """Resident set size, less what tracemalloc itself uses to store traces."""
+    return _raw_rss() - tracemalloc.get_tracemalloc_memory()
+
+def _raw_rss():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # peak, not current, but still catches steady growth on non-Linux benches
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss if sys.platform == "darwin" else rss * 1024
+
+
+def tcl_counts(root, ui):
+    """Object counts that grow if canvas items, images, timers or Tcl commands leak."""
+    if not hasattr(root, "tk"):
+        # FbRoot: the scene's item list and pending timers are the equivalents
+        return {"scene_items": len(ui.scene.items), "timers": len(root._timers)}
+    widgets, canvas_items = 0, 0
+    todo = [root]
+    while todo:
+        w = todo.pop()
+        widgets += 1
+        if w.winfo_class() == "Canvas":
+            canvas_items += len(w.find_all())
+        todo.extend(w.winfo_children())
+    return {
+        "widgets": widgets,
+        "canvas_items": canvas_items,
+        "images": len(root.tk.call("image", "names")),
+        "after": len(root.tk.call("after", "info")),
+        "commands": len(root.tk.call("info", "commands")),
+    }
+
+
+def slope_per_hour(points):
+    """Least-squares slope of [(hours, value)]."""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mx = sum(p[0] for p in points) / n
+    my = sum(p[1] for p in points) / n
+    sxx = sum((p[0] - mx) ** 2 for p in points)
+    if sxx == 0:
+        return 0.0
+    return sum((p[0] - mx) * (p[1] - my) for p in points) / sxx
+
+
+class Soak:
+    def __init__(self, dash, args):
+        self.dash = dash
+        self.args = args
+        self.t0 = time.monotonic()
+        self.samples = []          # {"wall_s", "sim_h", "rss", "traced", "lines", **tcl counts}
+        self.baseline = None       # tracemalloc snapshot after warm-up
+        self.base_sample = None
+        self.report = None
+
+    def sim_hours(self):
+        return (time.monotonic() - self.t0) * self.args.speed / 3600.0
+
+    def sample(self):
+        s = {"wall_s": round(time.monotonic() - self.t0, 1), "sim_h": round(self.sim_hours(), 4),
+             "rss": rss_bytes(), "traced": tracemalloc.get_traced_memory()[0],
+             "lines": self.dash.session_log.lines}
+        s.update(tcl_counts(self.dash.root, self.dash.ui))
+        self.samples.append(s)
+        return s
+
+    def start(self):
+        root = self.dash.root
+        root.after(int(self.args.warmup * 1000), self._warm)
+        root.after(int(self.args.sample * 1000), self._tick)
+        root.after(int(self.args.minutes * 60000), self._finish)
+
+    def _tick(self):
+        s = self.sample()
+        self.dash.log.info("soak_sample", **s)
+        self.dash.root.after(int(self.args.sample * 1000), self._tick)
+
+    def _warm(self):
+        # snapshot first: copying the traces grows RSS once, and that isn't the dashboard's
+        self.baseline = tracemalloc.take_snapshot()
+        self.base_sample = self.sample()
+
+    def _finish(self):
+        end = self.sample()
+        snapshot = tracemalloc.take_snapshot()
+        self.report = self.build_report(snapshot, end)
+        self.dash.close_app()
+
+    def build_report(self, snapshot, end):
+        args = self.args
+        base = self.base_sample or self.samples[0]
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen *>"),
+                   tracemalloc.Filter(False, __file__)]
+        sites = []
+        growth = end["traced"] - base["traced"]
+        if self.baseline is not None:
+            stats = snapshot.filter_traces(filters).compare_to(self.baseline.filter_traces(filters), "traceback")
+            for st in stats[:args.top]:
+                if st.size_diff <= 0:
+                    break
+                sites.append({"size_diff_kb": round(st.size_diff / 1024, 1), "count_diff": st.count_diff,
+                              "site": [f"{fr.filename}:{fr.lineno}" for fr in st.traceback]})
+        after = [s for s in self.samples if s["wall_s"] >= base["wall_s"]]
+        tcl_keys = [k for k in end if k not in ("wall_s", "sim_h", "rss", "traced", "lines")]
+        tcl_growth = {k: end[k] - base[k] for k in tcl_keys}
+        rss_growth = end["rss"] - base["rss"]
+        failures = []
+        if growth > args.budget_mb * 2**20:
+            failures.append(f"traced heap grew {growth / 2**20:.2f} MB (budget {args.budget_mb} MB)")
+        if rss_growth > args.rss_budget_mb * 2**20:
+            failures.append(f"RSS grew {rss_growth / 2**20:.2f} MB (budget {args.rss_budget_mb} MB)")
+        for k, d in tcl_growth.items():
+            if d > args.tcl_budget:
+                failures.append(f"{k} grew by {d} (budget {args.tcl_budget})")
+        return {
+            "renderer": self.dash.RENDERER,
+            "speed": args.speed,
+            "wall_s": end["wall_s"],
+            "sim_hours": end["sim_h"],
+            "lines": end["lines"],
+            "traced_growth_mb": round(growth / 2**20, 3),
+            "rss_start_mb": round(base["rss"] / 2**20, 1),
+            "rss_end_mb": round(end["rss"] / 2**20, 1),
+            "rss_growth_mb": round(rss_growth / 2**20, 3),
+            "rss_mb_per_sim_hour": round(slope_per_hour([(s["sim_h"], s["rss"] / 2**20) for s in after]), 3),
+            "tcl_growth": tcl_growth,
+            "top_sites": sites,
+            "failures": failures,
+            "samples": self.samples,
+        }
+
+
+def print_report(r):
+    print(f"soak: {r['wall_s']:.0f} s wall, {r['sim_hours']:.2f} h of telemetry ({r['lines']} lines), "
+          f"renderer={r['renderer']}")
+    print(f"  traced heap  {r['traced_growth_mb']:+.3f} MB after warm-up")
+    print(f"  RSS          {r['rss_start_mb']:.1f} -> {r['rss_end_mb']:.1f} MB "
+          f"({r['rss_mb_per_sim_hour']:+.3f} MB per telemetry hour)")
+    print("  objects      " + ", ".join(f"{k} {d:+d}" for k, d in r["tcl_growth"].items()))
+    if r["top_sites"]:
+        print("  growth by allocation site:")
+        for site in r["top_sites"]:
+            print(f"    {site['size_diff_kb']:+9.1f} KB {site['count_diff']:+7d} blocks  {site['site'][-1]}")
+            for frame in reversed(site["site"][:-1]):
+                print(f"{'':34}from {frame}")
+    for f in r["failures"]:
+        print(f"  FAIL: {f}")
+    if not r["failures"]:
+        print("  OK: within budget")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory soak test for driver_ui.py")
+    parser.add_argument("--minutes", type=float, default=10.0, help="wall-clock run time")
+    parser.add_argument("--speed", type=float, default=SPEED, help="telemetry time per wall second")
+    parser.add_argument("--renderer", default="framebuffer", help="widgets/canvas need X (xvfb-run)")
+    parser.add_argument("--warmup", type=float, default=WARMUP_S, help="seconds before the baseline snapshot")
+    parser.add_argument("--sample", type=float, default=SAMPLE_S, help="seconds between RSS/object samples")
+    parser.add_argument("--budget-mb", type=float, default=BUDGET_MB)
+    parser.add_argument("--rss-budget-mb", type=float, default=RSS_BUDGET_MB)
+    parser.add_argument("--tcl-budget", type=int, default=TCL_BUDGET)
+    parser.add_argument("--top", type=int, default=TOP_SITES, help="allocation sites to report")
+    parser.add_argument("--frames", type=int, default=FRAMES, help="traceback depth per allocation")
+    parser.add_argument("--json", help="also write the report here")
+    args = parser.parse_args()
+
+    # driver_ui reads its config from the environment at import
+    # the simulator runs in its own process so tracemalloc neither slows it nor counts it
+    os.environ["FSAE_SERIAL"] = f"simproc:{args.speed:g}"
+    os.environ["FSAE_RENDERER"] = args.renderer
+    os.environ.setdefault("FSAE_METRICS", "off")
+    if args.renderer == "framebuffer":
+        os.environ.setdefault("FSAE_FB_DEVICE", os.path.join(tempfile.gettempdir(), "fsae_soak_fb.raw"))
+
+    tracemalloc.start(args.frames)
+    import driver_ui as dash
+    soak = Soak(dash, args)
+    soak.start()
+    dash.root.mainloop()
+
+    if soak.report is None:
+        print("soak: the dashboard exited before the run finished", file=sys.stderr)
+        sys.exit(2)
+    print_report(soak.report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(soak.report, f, indent=1)
+    sys.exit(1 if soak.report["failures"] else 0)
+
+if __name__ == "__main__":
+    main()
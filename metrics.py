@@ -0,0 +1,270 @@
+"""
+    Description: Local metrics endpoint for bench rigs. Counters, gauges and
+    histograms are registered once and served in Prometheus text format
+    (/metrics) and as JSON (/metrics.json) by a stdlib HTTP server on a
+    background thread. Most gauges are callbacks read at scrape time, so the
+    telemetry loop only pays for the few counters it bumps itself.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# REGISTRY.gauge("fsae_queue_depth", "Lines waiting", lambda: len(buf))     read when scraped
+# REGISTRY.counter_fn("fsae_x_total", "...", lambda: obj.count)              existing counters, same
+# lines = REGISTRY.counter("fsae_lines_total", "Lines read", ("source",)).labels("front")
+# lines.inc()                                                                on the hot path
+# server = MetricsServer(REGISTRY, "127.0.0.1:9108").start()
+#
+# curl -s localhost:9108/metrics
+# prometheus.yml:  scrape_configs: [{job_name: fsae_dash, static_configs: [{targets: ["pi:9108"]}]}]
+#   (FSAE_METRICS=0.0.0.0:9108 on the Pi to let the rig reach it)
+
+import bisect
+import json
+import math
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from dash_log import get_logger
+
+log = get_logger("metrics")
+
+DEFAULT_ADDR = "127.0.0.1:9108"
+# seconds; frame/loop times on the Pi sit between a few ms and a stall
+TIME_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class _Value:
+    """One counter value. The lock keeps increments from reader threads exact;
+    uncontended it costs about as much as the attribute lookups around it."""
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, n=1):
+        with self._lock:
+            self.value += n
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            self._children[()] = _Value()
+
+    def labels(self, *values):
+        """The child for one label combination; keep it and call inc() on it."""
+        key = tuple(str(v) for v in values)
+        child = self._children.get(key)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(key, _Value())
+        return child
+
+    def inc(self, n=1):
+        self._children[()].inc(n)
+
+    def samples(self):
+        return [(self.name, dict(zip(self.labelnames, key)), child.value)
+                for key, child in list(self._children.items())]
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help_text, fn=None, labelnames=()):
+        """fn() returns a number, or {label value(s): number} when labelnames are given."""
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.labelnames = tuple(labelnames)
+        self.value = math.nan
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self):
+        value = self.value if self.fn is None else self.fn()
+        if not self.labelnames:
+            return [] if value is None else [(self.name, {}, value)]
+        out = []
+        for key, v in value.items():
+            key = key if isinstance(key, tuple) else (key,)
+            if v is not None:
+                out.append((self.name, dict(zip(self.labelnames, (str(k) for k in key))), v))
+        return out
+
+
+class CounterFn(Gauge):
+    """A counter someone else already keeps (e.g. SerialSource.count), read at scrape time."""
+    kind = "counter"
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=TIME_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.bounds = tuple(buckets)
+        self._counts = [0] * (len(self.bounds) + 1)
+        self._sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect.bisect_left(self.bounds, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def samples(self):
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        out = []
+        running = 0
+        for bound, n in zip(self.bounds + (math.inf,), counts):
+            running += n
+            out.append((self.name + "_bucket", {"le": _fmt(bound)}, running))
+        out.append((self.name + "_sum", {}, total))
+        out.append((self.name + "_count", {}, running))
+        return out
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"metric '{metric.name}' is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, fn=None, labelnames=()):
+        return self._add(Gauge(name, help_text, fn, labelnames))
+
+    def counter_fn(self, name, help_text, fn, labelnames=()):
+        return self._add(CounterFn(name, help_text, fn, labelnames))
+
+    def histogram(self, name, help_text, buckets=TIME_BUCKETS):
+        return self._add(Histogram(name, help_text, buckets))
+
+    def _collect(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for m in metrics:
+            try:
+                yield m, m.samples()
+            except Exception as e:
+                # a broken callback loses its own metric, not the whole scrape
+                log.warning("metric_error", metric=m.name, error=e)
+
+    def render_prometheus(self):
+        lines = []
+        for m, samples in self._collect():
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for name, labels, value in samples:
+                if labels:
+                    text = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+                    lines.append(f"{name}{{{text}}} {_fmt(value)}")
+                else:
+                    lines.append(f"{name} {_fmt(value)}")
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        out = {}
+        for m, samples in self._collect():
+            if m.kind == "histogram" or any(labels for _, labels, _ in samples):
+                out[m.name] = [{"name": name, "labels": labels, "value": _json_num(value)}
+                               for name, labels, value in samples]
+            elif samples:
+                out[m.name] = _json_num(samples[0][2])
+        return out
+
+
+REGISTRY = Registry()
+
+
+def _fmt(value):
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+def _json_num(value):
+    return None if isinstance(value, float) and not math.isfinite(value) else value
+
+def _escape(text):
+    return text.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# ————————————————————————————————————————
+# HTTP server
+# ————————————————————————————————————————
+class _Handler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            body = self.registry.render_prometheus().encode()
+            ctype = "text/plain; version=0.0.4; charset=utf-8"
+        elif path == "/metrics.json":
+            body = json.dumps(self.registry.to_json()).encode()
+            ctype = "application/json"
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass    # a scrape every few seconds would flood the dash log
+
+
+class MetricsServer:
+    def __init__(self, registry=REGISTRY, addr=DEFAULT_ADDR):
+        host, _, port = addr.rpartition(":")
+        self.host = host or "127.0.0.1"
+        self.port = int(port)
+        self.registry = registry
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        handler = type("Handler", (_Handler,), {"registry": self.registry})
+        self._server = ThreadingHTTPServer((self.host, self.port), handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]    # port 0 picks a free one
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-http", daemon=True)
+        self._thread.start()
+        log.info("metrics_listening", host=self.host, port=self.port)
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
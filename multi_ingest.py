@@ -0,0 +1,299 @@
+"""
+    Description: Concurrent ingest from several serial boards (front and rear
+    Teensy). Every source has its own reader thread, buffer and health state,
+    so a slow or unplugged board never stalls the others. IngestMux merges
+    what they've read into one time-ordered stream for the UI thread.
+    Reads are bulk: whatever has arrived goes into one reusable buffer in a
+    single syscall and LineFramer cuts the complete lines out of it in place.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 multi_ingest.py --bench            bulk framing vs readline() over a pty, lines/s and CPU per line
+
+import argparse
+import heapq
+import os
+import select
+import threading
+import time
+from collections import deque
+from dash_log import get_logger
+
+import serial
+
+BAUD_RATE = 19200
+STALE_S = 1.0          # no line for this long -> source is unhealthy
+REOPEN_S = 1.0         # wait between attempts to (re)open a port
+REORDER_S = 0.02       # lines are held this long so a lagging source can still sort in
+MAX_BUFFERED = 5000    # per source; oldest lines are dropped past this
+READ_BUF = 4096        # bytes per bulk read; also the longest line kept
+READ_TIMEOUT_S = 0.1   # a read waits this long for data, so stop() is noticed
+NO_FD = -1             # SerialSource._fd for ports read through their own read()/readline()
+
+log = get_logger("multi_ingest")
+
+
+class LineFramer:
+    """Newline framing over one reusable buffer. Fill space() in place (os.readv,
+    readinto), then commit(n) returns the complete lines; a partial line stays
+    at the front of the buffer for the next read. Lines are decoded straight
+    from the buffer (raw=True keeps them as bytes, e.g. for float(b"88.5"))."""
+
+    def __init__(self, size=READ_BUF, raw=False):
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.fill = 0
+        self.raw = raw
+        self.overruns = 0    # lines longer than the buffer, dropped
+        self._skipping = False   # inside a dropped line: discard up to its newline
+
+    def space(self):
+        return self.view[self.fill:]
+
+    def commit(self, n):
+        buf, view = self.buf, self.view
+        end = self.fill + n
+        start = 0
+        if self._skipping:
+            # the tail of an overrun line isn't a line of its own
+            nl = buf.find(10, 0, end)
+            if nl < 0:
+                self.fill = 0
+                return []
+            start = nl + 1
+            self._skipping = False
+        out = []
+        nl = buf.find(10, max(self.fill, start), end)    # bytes before fill were already searched
+        while nl >= 0:
+            stop = nl - 1 if nl > start and buf[nl - 1] == 13 else nl
+            if stop > start:
+                line = bytes(view[start:stop]).strip() if self.raw else str(view[start:stop], "utf-8", "ignore").strip()
+                if line:
+                    out.append(line)
+            start = nl + 1
+            nl = buf.find(10, start, end)
+        rest = end - start
+        if rest == len(buf):
+            self.overruns += 1    # no newline in a whole buffer: not telemetry
+            self._skipping = True
+            rest = 0
+        elif start and rest:
+            buf[:rest] = view[start:end]
+        self.fill = rest
+        return out
+
+    def feed(self, data):
+        """Lines completed by `data`, for ports that hand over bytes objects (one copy into the buffer)."""
+        out = []
+        data = memoryview(data)
+        while data:
+            space = self.space()
+            n = min(len(space), len(data))
+            space[:n] = data[:n]
+            out += self.commit(n)
+            data = data[n:]
+        return out
+
+
+class SerialSource:
+    """One serial device read on its own thread. Pass `port` to open it, or an already open `ser`.
+    bulk=False keeps the old readline() per line path (benchmark baseline);
+    raw=True buffers lines as bytes instead of str."""
+
+    def __init__(self, name, port=None, baud=BAUD_RATE, ser=None, clock=time.monotonic, bulk=True, raw=False):
+        self.name = name
+        self.port = port
+        self.baud = baud
+        self.ser = ser
+        self._clock = clock
+        self.bulk = bulk
+        self.framer = LineFramer(raw=raw)
+        self._fd = None           # None: not looked up yet for this port; NO_FD: stand-in, no fd
+        self.lines = deque(maxlen=MAX_BUFFERED)   # (t, line); deque append/popleft are thread safe
+        self.connected = ser is not None
+        self.failed = False       # last open failed or the port dropped; cleared when it opens again
+        self.last_rx = None
+        self.count = 0
+        self.errors = 0
+        self.reconnects = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"ingest-{self.name}", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _open(self):
+        try:
+            self.ser = serial.Serial(self.port, self.baud, timeout=READ_TIMEOUT_S)
+            self.connected = True
+            self.failed = False
+            self.reconnects += 1
+        except serial.SerialException as e:
+            log.warning("serial_open_error", source=self.name, port=self.port, error=e)
+            self.failed = True
+            self._stop.wait(REOPEN_S)
+
+    def _fileno(self):
+        # a real posix port: read it with os.readv straight into the framer's buffer
+        try:
+            return self.ser.fileno()
+        except Exception:
+            return NO_FD    # stand-ins (FakeSerial, SimSerial, ...) and non-posix ports
+
+    def _read_lines(self):
+        """Complete lines from whatever has arrived; [] if nothing came within the timeout."""
+        if not self.bulk:
+            line = self.ser.readline()
+            if not self.framer.raw:
+                line = line.decode("utf-8", errors="ignore")
+            line = line.strip()
+            return [line] if line else []
+        framer = self.framer
+        if self._fd is not None and self._fd != NO_FD:
+            if not select.select([self._fd], [], [], READ_TIMEOUT_S)[0]:
+                return []
+            try:
+                n = os.readv(self._fd, [framer.space()])
+            except BlockingIOError:
+                return []
+            if n == 0:
+                raise serial.SerialException("device reports readiness to read but returned no data")
+            return framer.commit(n)
+        ser = self.ser
+        if hasattr(ser, "read"):
+            return framer.feed(ser.read(min(ser.in_waiting or 1, READ_BUF)))
+        return framer.feed(ser.readline())
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.ser is None:
+                self._open()
+                continue
+            if self._fd is None and self.bulk:
+                self._fd = self._fileno()
+            try:
+                lines = self._read_lines()
+            except Exception as e:
+                log.warning("serial_read_error", source=self.name, error=e)
+                self.errors += 1
+                self.connected = False
+                self.failed = True
+                if self.port is None:
+                    self._stop.wait(REOPEN_S)   # can't reopen a port we were handed
+                    continue
+                try:
+                    self.ser.close()
+                except Exception:
+                    pass
+                self.ser = None
+                self._fd = None
+                continue
+            if lines:
+                # one stamp per read: lines that arrived together share it
+                t = self._clock()
+                self.last_rx = t
+                self.count += len(lines)
+                self.lines.extend((t, line) for line in lines)
+
+    def healthy(self, now=None):
+        if not self.connected or self.last_rx is None:
+            return False
+        return (self._clock() if now is None else now) - self.last_rx < STALE_S
+
+    def health(self):
+        return {
+            "connected": self.connected, "healthy": self.healthy(), "lines": self.count,
+            "errors": self.errors, "reconnects": self.reconnects, "buffered": len(self.lines),
+            "overruns": self.framer.overruns,
+        }
+
+
+class IngestMux:
+    def __init__(self, sources, clock=time.monotonic, reorder_s=REORDER_S):
+        self.sources = {s.name: s for s in sources}
+        self._clock = clock
+        self.reorder_s = reorder_s
+
+    def start(self):
+        for s in self.sources.values():
+            s.start()
+        return self
+
+    def poll(self, flush=False):
+        """Returns [(t, source, line)] in time order. Never waits on a source."""
+        horizon = float("inf") if flush else self._clock() - self.reorder_s
+        runs = []
+        for name, src in self.sources.items():
+            buf = src.lines
+            run = []
+            while buf and buf[0][0] <= horizon:
+                t, line = buf.popleft()
+                run.append((t, name, line))
+            if run:
+                runs.append(run)
+        if len(runs) == 1:
+            return runs[0]
+        # each source's run is already time ordered, so a k-way merge is enough
+        return list(heapq.merge(*runs, key=lambda item: item[0]))
+
+    def health(self):
+        return {name: s.health() for name, s in self.sources.items()}
+
+
+# ————————————————————————————————————————
+# Benchmark
+# ————————————————————————————————————————
+BENCH_LINE = b"mtr_s=512.25@123456789\n"
+
+def _bench_one(bulk, n_lines, timeout_s=60.0):
+    """Lines pushed through a pty into one SerialSource -> (lines read, wall s, CPU s)."""
+    master, slave = os.openpty()
+    ser = serial.Serial(os.ttyname(slave), BAUD_RATE, timeout=READ_TIMEOUT_S)
+    src = SerialSource("bench", ser=ser, bulk=bulk)
+
+    def write():
+        data = memoryview(BENCH_LINE * n_lines)
+        while data:
+            data = data[os.write(master, data[:READ_BUF]):]
+
+    writer = threading.Thread(target=write, daemon=True)
+    cpu0, t0 = time.process_time(), time.perf_counter()
+    src.start()
+    writer.start()
+    while src.count < n_lines and time.perf_counter() - t0 < timeout_s:
+        time.sleep(0.002)
+    wall, cpu = time.perf_counter() - t0, time.process_time() - cpu0
+    src.stop()
+    src._thread.join()
+    ser.close()
+    os.close(master)
+    os.close(slave)
+    return src.count, wall, cpu
+
+def bench(n_lines=50000):
+    print(f"{n_lines} lines of {len(BENCH_LINE)} bytes through a pty")
+    rows = [("readline", *_bench_one(False, n_lines)), ("bulk", *_bench_one(True, n_lines))]
+    for name, count, wall, cpu in rows:
+        print(f"{name:<9} {count / wall:12,.0f} lines/s  {cpu / max(count, 1) * 1e6:7.2f} us CPU/line  ({count} read)")
+    base, bulk = rows[0], rows[1]
+    print(f"bulk uses {base[3] / base[1] / (bulk[3] / bulk[1]):.1f}x less CPU per line")
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial ingest")
+    parser.add_argument("--bench", action="store_true", help="bulk framing vs readline() benchmark")
+    parser.add_argument("--lines", type=int, default=50000)
+    args = parser.parse_args()
+    if args.bench:
+        bench(args.lines)
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+    Description: Scripted fault-injection scenarios run headless. A scenario
+    file lists timed telemetry lines, fault edges, link dropouts and malformed
+    lines plus the state the dashboard must show; the runner drives
+    dash_state.DashState on a virtual clock as fast as the CPU allows and
+    reports every expectation that didn't hold.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 scenario_runner.py scenarios/*.scn
+#
+# Scenario format, one step per line, times in seconds of virtual time:
+#   name: <scenario name>
+#   <t> <key>=<value>                      send a telemetry line
+#   <t> raw <text>                         send text exactly as written (malformed lines)
+#   <t0>..<t1> every <dt> <key>=<value>    send a line periodically (a heartbeat keeps the link up)
+#   <t> dropout <seconds>                  drop every line for that long
+#   <t> expect state <label> [within <s>]  state label text, now or at some point within s
+#   <t> expect faults <A,B|none>           critical faults shown on the banner
+#   <t> expect warnings <A,B|none>         non-critical warnings
+#   <t> expect <flag>=<int>                a state flag, or parse_errors=<n>
+#   # comment
+
+import argparse
+import sys
+import time
+
+from dash_state import DashState
+
+TICK_MS = 10
+
+
+class Scenario:
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+        self.sends = []      # (ms, line)
+        self.dropouts = []   # (start ms, end ms)
+        self.expects = []    # (ms, lineno, kind, arg, within ms or None)
+        self.end_ms = 0
+
+
+def _ms(text):
+    return int(round(float(text) * 1000))
+
+def load_scenario(path):
+    sc = Scenario(path, path)
+    with open(path, encoding="utf-8") as f:
+        for lineno, raw in enumerate(f, 1):
+            line = raw.split("#", 1)[0].strip() if not raw.lstrip().startswith("#") else ""
+            if not line:
+                continue
+            if line.startswith("name:"):
+                sc.name = line[5:].strip()
+                continue
+            when, _, rest = line.partition(" ")
+            rest = rest.strip()
+            try:
+                if ".." in when:
+                    t0, t1 = (_ms(x) for x in when.split(".."))
+                    word, dt, text = rest.split(None, 2)
+                    if word != "every":
+                        raise ValueError("a time range needs 'every <dt> <line>'")
+                    step = _ms(dt)
+                    sc.sends.extend((t, text) for t in range(t0, t1 + 1, step))
+                    sc.end_ms = max(sc.end_ms, t1)
+                    continue
+
+                t = _ms(when)
+                sc.end_ms = max(sc.end_ms, t)
+                word, _, arg = rest.partition(" ")
+                if word == "raw":
+                    sc.sends.append((t, arg))
+                elif word == "dropout":
+                    sc.dropouts.append((t, t + _ms(arg)))
+                elif word == "expect":
+                    within = None
+                    head, sep, tail = arg.rpartition(" within ")
+                    if sep:
+                        arg, within = head, _ms(tail)
+                        sc.end_ms = max(sc.end_ms, t + within)
+                    kind, _, value = arg.partition(" ")
+                    if "=" in kind and not value:
+                        kind, value = "flag", kind
+                    sc.expects.append((t, lineno, kind, value.strip(), within))
+                else:
+                    sc.sends.append((t, rest))
+            except ValueError as e:
+                raise ValueError(f"{path}:{lineno}: {e}") from None
+    sc.sends.sort(key=lambda s: s[0])
+    return sc
+
+
+def _check(dash, kind, arg):
+    """(ok, what the dashboard actually shows)."""
+    if kind == "state":
+        actual = dash.state_label()[0]
+        return actual == arg, actual
+    if kind in ("faults", "warnings"):
+        crit, nonc = dash.active_faults()
+        shown = crit if kind == "faults" else nonc
+        want = [] if arg.lower() == "none" else [x.strip().upper() for x in arg.split(",")]
+        return sorted(shown) == sorted(want), ",".join(shown) or "none"
+    if kind == "flag":
+        key, value = arg.split("=")
+        actual = dash.parse_errors if key == "parse_errors" else dash.state_flags.get(key)
+        return actual == int(value), actual
+    raise ValueError(f"unknown expectation '{kind}'")
+
+def run_scenario(sc):
+    """Returns a list of failure messages; empty means the scenario passed."""
+    dash = DashState()
+    failures = []
+    sends = sc.sends
+    expects = sorted(sc.expects, key=lambda e: e[0])
+    si = ei = 0
+    pending = []   # (deadline ms, lineno, kind, arg)
+
+    for now in range(0, sc.end_ms + TICK_MS, TICK_MS):
+        dropped = any(a <= now < b for a, b in sc.dropouts)
+        while si < len(sends) and sends[si][0] <= now:
+            if not dropped:
+                dash.feed_line(sends[si][1], now / 1000.0)
+            si += 1
+        dash.tick(now / 1000.0)
+
+        while ei < len(expects) and expects[ei][0] <= now:
+            t, lineno, kind, arg, within = expects[ei]
+            ei += 1
+            ok, actual = _check(dash, kind, arg)
+            if within is None:
+                if not ok:
+                    failures.append(f"line {lineno} @{t / 1000:.2f}s: expected {kind} {arg!r}, got {actual!r}")
+            elif not ok:
+                pending.append((t + within, lineno, kind, arg))
+
+        still = []
+        for deadline, lineno, kind, arg in pending:
+            ok, actual = _check(dash, kind, arg)
+            if ok:
+                continue
+            if now >= deadline:
+                failures.append(f"line {lineno}: {kind} {arg!r} not reached by {deadline / 1000:.2f}s, got {actual!r}")
+            else:
+                still.append((deadline, lineno, kind, arg))
+        pending = still
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run dashboard fault-injection scenarios headless")
+    parser.add_argument("scenarios", nargs="+", help="scenario files")
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print failures")
+    args = parser.parse_args(argv)
+
+    t0 = time.perf_counter()
+    failed = 0
+    for path in args.scenarios:
+        try:
+            sc = load_scenario(path)
+            failures = run_scenario(sc)
+        except ValueError as e:
+            print(f"ERROR {path}: {e}")
+            failed += 1
+            continue
+        if failures:
+            failed += 1
+            print(f"FAIL  {sc.name} ({path})")
+            for msg in failures:
+                print(f"      {msg}")
+        elif not args.quiet:
+            print(f"PASS  {sc.name}")
+    n = len(args.scenarios)
+    print(f"{n - failed}/{n} scenarios passed in {time.perf_counter() - t0:.2f} s")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
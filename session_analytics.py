@@ -0,0 +1,178 @@
+"""
+    Description: Post-session analytics over recorded dashboard logs. Logs are
+    loaded into columnar NumPy arrays (cached next to the log as .npy files and
+    memory-mapped on later runs), statistics are computed vectorized, and
+    several sessions are processed in parallel with a process pool.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 session_analytics.py logs/*.tlog
+# python3 session_analytics.py logs/*.tlog --above mtr_t=90 --above cnt_t=95 --load-w 5000 --json
+
+import argparse
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from session_log import read_session
+
+CACHE_SUFFIX = ".cols"
+CACHE_STAMP = "_sorted"    # written last; caches from before columns were sorted lack it and get rebuilt
+MAX_HOLD_S = 1.0   # a sample is not held longer than this across a gap
+
+
+# ————————————————
+# Loading
+# ————————————————
+def _cache_dir(path):
+    return path + CACHE_SUFFIX
+
+def _cache_fresh(path):
+    cache = _cache_dir(path)
+    stamp = os.path.join(cache, CACHE_STAMP)
+    return os.path.exists(stamp) and os.path.getmtime(stamp) >= os.path.getmtime(path)
+
+def _read_columns(path):
+    """{channel: (t, v)} sorted by t. The log is in arrival order, and Teensy-stamped samples
+    carry acquisition times that can run behind it; a stable sort keeps equal stamps in log order."""
+    cols = {}
+    for t, key, value in read_session(path):
+        ts, vs = cols.setdefault(key, ([], []))
+        ts.append(t)
+        vs.append(value)
+    out = {}
+    for k, (ts, vs) in cols.items():
+        ts = np.asarray(ts, dtype=np.float64)
+        vs = np.asarray(vs, dtype=np.float32)
+        order = np.argsort(ts, kind="stable")
+        out[k] = (ts[order], vs[order])
+    return out
+
+def _build_cache(path):
+    cols = _read_columns(path)
+    cache = _cache_dir(path)
+    os.makedirs(cache, exist_ok=True)
+    for key, (ts, vs) in cols.items():
+        np.save(os.path.join(cache, f"{key}.t.npy"), ts)
+        np.save(os.path.join(cache, f"{key}.v.npy"), vs)
+    with open(os.path.join(cache, CACHE_STAMP), "w"):
+        pass
+
+def load_columns(path, use_cache=True):
+    """{channel: (t, v)} for one session, each sorted by t. Arrays are memory-mapped from the cache when possible."""
+    if not use_cache:
+        return _read_columns(path)
+
+    if not _cache_fresh(path):
+        _build_cache(path)
+    cache = _cache_dir(path)
+    cols = {}
+    for name in os.listdir(cache):
+        if name.endswith(".t.npy"):
+            key = name[:-len(".t.npy")]
+            cols[key] = (np.load(os.path.join(cache, name), mmap_mode="r"),
+                         np.load(os.path.join(cache, f"{key}.v.npy"), mmap_mode="r"))
+    return cols
+
+
+# ————————————————
+# Statistics
+# ————————————————
+def hold_durations(t):
+    """How long each sample stays current (sample-and-hold, capped at MAX_HOLD_S, never negative)."""
+    if len(t) == 0:
+        return np.empty(0)
+    dt = np.diff(t, append=t[-1])
+    return np.clip(dt, 0.0, MAX_HOLD_S)
+
+def time_above(t, v, threshold):
+    return float(np.sum(hold_durations(t)[v > threshold]))
+
+def sample_at(t_src, v_src, t_query):
+    """Value of a channel held at each query time (NaN before its first sample)."""
+    idx = np.searchsorted(t_src, t_query, side="right") - 1
+    out = np.asarray(v_src, dtype=np.float64)[np.maximum(idx, 0)]
+    out[idx < 0] = np.nan
+    return out
+
+def lap_bounds(cols):
+    """Start index of each lap in the pwr series, from changes of the lap counter."""
+    if "lap" not in cols or "pwr" not in cols:
+        return None
+    lt, lv = cols["lap"]
+    changes = lt[np.flatnonzero(np.diff(lv, prepend=np.nan) != 0)]
+    return np.searchsorted(cols["pwr"][0], changes)
+
+def peak_power_per_lap(cols):
+    if "pwr" not in cols:
+        return []
+    pv = np.asarray(cols["pwr"][1])
+    if len(pv) == 0:
+        return []
+    starts = lap_bounds(cols)
+    if starts is None or len(starts) == 0:
+        return [float(pv.max())]
+    starts = np.unique(np.concatenate(([0], starts[starts < len(pv)])))
+    return np.maximum.reduceat(pv, starts).astype(float).tolist()
+
+def min_cell_under_load(cols, load_w):
+    if "min_v" not in cols or "pwr" not in cols:
+        return None
+    mt, mv = cols["min_v"]
+    pwr = sample_at(*cols["pwr"], mt)
+    loaded = np.asarray(mv)[pwr >= load_w]
+    return float(loaded.min()) if len(loaded) else None
+
+def analyse(path, above, load_w, use_cache=True):
+    cols = load_columns(path, use_cache)
+    out = {"session": os.path.basename(path)}
+    if cols:
+        t_all = np.concatenate([c[0] for c in cols.values()])
+        out["duration_s"] = float(t_all.max() - t_all.min())
+    for key, threshold in above:
+        if key in cols:
+            out[f"{key}>{threshold:g}_s"] = time_above(*cols[key], threshold)
+    out["peak_pwr_per_lap"] = peak_power_per_lap(cols)
+    out[f"min_v@pwr>={load_w:g}"] = min_cell_under_load(cols, load_w)
+    return out
+
+
+# ————————————————
+# CLI
+# ————————————————
+def _parse_above(text):
+    key, value = text.split("=")
+    return key, float(value)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Post-session telemetry analytics")
+    parser.add_argument("logs", nargs="+", help="session log files")
+    parser.add_argument("--above", action="append", type=_parse_above, default=None,
+                        metavar="KEY=LIMIT", help="time spent above a limit (repeatable)")
+    parser.add_argument("--load-w", type=float, default=5000.0,
+                        help="power above which the pack counts as loaded")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--no-cache", action="store_true", help="don't read or write .npy column caches")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of a table")
+    args = parser.parse_args(argv)
+    above = args.above or [("mtr_t", 90.0)]
+
+    n = len(args.logs)
+    with ProcessPoolExecutor(max_workers=max(1, min(args.jobs, n))) as pool:
+        results = list(pool.map(analyse, args.logs, [above] * n, [args.load_w] * n,
+                                [not args.no_cache] * n))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    for r in results:
+        print(r["session"])
+        for k, v in r.items():
+            if k != "session":
+                print(f"  {k:<24} {v}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""
+    Description: Session recorder for dashboard telemetry. Every handled serial
+    line is written with the Pi timestamp it was seen at, one file per session,
+    so runs can be analysed afterwards (see session_analytics.py).
+    Lines are grouped into independently zlib-compressed blocks and a sidecar
+    .idx file records each block's time range, so a reader can seek to any
+    timestamp with a binary search and only decompress the blocks it needs.
+    Blocks start with a keyframe (the latest value of every key plus the
+    dashboard state) so a replay can begin at any block (session_replay.py).
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Line format inside a block (same as the old plain-text logs):
+#   <unix time, seconds> <raw telemetry line>
+#   e.g. "1739912345.123 mtr_t=88.5"
+#   keyframe: "<unix time> #kf {"values": {key: raw value}, "state": DashState.snapshot()}",
+#   the state just before the line that follows it
+#
+# Data file:  MAGIC, then blocks of  BLOCK_HDR (zlen, n_lines, t_min, t_max) + zlib data
+# Index file: one INDEX_REC (t_min, t_max, offset, zlen) per block, appended as blocks land
+#
+# Times are not in order: Teensy-stamped samples are logged at acquisition time and
+# the rest at arrival time, so neighbouring blocks' [t_min, t_max] ranges can overlap.
+
+import bisect
+import itertools
+import json
+import os
+import struct
+import time
+import zlib
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs")
+LOG_EXT = ".tlog"
+INDEX_EXT = ".idx"
+
+MAGIC = b"FSLG\x01"
+BLOCK_HDR = struct.Struct("<IIdd")
+INDEX_REC = struct.Struct("<ddQI")
+
+BLOCK_LINES = 2000     # lines per compressed block
+BLOCK_SECONDS = 2.0    # or this much time, whichever comes first
+ZLIB_LEVEL = 6
+KEYFRAME_S = 2.0       # a block starts with a keyframe if the last one is older than this
+KEYFRAME_PREFIX = "#kf "
+
+
+class SessionLog:
+    def __init__(self, path, state_fn=None, keyframe_s=KEYFRAME_S):
+        self.path = path
+        self.state_fn = state_fn       # returns a JSON-able dict for keyframes, e.g. DashState.snapshot
+        self.keyframe_s = keyframe_s   # None: no keyframes
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._f = open(path, "ab")
+        self._idx = open(path + INDEX_EXT, "ab")
+        if new:
+            self._f.write(MAGIC)
+        self._buf = []
+        self._t_first = None           # first line of the pending block, for BLOCK_SECONDS
+        self._t_min = None
+        self._t_max = None
+        self.lines = 0
+        self.keyframes = 0
+        self.opened_at = time.time()
+        self._latest = {}
+        self._last_keyframe = None
+
+    @classmethod
+    def open_new(cls, log_dir=LOG_DIR, **kwargs):
+        os.makedirs(log_dir, exist_ok=True)
+        name = time.strftime("session_%Y%m%d_%H%M%S") + LOG_EXT
+        return cls(os.path.join(log_dir, name), **kwargs)
+
+    def write(self, line, t=None):
+        if t is None:
+            t = time.time()
+        if self._t_first is None:
+            self._t_first = self._t_min = self._t_max = t
+            if self.keyframe_s is not None and (self._last_keyframe is None or
+                                                t - self._last_keyframe >= self.keyframe_s):
+                self._write_keyframe(t)
+        elif t < self._t_min:
+            self._t_min = t
+        elif t > self._t_max:
+            self._t_max = t
+        self._buf.append(f"{t:.3f} {line}\n")
+        self.lines += 1
+        key, sep, value = line.partition("=")
+        if sep:
+            self._latest[key] = value
+        if len(self._buf) >= BLOCK_LINES or t - self._t_first >= BLOCK_SECONDS:
+            self.flush()
+
+    def _write_keyframe(self, t):
+        doc = {"values": self._latest}
+        if self.state_fn is not None:
+            doc["state"] = self.state_fn()
+        self._buf.append(f"{t:.3f} {KEYFRAME_PREFIX}{json.dumps(doc, separators=(',', ':'))}\n")
+        self._last_keyframe = t
+        self.keyframes += 1
+
+    def flush(self):
+        """Compresses the pending lines into one block and appends it plus its index record."""
+        if self._buf:
+            data = zlib.compress("".join(self._buf).encode("utf-8"), ZLIB_LEVEL)
+            offset = self._f.tell()
+            self._f.write(BLOCK_HDR.pack(len(data), len(self._buf), self._t_min, self._t_max))
+            self._f.write(data)
+            self._idx.write(INDEX_REC.pack(self._t_min, self._t_max, offset, len(data)))
+            self._buf.clear()
+            self._t_first = None
+        self._f.flush()
+        self._idx.flush()
+
+    def sync(self):
+        """flush() and then fsync both files so the data is on the SD card, not in the page cache."""
+        self.flush()
+        os.fsync(self._f.fileno())
+        os.fsync(self._idx.fileno())
+
+    def close(self):
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+            self._idx.close()
+
+
+# ————————————————
+# Reading
+# ————————————————
+def load_index(path):
+    """[(t_min, t_max, offset, zlen)] per block; rebuilt from block headers if the .idx is missing."""
+    try:
+        with open(path + INDEX_EXT, "rb") as f:
+            raw = f.read()
+        n = len(raw) // INDEX_REC.size
+        return [INDEX_REC.unpack_from(raw, i * INDEX_REC.size) for i in range(n)]
+    except FileNotFoundError:
+        pass
+
+    index = []
+    with open(path, "rb") as f:
+        f.seek(len(MAGIC))
+        while True:
+            offset = f.tell()
+            hdr = f.read(BLOCK_HDR.size)
+            if len(hdr) < BLOCK_HDR.size:
+                break
+            zlen, _, t_min, t_max = BLOCK_HDR.unpack(hdr)
+            index.append((t_min, t_max, offset, zlen))
+            f.seek(zlen, os.SEEK_CUR)
+    return index
+
+def is_block_log(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+def read_block(f, rec):
+    """[(t, raw line)] for one index record of an open log file, keyframes included."""
+    _, _, offset, zlen = rec
+    f.seek(offset + BLOCK_HDR.size)
+    text = zlib.decompress(f.read(zlen)).decode("utf-8", errors="ignore")
+    rows = []
+    for row in text.splitlines():
+        t, _, line = row.partition(" ")
+        rows.append((float(t), line))
+    return rows
+
+def block_span(index, t_start=None, t_end=None):
+    """(first, stop): the slice of index whose blocks can hold lines in [t_start, t_end].
+    Block ranges overlap, so the search runs on the running max of t_max from the front
+    and the running min of t_min from the back, which are both sorted."""
+    first, stop = 0, len(index)
+    if t_start is not None:
+        ends = list(itertools.accumulate((rec[1] for rec in index), max))
+        first = bisect.bisect_left(ends, t_start)
+    if t_end is not None:
+        starts = list(itertools.accumulate((rec[0] for rec in reversed(index)), min))[::-1]
+        stop = bisect.bisect_right(starts, t_end)
+    return first, max(first, stop)
+
+def parse_keyframe(line):
+    """The keyframe dict for a keyframe line, None for anything else."""
+    if not line.startswith(KEYFRAME_PREFIX):
+        return None
+    return json.loads(line[len(KEYFRAME_PREFIX):])
+
+def iter_lines(path, t_start=None, t_end=None, keyframes=False):
+    """Yields (t, raw line) between t_start and t_end in the order they were logged (not
+    strictly time order), decompressing only overlapping blocks. Keyframe lines are skipped
+    unless keyframes=True."""
+    if not is_block_log(path):
+        # plain-text logs from before block compression
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            for row in f:
+                t, _, line = row.partition(" ")
+                try:
+                    t = float(t)
+                except ValueError:
+                    continue
+                if (t_start is None or t >= t_start) and (t_end is None or t <= t_end):
+                    yield t, line.strip()
+        return
+
+    index = load_index(path)
+    first, stop = block_span(index, t_start, t_end)
+    with open(path, "rb") as f:
+        for rec in index[first:stop]:
+            if (t_start is not None and rec[1] < t_start) or (t_end is not None and rec[0] > t_end):
+                continue
+            for t, line in read_block(f, rec):
+                if not keyframes and line.startswith(KEYFRAME_PREFIX):
+                    continue
+                if (t_start is not None and t < t_start) or (t_end is not None and t > t_end):
+                    continue
+                yield t, line
+
+def read_session(path, t_start=None, t_end=None):
+    """Yields (t, key, value) for every numeric key=value line in a session log."""
+    for t, line in iter_lines(path, t_start, t_end):
+        key, sep, value = line.partition("=")
+        if not sep:
+            continue
+        try:
+            yield t, key, float(value)
+        except ValueError:
+            continue   # cell arrays and anything non-numeric
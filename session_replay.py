@@ -0,0 +1,204 @@
+"""
+    Description: Jumps to any time in a recorded session and reconstructs the
+    dashboard state there (faults, state flags, precharge, latest channel
+    values). The nearest keyframe at or before the target is loaded and only
+    the lines after it are applied, so a seek touches one or two compressed
+    blocks instead of replaying the session from the start.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 session_replay.py logs/session.tlog --at 95.5          state 95.5 s into the session
+# python3 session_replay.py logs/session.tlog --at 95.5 --json
+# python3 session_replay.py logs/session.tlog --bench 200        seek vs. replay-from-start, checks they agree
+#
+# replay = SessionReplay(path); state = replay.state_at(t_unix)    in code, e.g. behind a scrub bar
+
+import argparse
+import json
+import random
+import time
+
+from dash_state import DashState
+from derived import precharge_fraction
+from session_log import block_span, is_block_log, iter_lines, load_index, parse_keyframe, read_block
+
+BLOCK_CACHE = 8    # decompressed blocks kept for scrubbing back and forth
+
+
+class ReplayState:
+    def __init__(self):
+        self.dash = DashState()
+        self.values = {}      # key -> raw value text, as logged
+        self.t = None
+        self.keyframe_t = None
+        self.applied = 0      # lines applied after the keyframe
+
+    def load_keyframe(self, t, kf):
+        self.values = dict(kf.get("values", {}))
+        if "state" in kf:
+            self.dash.restore(kf["state"])
+        else:
+            # logs written without a state_fn (e.g. the shm_bus logger): rebuild from the values
+            for key, value in self.values.items():
+                self.dash.feed_line(f"{key}={value}", t)
+        self.dash.last_rx = t
+        self.keyframe_t = t
+
+    def apply(self, t, line):
+        key, sep, value = line.partition("=")
+        if sep:
+            self.values[key] = value
+        self.dash.feed_line(line, t)
+        self.applied += 1
+
+    def finish(self, t):
+        self.dash.tick(t)
+        self.t = t
+        return self
+
+    def summary(self):
+        dash = self.dash
+        text, _ = dash.state_label()
+        crit, nonc = dash.active_faults()
+        values = {}
+        for key, value in sorted(self.values.items()):
+            try:
+                values[key] = float(value.partition("@")[0])
+            except ValueError:
+                pass    # cell segment lists
+        return {
+            "t": self.t,
+            "state": text,
+            "faults": crit,
+            "warnings": nonc,
+            "state_flags": dict(dash.state_flags),
+            "precharge": {
+                "ts_v": dash.pack_voltage,
+                "ic_v": dash.ic_voltage,
+                "fraction": precharge_fraction(dash.pack_voltage, dash.ic_voltage),
+                "ok": dash.state_flags["precharge_ok"],
+            },
+            "values": values,
+        }
+
+
+class SessionReplay:
+    def __init__(self, path):
+        self.path = path
+        self.index = load_index(path) if is_block_log(path) else None
+        self._f = open(path, "rb") if self.index is not None else None
+        self._cache = {}
+        self.blocks_read = 0
+
+    def close(self):
+        if self._f is not None:
+            self._f.close()
+
+    @property
+    def t_start(self):
+        return min(rec[0] for rec in self.index) if self.index else None
+
+    @property
+    def t_end(self):
+        return max(rec[1] for rec in self.index) if self.index else None
+
+    def _rows(self, i):
+        rows = self._cache.pop(i, None)
+        if rows is None:
+            rows = read_block(self._f, self.index[i])
+            self.blocks_read += 1
+            if len(self._cache) >= BLOCK_CACHE:
+                self._cache.pop(next(iter(self._cache)))
+        self._cache[i] = rows     # re-insert: most recently used last
+        return rows
+
+    def state_at(self, t, use_keyframes=True):
+        """ReplayState at unix time t. use_keyframes=False replays from the start (for checking)."""
+        state = ReplayState()
+        if self.index is None:
+            # plain-text logs have no blocks or keyframes
+            for rt, line in iter_lines(self.path, t_end=t):
+                state.apply(rt, line)
+            return state.finish(t)
+
+        last = block_span(self.index, t_end=t)[1] - 1
+        if last < 0:
+            return state.finish(t)
+        first = 0
+        if use_keyframes:
+            # the target block normally starts with a keyframe; walk back until one does
+            for first in range(last, -1, -1):
+                rows = self._rows(first)
+                kf = parse_keyframe(rows[0][1]) if rows else None
+                if kf is not None:
+                    state.load_keyframe(rows[0][0], kf)
+                    break
+        for i in range(first, last + 1):
+            for rt, line in self._rows(i):
+                if rt > t:
+                    continue    # stamped lines are logged at acquisition time, so times aren't sorted
+                if parse_keyframe(line) is None:
+                    state.apply(rt, line)
+        return state.finish(t)
+
+
+# ————————————————————————————————————————
+# Benchmark: keyframe seeks against replaying from the start
+# ————————————————————————————————————————
+def bench(path, n, seed=0):
+    replay = SessionReplay(path)
+    if replay.index is None:
+        print("plain-text log: no keyframes to seek with")
+        return
+    rng = random.Random(seed)
+    targets = [rng.uniform(replay.t_start, replay.t_end) for _ in range(n)]
+
+    start = time.perf_counter()
+    seeks = [replay.state_at(t) for t in targets]
+    seek_s = time.perf_counter() - start
+
+    check = targets[:max(1, min(n, 10))]
+    start = time.perf_counter()
+    full = [SessionReplay(path).state_at(t, use_keyframes=False) for t in check]
+    full_s = (time.perf_counter() - start) / len(check)
+
+    mismatches = sum(a.summary() != b.summary() for a, b in zip(seeks, full))
+    applied = sum(s.applied for s in seeks) / n
+    print(f"{len(replay.index)} blocks, {replay.t_end - replay.t_start:.0f} s")
+    print(f"  keyframe seek  {seek_s / n * 1000:8.2f} ms/seek  ({applied:.0f} lines applied on average)")
+    print(f"  from start     {full_s * 1000:8.2f} ms/seek")
+    print(f"  {len(check)} seeks compared, {mismatches} mismatches")
+    replay.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reconstruct dashboard state at a time in a session log")
+    parser.add_argument("log", help="session log file")
+    parser.add_argument("--at", type=float, help="seconds from the start of the session")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    parser.add_argument("--bench", type=int, metavar="N", help="time N random seeks")
+    args = parser.parse_args()
+
+    if args.bench:
+        bench(args.log, args.bench)
+        return
+    replay = SessionReplay(args.log)
+    t0 = replay.t_start
+    if t0 is None:
+        t0 = next(iter_lines(args.log), (0.0, ""))[0]
+    summary = replay.state_at(t0 + (args.at or 0.0)).summary()
+    replay.close()
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return
+    print(f"t={summary['t']:.3f}  {summary['state']}")
+    print(f"  faults: {', '.join(summary['faults']) or 'none'}   warnings: {', '.join(summary['warnings']) or 'none'}")
+    pre = summary["precharge"]
+    frac = "-" if pre["fraction"] is None else f"{pre['fraction'] * 100:.0f}%"
+    print(f"  precharge: ts_v={pre['ts_v']:.1f} ic_v={pre['ic_v']:.1f} ({frac}) ok={pre['ok']}")
+    for key, value in summary["values"].items():
+        print(f"  {key:<14} {value:g}")
+
+if __name__ == "__main__":
+    main()
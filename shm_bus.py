@@ -0,0 +1,400 @@
+"""
+    Description: Telemetry channel store in multiprocessing.shared_memory so
+    ingest, the Tk UI, the session logger and a network publisher can run as
+    separate processes on separate cores. One process writes; any number
+    attach and read. The interface matches channel_store.ChannelStore
+    (update/get/entry/changed_since/snapshot/version).
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 shm_bus.py --ingest --sim                 writer: simulated car -> bus "fsae_bus"
+# python3 shm_bus.py --ingest --port /dev/serial0   writer: front Teensy -> bus
+# python3 shm_bus.py --logger                       reader: bus -> logs/<session>.tlog
+# FSAE_BUS=fsae_bus python3 driver_ui.py            UI reads channels from the bus
+# python3 shm_bus.py --bench --readers 3            writer/reader throughput, torn-read check
+#
+# Layout (fixed once created, little endian):
+#   header   magic, capacity, channels in use, global version
+#   names    capacity x 32 bytes, utf-8, NUL padded; a slot's name is written
+#            before "channels in use" covers it, so readers never see half a name
+#   slots    capacity x (seq u32, pad, t f64, value f64, version u64)
+# Each slot is a seqlock: the writer makes seq odd, writes t/value/version,
+# then makes it even again. A reader copies the slot and re-reads seq; an odd
+# or changed seq means the copy may be torn and it retries.
+# A restarted writer reuses a crashed writer's bus (versions carry on); a
+# writer that exits marks the bus closed, and readers re-attach to the next one.
+
+import argparse
+import multiprocessing as mp
+import signal
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+from dash_log import get_logger
+
+log = get_logger("shm_bus")
+
+BUS_NAME = "fsae_bus"
+CAPACITY = 256
+MAGIC = b"FSAEBUS1"
+CLOSED = b"FSAEBUS-"                  # written over MAGIC when the writer closes the bus
+NAME_LEN = 32
+HEADER = struct.Struct("<8sIIQ")      # magic, capacity, n_used, version
+HEADER_SIZE = 64
+VERSION = struct.Struct("<Q")
+N_USED = struct.Struct("<I")
+SEQ = struct.Struct("<I")
+SLOT = struct.Struct("<I4xddQ")       # seq, t, value, version
+DATA = struct.Struct("<ddQ")          # the part of SLOT after seq
+MAX_RETRIES = 100
+POLL_S = 0.02
+
+
+class BusFull(Exception):
+    pass
+
+
+class ShmChannelBus:
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.buf = shm.buf
+        self.owner = owner
+        magic, self.capacity, _, _ = HEADER.unpack_from(self.buf, 0)
+        if magic != MAGIC:
+            raise ValueError(f"shared memory '{shm.name}' is not a telemetry bus")
+        self._names_off = HEADER_SIZE
+        self._slots_off = HEADER_SIZE + self.capacity * NAME_LEN
+        self._index = {}     # name -> slot
+        self._names = []
+        self._seqs = []      # writer only: last seq written per slot
+        self._version = 0
+        self.torn_retries = 0
+        self._refresh_names()
+        if owner:
+            for i in range(self.capacity):
+                seq = SEQ.unpack_from(self.buf, self._slot_off(i))[0]
+                if seq & 1:
+                    # a crashed writer died mid-update; the next update rewrites the slot
+                    seq += 1
+                    SEQ.pack_into(self.buf, self._slot_off(i), seq)
+                self._seqs.append(seq)
+            self._version = VERSION.unpack_from(self.buf, 16)[0]
+
+    @classmethod
+    def create(cls, name=BUS_NAME, capacity=CAPACITY):
+        size = HEADER_SIZE + capacity * (NAME_LEN + SLOT.size)
+        try:
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        except FileExistsError:
+            # left over from a writer that crashed: readers are still attached to
+            # it, so carry on in the same segment if the layout matches
+            old = shared_memory.SharedMemory(name)
+            magic, old_capacity, _, _ = HEADER.unpack_from(old.buf, 0)
+            if magic == MAGIC and old_capacity == capacity:
+                log.info("bus_reused", bus=name)
+                return cls(old, owner=True)
+            if magic == MAGIC:
+                old.buf[:len(CLOSED)] = CLOSED    # different layout; readers move to the new bus
+            old.close()
+            old.unlink()
+            shm = shared_memory.SharedMemory(name, create=True, size=size)
+        shm.buf[:size] = bytes(size)
+        HEADER.pack_into(shm.buf, 0, MAGIC, capacity, 0, 0)
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name=BUS_NAME):
+        return cls(_open_existing(name), owner=False)
+
+    def close(self):
+        if self.owner:
+            self.buf[:len(CLOSED)] = CLOSED
+        self.buf = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    @property
+    def stale(self):
+        """True once the writer has closed this bus (readers: see reattach())."""
+        return bytes(self.buf[:len(MAGIC)]) != MAGIC
+
+    def reattach(self):
+        """For readers of a stale bus: the writer's new bus, or None while there isn't one.
+        Versions start over on a new bus, so reset any `seen` version kept."""
+        try:
+            fresh = ShmChannelBus.attach(self.shm.name)
+        except (FileNotFoundError, ValueError):
+            return None
+        if fresh.stale:
+            fresh.close()
+            return None
+        self.close()
+        return fresh
+
+    # ————————————————
+    # layout helpers
+    # ————————————————
+    def _slot_off(self, i):
+        return self._slots_off + i * SLOT.size
+
+    def _refresh_names(self):
+        n_used = N_USED.unpack_from(self.buf, 12)[0]
+        for i in range(len(self._names), n_used):
+            off = self._names_off + i * NAME_LEN
+            name = bytes(self.buf[off:off + NAME_LEN]).rstrip(b"\0").decode()
+            self._names.append(name)
+            self._index[name] = i
+
+    def _slot(self, name):
+        i = self._index.get(name)
+        if i is None and not self.owner:
+            self._refresh_names()
+            i = self._index.get(name)
+        return i
+
+    @staticmethod
+    def name(source, key):
+        return f"{source}.{key}" if source else key
+
+    # ————————————————
+    # writer
+    # ————————————————
+    def update(self, name, value, t):
+        i = self._index.get(name)
+        if i is None:
+            i = self._add(name)
+        off = self._slot_off(i)
+        seq = self._seqs[i] + 1
+        buf = self.buf
+        SEQ.pack_into(buf, off, seq)                  # odd: write in progress
+        self._version += 1
+        DATA.pack_into(buf, off + 8, t, value, self._version)
+        SEQ.pack_into(buf, off, seq + 1)              # even: consistent again
+        self._seqs[i] = seq + 1
+        VERSION.pack_into(buf, 16, self._version)
+        return self._version
+
+    def _add(self, name):
+        i = len(self._names)
+        if i >= self.capacity:
+            raise BusFull(f"bus has no free slot for '{name}' ({self.capacity} channels)")
+        raw = name.encode()[:NAME_LEN]
+        off = self._names_off + i * NAME_LEN
+        self.buf[off:off + NAME_LEN] = raw.ljust(NAME_LEN, b"\0")
+        N_USED.pack_into(self.buf, 12, i + 1)
+        self._names.append(name)
+        self._index[name] = i
+        return i
+
+    # ————————————————
+    # readers
+    # ————————————————
+    @property
+    def version(self):
+        return VERSION.unpack_from(self.buf, 16)[0]
+
+    def _read(self, i):
+        off = self._slot_off(i)
+        buf = self.buf
+        for _ in range(MAX_RETRIES):
+            seq, t, value, version = SLOT.unpack_from(buf, off)
+            if not seq & 1 and SEQ.unpack_from(buf, off)[0] == seq:
+                return (t, value, version) if seq else None
+            self.torn_retries += 1
+        return None   # writer stuck mid-update; treat as no data
+
+    def entry(self, name):
+        """(t, value, version) or None."""
+        i = self._slot(name)
+        return None if i is None else self._read(i)
+
+    def get(self, name, default=None):
+        e = self.entry(name)
+        return default if e is None else e[1]
+
+    def changed_since(self, version):
+        """{name: (t, value, version)} for every channel updated after `version`."""
+        if not self.owner:
+            self._refresh_names()
+        out = {}
+        for i, name in enumerate(self._names):
+            e = self._read(i)
+            if e is not None and e[2] > version:
+                out[name] = e
+        return out
+
+    def snapshot(self):
+        return self.changed_since(0)
+
+    def names(self):
+        if not self.owner:
+            self._refresh_names()
+        return list(self._names)
+
+
+def _open_existing(name):
+    try:
+        return shared_memory.SharedMemory(name, track=False)   # Python 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name)
+        # before 3.13 the resource tracker would unlink the bus when a reader exits
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+# ————————————————————————————————————————
+# Processes around the bus
+# ————————————————————————————————————————
+def run_ingest(bus_name=BUS_NAME, port=None, sim=False, seed=1):
+    """Writer: reads one Teensy (or the simulator) and publishes every numeric channel."""
+    from multi_ingest import IngestMux, SerialSource
+    from vehicle_sim import SimSerial
+
+    # raw: lines stay bytes and values go straight to float(); only new key names are decoded
+    source = SerialSource("front", ser=SimSerial(seed), raw=True) if sim else SerialSource("front", port, raw=True)
+    mux = IngestMux([source]).start()
+    bus = ShmChannelBus.create(bus_name)
+    log.info("bus_created", bus=bus_name, capacity=bus.capacity)
+    names = {}
+    try:
+        while True:
+            for t, _, line in mux.poll():
+                key, sep, value = line.partition(b"=")
+                if not sep:
+                    continue
+                try:
+                    value = float(value.partition(b"@")[0])
+                except ValueError:
+                    continue    # cell segment lists and other non-scalar lines stay off the bus
+                name = names.get(key)
+                if name is None:
+                    name = names[key] = key.decode("utf-8", errors="ignore")
+                try:
+                    bus.update(name, value, t)
+                except BusFull as e:
+                    log.error("bus_full", error=e)
+            time.sleep(POLL_S)
+    finally:
+        bus.close()
+
+def run_logger(bus_name=BUS_NAME):
+    """Reader: writes every channel change to a session log."""
+    from session_log import SessionLog
+
+    bus = _wait_for_bus(bus_name)
+    session = SessionLog.open_new()
+    log.info("logger_started", bus=bus_name, path=session.path)
+    seen = 0
+    try:
+        while True:
+            if bus.stale:
+                fresh = bus.reattach()
+                if fresh is None:
+                    time.sleep(POLL_S)
+                    continue
+                bus, seen = fresh, 0
+                log.info("logger_reattached", bus=bus_name)
+            for name, (t, value, version) in sorted(bus.changed_since(seen).items(), key=lambda kv: kv[1][2]):
+                session.write(f"{name}={value:g}")
+                seen = max(seen, version)
+            time.sleep(POLL_S)
+    finally:
+        session.close()
+        bus.close()
+
+def _wait_for_bus(bus_name, timeout_s=None):
+    t0 = time.monotonic()
+    while True:
+        try:
+            return ShmChannelBus.attach(bus_name)
+        except FileNotFoundError:
+            if timeout_s is not None and time.monotonic() - t0 > timeout_s:
+                raise
+            time.sleep(0.2)
+
+
+# ————————————————————————————————————————
+# Benchmark
+# ————————————————————————————————————————
+def _bench_writer(bus_name, channels, duration_s, created, go, result):
+    bus = ShmChannelBus.create(bus_name)
+    names = [f"ch{i}" for i in range(channels)]
+    for name in names:
+        bus.update(name, 0.0, 0.0)
+    created.set()
+    go.wait()
+    n = 0
+    end = time.perf_counter() + duration_s
+    while time.perf_counter() < end:
+        for name in names:
+            n += 1
+            bus.update(name, n * 2.0, float(n))   # value == 2 * t, always
+    result.put(("writer", n, 0, 0))
+    bus.close()
+
+def _bench_reader(bus_name, duration_s, created, go, result):
+    created.wait()
+    bus = ShmChannelBus.attach(bus_name)
+    go.wait()
+    reads = torn = 0
+    end = time.perf_counter() + duration_s
+    while time.perf_counter() < end:
+        for t, value, _ in bus.snapshot().values():
+            reads += 1
+            if value != 2.0 * t:
+                torn += 1
+    result.put(("reader", reads, torn, bus.torn_retries))
+    bus.close()
+
+def bench(readers=2, channels=64, duration_s=3.0):
+    name = f"{BUS_NAME}_bench"
+    created, go, result = mp.Event(), mp.Event(), mp.Queue()
+    procs = [mp.Process(target=_bench_writer, args=(name, channels, duration_s, created, go, result))]
+    procs += [mp.Process(target=_bench_reader, args=(name, duration_s, created, go, result))
+              for _ in range(readers)]
+    for p in procs:
+        p.start()
+    created.wait()
+    time.sleep(0.5)     # let every reader attach
+    go.set()
+    rows = [result.get() for _ in procs]
+    for p in procs:
+        p.join()
+    print(f"{channels} channels, {readers} reader processes, {duration_s:g} s")
+    for role, n, torn, retries in sorted(rows, reverse=True):
+        if role == "writer":
+            print(f"writer   {n / duration_s:12,.0f} updates/s")
+        else:
+            print(f"reader   {n / duration_s:12,.0f} channel reads/s  "
+                  f"({n / channels / duration_s:,.0f} snapshots/s)  torn {torn}  retries {retries}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Shared-memory telemetry bus")
+    parser.add_argument("--bus", default=BUS_NAME)
+    parser.add_argument("--ingest", action="store_true", help="run the writer process")
+    parser.add_argument("--port", help="serial port for --ingest")
+    parser.add_argument("--sim", action="store_true", help="--ingest from vehicle_sim instead of a port")
+    parser.add_argument("--logger", action="store_true", help="run the session logger process")
+    parser.add_argument("--bench", action="store_true", help="throughput benchmark")
+    parser.add_argument("--readers", type=int, default=2)
+    parser.add_argument("--channels", type=int, default=64)
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+
+    # systemd stops services with SIGTERM; exit through the finally blocks so the bus is unlinked
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    signal.signal(signal.SIGINT, lambda *_: sys.exit(0))
+    if args.ingest:
+        run_ingest(args.bus, args.port, args.sim)
+    elif args.logger:
+        run_logger(args.bus)
+    else:
+        bench(args.readers, args.channels, args.seconds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+    Description: Ordered graceful shutdown. Steps run one after another, each
+    with its own deadline, so a hung step (stuck serial read, slow SD card)
+    can't stop the car from powering off - it just gets skipped and reported.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+import json
+import os
+import threading
+import time
+from dash_log import get_logger
+
+log = get_logger("shutdown")
+
+CANCEL_JOIN_S = 0.5       # how long a timed-out step gets to notice its cancel signal
+
+
+class ShutdownCoordinator:
+    def __init__(self):
+        self.steps = []
+        self.report = []
+
+    def add_step(self, name, fn, deadline_s, cancel=None):
+        """cancel(): called if the step overruns its deadline, so a step that would keep
+        touching shared state (the session log) can stop before the next step starts."""
+        self.steps.append((name, fn, deadline_s, cancel))
+        return self
+
+    def run(self):
+        """Runs every step in order. Returns [(name, status, seconds)] with status ok/failed/timeout."""
+        t0 = time.monotonic()
+        for name, fn, deadline_s, cancel in self.steps:
+            start = time.monotonic()
+            status = self._run_step(fn, deadline_s, cancel)
+            self.report.append((name, status, time.monotonic() - start))
+            log.info("shutdown_step", step=name, status=status, ms=round(self.report[-1][2] * 1000))
+        self.total_s = time.monotonic() - t0
+        log.info("shutdown_done", ms=round(self.total_s * 1000))
+        return self.report
+
+    @staticmethod
+    def _run_step(fn, deadline_s, cancel=None):
+        result = {}
+
+        def target():
+            try:
+                fn()
+                result["status"] = "ok"
+            except Exception as e:
+                result["status"] = f"failed: {e}"
+
+        # daemon thread so a step that never returns can't keep the process alive
+        th = threading.Thread(target=target, daemon=True)
+        th.start()
+        th.join(deadline_s)
+        if th.is_alive() and cancel is not None:
+            cancel()
+            th.join(CANCEL_JOIN_S)
+            return "timeout: still running" if th.is_alive() else "timeout: cancelled"
+        return result.get("status", "timeout")
+
+
+def write_summary(path, summary):
+    """Writes the summary JSON and fsyncs it so it survives the power cut."""
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
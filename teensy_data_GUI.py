@@ -9,6 +9,7 @@
 # Teensy hooked up to Raspi on port, get port name and set it below
 # pip3 install -r requirements.txt
 # python3 teensy_data_GUI.py (OPTIONAL FLAG -test)
+# python3 teensy_data_GUI.py --port /dev/ttyACM0 --port /dev/ttyACM1   (front + rear boards)
 
 """
 TODO:
@@ -17,91 +18,154 @@ overall health of car peripherals and processors
 """
 
 import argparse
-import serial
 import PySimpleGUI as sg
 import threading
 import random
 import time
+from energy import ENERGY_KEYS, EnergyEstimator, format_summary
+from channel_store import ChannelStore
+from multi_ingest import IngestMux, SerialSource
+from dash_log import get_logger
 
 SIM_ARTIFICIAL_DELAY = 0.3  # artificial delay for simulated data in seconds
-batteryLevel = 100
 SERIAL_BAUDRATE = 9600 # set to this in the Teensy publisher
+DEFAULT_TEMP_SENSORS = 4    # TS1..TSn rows; the Teensy sends them as ts1..tsn
+ENERGY_REFRESH_MS = 500     # energy summary / SoC bar refresh when no data arrives
+DATA_EVENT = "-DATA-"
+
+log = get_logger("teensy_data_GUI")
+
+# ---------------------------------------------------------------------------- #
+# Shared channel data. Reader threads publish into a ChannelStore; a value that
+# actually changed bumps its version and wakes the GUI loop with DATA_EVENT, and
+# the loop only touches the elements whose channels changed since it last looked
+class DataFeed:
+    def __init__(self):
+        self.store = ChannelStore()
+        self.error = False
+        self._window = None
+        self._wake_pending = threading.Event()
+
+    def attach(self, window):
+        self._window = window
+
+    def set(self, key, value):
+        if self.store.get(key) == value:
+            return
+        self.store.update(key, value, time.monotonic())
+        # one wake-up in flight is enough; the loop picks up everything newer
+        if self._window is not None and not self._wake_pending.is_set():
+            self._wake_pending.set()
+            self._window.write_event_value(DATA_EVENT, self.store.version)
+
+    def fail(self, message):
+        self.error = True
+        self.set("error", message)
+
+    def clear(self, message):
+        """Drops the error posted as `message`, unless something else has been reported since."""
+        if self.error and self.store.get("error") == message:
+            self.error = False
+            self.set("error", "All Clear")
+
+    def changed_since(self, version):
+        self._wake_pending.clear()
+        return self.store.changed_since(version)
+
+
+def ts_key(i):
+    return f"ts{i}"
 
 # ---------------------------------------------------------------------------- #
 # Simulated function to generate test data
-def simulate_teensy_data(data_dict, error_flag):
-    global batteryLevel
+def simulate_teensy_data(feed, energy, n_temps):
+    cell_v = 4.15
     while True:
-        if error_flag["status"]:  # Skip updating if there's an error
+        if feed.error:  # Skip updating if there's an error
             time.sleep(SIM_ARTIFICIAL_DELAY)
             continue
 
         # Generate random test data
-        data_dict["battery"] = f"{batteryLevel}"
-        data_dict["speed"] = f"{random.randint(0, 120)}"
-        data_dict["RPM"] = f"{random.randint(5000, 11000)}"
-        data_dict["temp"] = f"{random.randint(20, 80)}°C"
-        data_dict["error"] = "All Clear"
+        pwr = random.uniform(5000, 40000)
+        cell_v -= pwr * 2e-8
+        feed.set("speed", f"{random.randint(0, 120)}")
+        feed.set("RPM", f"{random.randint(5000, 11000)}")
+        for i in range(1, n_temps + 1):
+            feed.set(ts_key(i), f"{random.randint(20, 80)}")
+        feed.set("error", "All Clear")
+        energy.push("acc_v", cell_v * 84)
+        energy.push("min_v", cell_v)
+        energy.push("pwr", pwr)
         time.sleep(SIM_ARTIFICIAL_DELAY)  # Simulate data update every second
-        batteryLevel -= 1
 
 
 # ---------------------------------------------------------------------------- #
-# Function to read data from Teensy
-def read_teensy_data(serial_port, data_dict, error_flag):
-    try:
-        ser = serial.Serial(serial_port, SERIAL_BAUDRATE, timeout=1)
-        error_flag["status"] = False  # Clear error status if successful
-        while True:
-            if ser.in_waiting:
-                line = ser.readline().decode('utf-8').strip()
-                # Parse the data (expected format: "battery:80,speed:40,temp:25")
-                try:
-                    parts = line.split(',')
-                    for part in parts:
-                        key, value = part.split(':')
-                        data_dict[key] = value
-                except ValueError:
-                    data_dict["error"] = f"Invalid data received: {line}"
-                    error_flag["status"] = True
-    except serial.SerialException as e:
-        data_dict["error"] = f"Serial exception: {e}"
-        error_flag["status"] = True
-    #finally:
-        #ser.close()
+# Function to read data from the Teensy boards. Every port gets its own reader
+# thread (multi_ingest.SerialSource); lines are merged here in time order and
+# keys from every port after the first are stored as "<port name>.<key>"
+def read_teensy_data(serial_ports, feed, energy):
+    sources = [SerialSource(f"src{i}", port, SERIAL_BAUDRATE) for i, port in enumerate(serial_ports)]
+    mux = IngestMux(sources).start()
+    primary = sources[0].name
+    down_msg = None     # what's on screen for the ports that are down, reported when the set changes
+    while True:
+        for _, name, line in mux.poll():
+            # Parse the data (expected format: "battery:80,speed:40,ts1:25,ts2:27")
+            try:
+                parts = line.split(',')
+                for part in parts:
+                    key, value = part.split(':')
+                    if key == "temp":
+                        key = ts_key(1)   # older firmware sends a single sensor as "temp"
+                    if name != primary:
+                        key = ChannelStore.name(name, key)
+                    elif key in ENERGY_KEYS:
+                        energy.push(key, float(value))
+                    feed.set(key, value)
+            except ValueError:
+                log.warning("serial_parse_error", source=name, line=line)
+                feed.fail(f"Invalid data received: {line}")
+
+        # only ports that failed to open or dropped count; the first attempt may still be in progress
+        down = [serial_ports[i] for i, src in enumerate(sources) if src.failed]
+        msg = f"Serial down: {', '.join(down)}" if down else None
+        if msg != down_msg:
+            if down:
+                log.warning("serial_down", ports=",".join(down))
+                feed.fail(msg)
+            else:
+                log.info("serial_up", ports=",".join(serial_ports))
+                feed.clear(down_msg)
+            down_msg = msg
+        time.sleep(0.05)
 
 # ---------------------------------------------------------------------------- #
 # Create a simple GUI to display the data
-def main(use_simulation):
-    # Shared data dictionary and error flag
-    data = {"battery": "N/A", "RPM": "N?A", "speed": "N/A", "temp": "N/A", "error": "Initializing..."}
-    error_flag = {"status": False}
-    global batteryLevel
+def main(use_simulation, serial_ports, n_temps=DEFAULT_TEMP_SENSORS):
+    feed = DataFeed()
+    energy = EnergyEstimator().start()
 
     # Start a thread to fetch data
     def start_data_thread():
         if use_simulation:
-            threading.Thread(target=simulate_teensy_data, args=(data, error_flag), daemon=True).start()
+            threading.Thread(target=simulate_teensy_data, args=(feed, energy, n_temps), daemon=True).start()
         else:
-            serial_port = "/dev/ttyACM0"  # Update with the correct port
-            threading.Thread(target=read_teensy_data, args=(serial_port, data, error_flag), daemon=True).start()
+            threading.Thread(target=read_teensy_data, args=(serial_ports, feed, energy), daemon=True).start()
 
-    start_data_thread()
-
-    col1 = sg.Column([[sg.Text("TS1:",  font=("Helvetica", 30)), sg.Text("", key="temp", size=(5, 1), font=("Helvetica", 30))],
-                      [sg.Text("TS2:",  font=("Helvetica", 30)), sg.Text("", key="temp", size=(5, 1), font=("Helvetica", 30))],
-                      [sg.Text("TS3:",  font=("Helvetica", 30)), sg.Text("", key="temp", size=(5, 1), font=("Helvetica", 30))],
-                      [sg.Text("TS4:",  font=("Helvetica", 30)), sg.Text("", key="temp", size=(5, 1), font=("Helvetica", 30))]], pad=0)
-    col2 = sg.Column([[sg.Text(key="speed", size=(2,1), font=("Helvetica", 100))],
+    col1 = sg.Column([[sg.Text(f"TS{i}:", font=("Helvetica", 30)),
+                       sg.Text("N/A", key=ts_key(i), size=(5, 1), font=("Helvetica", 30))]
+                      for i in range(1, n_temps + 1)], pad=0)
+    col2 = sg.Column([[sg.Text("N/A", key="speed", size=(2,1), font=("Helvetica", 100))],
                       [sg.Text("MPH", font=("Helvetica", 30))],
-                      [sg.Text(key="RPM", size=(5,1), font=("Helvetica", 100))],
+                      [sg.Text("N/A", key="RPM", size=(5,1), font=("Helvetica", 100))],
                       [sg.Text("RPM", font=("Helvetica", 30))]], pad=0)
-    col3 = sg.Column([[sg.Text(key="error", font=("Helvetica", 50), expand_y = (True), text_color="lime")]], pad=0)
+    col3 = sg.Column([[sg.Text("Initializing...", key="error", font=("Helvetica", 50), expand_y = (True), text_color="lime")]], pad=0)
     
     # Define the layout for the GUI
     layout = [
         [col1, sg.VerticalSeparator(), sg.Push(), col2, sg.Push(), sg.VerticalSeparator(), sg.Push(),col3],
         [sg.VPush()],
+        [sg.Text(key="range", font=("Helvetica", 20))],
         [sg.ProgressBar(100, orientation='h', expand_x = True, size_px=(800, 40), bar_color = ("yellow","gray"), key='-PBAR-')], 
     ]
 
@@ -110,33 +174,51 @@ def main(use_simulation):
         "Electric Car Monitor",
         layout,
         element_justification="center",
-        size=(800, 480)  # size of raspi 7in display in pixels
+        size=(800, 480),  # size of raspi 7in display in pixels
+        finalize=True
     )
+    feed.attach(window)
+    start_data_thread()
 
-    # Main event loop
+    # channel -> (element key, display format); anything else (secondary boards, energy keys) isn't shown here
+    displayed = {"speed": ("speed", "{}"), "RPM": ("RPM", "{}"), "error": ("error", "{}")}
+    displayed.update({ts_key(i): (ts_key(i), "{}°C") for i in range(1, n_temps + 1)})
+    seen_version = 0
+    shown_summary = shown_soc = None
+
+    # Main event loop: wakes on DATA_EVENT, or every ENERGY_REFRESH_MS for the energy summary
     while True:
-        event, _ = window.read(timeout=300)  # Update every 500ms
+        event, _ = window.read(timeout=ENERGY_REFRESH_MS)
         if event == sg.WINDOW_CLOSED or event == "Exit":
             break
 
         if event == "Reboot":
-            error_flag["status"] = False  # Clear error flag
-            data["error"] = "Rebooting data collection..."
-            window["error"].update(data["error"])
+            feed.error = False  # Clear error flag
+            feed.set("error", "Rebooting data collection...")
             window["status"].update("Rebooting...", text_color="orange")
             start_data_thread()  # Restart the data collection thread
 
-        if batteryLevel <= 0:
-            error_flag["status"] = True
-            data["error"] = "Battery \n Dead"
-            window["error"].update(data["error"], text_color="red")
-
-        # Update GUI with the latest data
-        window["speed"].update(data["speed"])
-        window["RPM"].update(data["RPM"])
-        window["temp"].update(data["temp"])
-        window["error"].update(data["error"])
-        window['-PBAR-'].update(current_count = batteryLevel)
+        # Update only the elements whose channels changed
+        changed = feed.changed_since(seen_version)
+        for name, (_, value, version) in changed.items():
+            seen_version = max(seen_version, version)
+            target = displayed.get(name)
+            if target is not None:
+                window[target[0]].update(target[1].format(value))
+
+        snap = energy.snapshot()
+        soc = snap["soc"]
+        if soc is not None and soc <= 0.0 and not feed.error:
+            feed.fail("Battery \n Dead")
+            window["error"].update(text_color="red")
+
+        summary = format_summary(snap)
+        if summary != shown_summary:
+            window["range"].update(summary)
+            shown_summary = summary
+        if soc is not None and int(soc * 100) != shown_soc:
+            shown_soc = int(soc * 100)
+            window['-PBAR-'].update(current_count = shown_soc)
 
         # Update application status
 
@@ -151,7 +233,18 @@ if __name__ == "__main__":
         action="store_true",
         help="Use simulated data instead of real data from USB"
     )
+    parser.add_argument(
+        "--port",
+        action="append",
+        help="Serial port of a Teensy board, repeat for several boards (default /dev/ttyACM0)"
+    )
+    parser.add_argument(
+        "--temps",
+        type=int,
+        default=DEFAULT_TEMP_SENSORS,
+        help=f"Number of temperature sensors to show (default {DEFAULT_TEMP_SENSORS})"
+    )
     args = parser.parse_args()
 
     # Run the main function with the appropriate data source
-    main(use_simulation=args.test)
+    main(use_simulation=args.test, serial_ports=args.port or ["/dev/ttyACM0"], n_temps=args.temps)
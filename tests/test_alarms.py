@@ -0,0 +1,109 @@
+import json
+import os
+
+from alarms import AlarmTable
+
+
+def write_rules(path, acc_limit=90.0):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"rules": [
+            {"channel": "acc_t", "above": acc_limit, "hysteresis": 2.0, "debounce_s": 0.5},
+            {"channel": "min_v", "below": 1.0, "hysteresis": 0.05},
+        ]}, f)
+    # st_mtime_ns can repeat within one tick on some filesystems
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+
+
+def test_debounce_and_hysteresis(tmp_path):
+    path = tmp_path / "limits.json"
+    write_rules(path)
+    alarms = AlarmTable.from_file(str(path))
+    alarms.set("acc_t", 95.0)
+    assert alarms.evaluate(0.0) == []
+    assert alarms.evaluate(0.4) == []
+    assert alarms.evaluate(0.5) == [("acc_t", True)]
+    alarms.set("acc_t", 89.0)                 # back under the limit but inside the hysteresis
+    assert alarms.evaluate(0.6) == []
+    alarms.set("acc_t", 87.9)
+    assert alarms.evaluate(0.7) == [("acc_t", False)]
+
+
+def test_short_excursion_is_debounced(tmp_path):
+    path = tmp_path / "limits.json"
+    write_rules(path)
+    alarms = AlarmTable.from_file(str(path))
+    alarms.set("acc_t", 95.0)
+    alarms.evaluate(0.0)
+    alarms.set("acc_t", 80.0)
+    alarms.evaluate(0.3)
+    alarms.set("acc_t", 95.0)
+    assert alarms.evaluate(0.6) == []         # the debounce clock restarted at 0.6
+    assert alarms.evaluate(1.1) == [("acc_t", True)]
+
+
+def test_below_rule_trips_without_debounce(tmp_path):
+    path = tmp_path / "limits.json"
+    write_rules(path)
+    alarms = AlarmTable.from_file(str(path))
+    alarms.set("min_v", 0.9)
+    assert alarms.evaluate(0.0) == [("min_v", True)]
+    assert alarms.active_channels() == ["min_v"]
+
+
+def test_reload_keeps_active_debounced_alarm(tmp_path):
+    path = tmp_path / "limits.json"
+    write_rules(path)
+    alarms = AlarmTable.from_file(str(path))
+    alarms.set("acc_t", 95.0)
+    alarms.evaluate(0.0)
+    assert alarms.evaluate(0.5) == [("acc_t", True)]
+    write_rules(path, acc_limit=92.0)
+    assert alarms.maybe_reload()
+    assert alarms.limit_for("acc_t") == 92.0
+    assert alarms.evaluate(0.6) == []
+    assert alarms.is_active("acc_t")
+
+
+def test_reload_keeps_debounce_in_progress(tmp_path):
+    path = tmp_path / "limits.json"
+    write_rules(path)
+    alarms = AlarmTable.from_file(str(path))
+    alarms.set("acc_t", 95.0)
+    alarms.evaluate(0.0)
+    write_rules(path, acc_limit=91.0)
+    assert alarms.maybe_reload()
+    assert alarms.evaluate(0.5) == [("acc_t", True)]
+
+
+def test_missing_file_is_not_a_change(tmp_path):
+    path = tmp_path / "limits.json"
+    write_rules(path)
+    alarms = AlarmTable.from_file(str(path))
+    os.remove(path)
+    assert not alarms.maybe_reload()          # one failed attempt when it disappears
+    assert not alarms.maybe_reload()
+    assert alarms._mtime is None
+    write_rules(path, acc_limit=80.0)
+    assert alarms.maybe_reload()
+    assert alarms.limit_for("acc_t") == 80.0
+
+
+def test_broken_file_keeps_rules(tmp_path):
+    path = tmp_path / "limits.json"
+    write_rules(path)
+    alarms = AlarmTable.from_file(str(path))
+    path.write_text("{not json")
+    assert not alarms.maybe_reload()
+    assert alarms.limit_for("acc_t") == 90.0
+
+
+def test_nan_clears_an_active_alarm(tmp_path):
+    # driver_ui sets NaN when a derived channel loses its value
+    path = tmp_path / "limits.json"
+    write_rules(path)
+    alarms = AlarmTable.from_file(str(path))
+    alarms.set("min_v", 0.5)
+    assert alarms.evaluate(0.0) == [("min_v", True)]
+    alarms.set("min_v", float("nan"))
+    assert alarms.evaluate(0.1) == [("min_v", False)]
@@ -0,0 +1,75 @@
+import time
+
+import pytest
+
+import can_ingest
+from can_ingest import CanDecoder, CanSource
+
+
+@pytest.fixture(scope="module")
+def decoder():
+    return CanDecoder.from_dbc()
+
+
+def decode(decoder, can_id, hex_data):
+    return dict(decoder.decode_batch([(can_id, bytes.fromhex(hex_data))]))
+
+
+def test_intel_signals(decoder):
+    # the frame from the vcan example at the top of can_ingest.py
+    values = decode(decoder, 0x6B0, "C40D0000B4010000")
+    assert values["acc_v"] == pytest.approx(352.4)
+    assert values["acc_i"] == 0.0
+    assert values["acc_t"] == pytest.approx(70.0)
+    assert values["fault_bms"] == 1.0
+    assert values["fault_imd"] == 0.0
+
+
+def test_signed_intel_signals(decoder):
+    # mtr_t -12.5, cnt_t 40.0, cool_t 30.0
+    values = decode(decoder, 162, "83FF90012C010000")
+    assert values == pytest.approx({"mtr_t": -12.5, "cnt_t": 40.0, "cool_t": 30.0})
+
+
+def test_motorola_signals(decoder):
+    # mtr_s -1000 rpm, pwr 12000 W, fault_mc set (bit 39 = MSB of byte 4)
+    values = decode(decoder, 165, "FC182EE080000000")
+    assert values == pytest.approx({"mtr_s": -1000.0, "pwr": 12000.0, "fault_mc": 1.0})
+
+
+def test_unknown_and_short_frames(decoder):
+    before = decoder.unknown
+    assert decoder.decode_batch([(0x7FF, bytes(8)), (0x6B1, bytes(4))]) == []
+    assert decoder.unknown == before + 1
+
+
+class BrokenSocket:
+    def __init__(self):
+        self.closed = False
+
+    def settimeout(self, t):
+        pass
+
+    def recv(self, n):
+        raise OSError("Network is down")
+
+    def close(self):
+        self.closed = True
+
+
+def test_socket_is_closed_when_the_interface_errors(monkeypatch):
+    socks = []
+
+    def fake_open(iface):
+        socks.append(BrokenSocket())
+        return socks[-1]
+
+    monkeypatch.setattr(can_ingest, "open_can_socket", fake_open)
+    src = CanSource("vcan0").start()
+    end = time.monotonic() + 2.0
+    while not src.errors and time.monotonic() < end:
+        time.sleep(0.01)
+    src.stop()
+    src._thread.join()
+    assert src.errors >= 1
+    assert all(s.closed for s in socks)
@@ -0,0 +1,63 @@
+import math
+
+import pytest
+
+from cell_array import CellArray, CellHeatmap, parse_segment_line
+
+
+def test_parse_segment_line():
+    assert parse_segment_line("cv_3", "3.91,3.92") == ("v", 2, [3.91, 3.92])
+    assert parse_segment_line("ct_1", "25.5,26,") == ("t", 0, [25.5, 26.0])   # trailing comma
+    assert parse_segment_line("mtr_t", "40") is None
+    assert parse_segment_line("cv_2", "") == ("v", 1, [])
+
+
+@pytest.mark.parametrize("key, value", [
+    ("cv_x", "3.9"),
+    ("cv_", "3.9"),
+    ("cv_1", "3.9,abc"),
+    ("ct_2", "25;26"),
+])
+def test_parse_segment_line_rejects_malformed_lines(key, value):
+    with pytest.raises(ValueError):
+        parse_segment_line(key, value)
+
+
+def test_out_of_range_segments_are_rejected():
+    cells = CellArray(segments=2, cells_per_seg=3, therms_per_seg=2)
+    for key in ("cv_0", "cv_3", "cv_-1"):
+        assert not cells.update_segment(*parse_segment_line(key, "3.9"))
+    assert all(math.isnan(v) for v in cells.volts)
+
+
+def test_update_segment_bounds():
+    cells = CellArray(segments=2, cells_per_seg=3, therms_per_seg=2)
+    assert cells.update_segment("v", 1, [3.7, 3.8, 3.9])
+    assert list(cells.volts[3:]) == pytest.approx([3.7, 3.8, 3.9])
+    assert all(math.isnan(v) for v in cells.volts[:3])        # neighbouring segment untouched
+    assert not cells.update_segment("v", 0, [3.9] * 4)        # more readings than cells
+    assert not cells.update_segment("t", 0, [25.0] * 3)       # temps use therms_per_seg
+    assert cells.update_segment("t", 0, [25.0, 26.0])
+    assert cells.update_segment("v", 0, [4.0])                # a short line fills from the start
+    assert cells.volts[0] == pytest.approx(4.0)
+    assert math.isnan(cells.volts[1])
+
+
+def test_weakest_cell():
+    cells = CellArray(segments=2, cells_per_seg=3, therms_per_seg=2)
+    assert cells.weakest_cell() is None
+    cells.update_segment("v", 0, [3.9, 3.6])                  # cell 3 still missing
+    cells.update_segment("v", 1, [3.8, 3.55, 3.7])
+    index, volts = cells.weakest_cell()
+    assert (index, cells.cell_name(index)) == (4, "S2C2")
+    assert volts == pytest.approx(3.55)
+
+
+def test_heatmap_only_repaints_accepted_segments():
+    cells = CellArray(segments=2, cells_per_seg=3, therms_per_seg=2)
+    heatmap = CellHeatmap(cells)
+    heatmap.dirty = False
+    assert not heatmap.update_segment("v", 5, [3.9])
+    assert not heatmap.dirty
+    assert heatmap.update_segment("v", 1, [3.9])
+    assert heatmap.dirty
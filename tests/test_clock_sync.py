@@ -0,0 +1,99 @@
+import pytest
+
+from clock_sync import WRAP, ClockSync, split_stamp
+
+
+class Link:
+    """A Teensy whose clock runs at `rate` against the Pi's, `offset_s` behind, with the
+    given one-way delays (seconds) for the exchanges in order."""
+
+    def __init__(self, offset_s, rate, delays):
+        self.now = 1000.0
+        self.offset_s = offset_s
+        self.rate = rate
+        self.delays = list(delays)
+
+    def teensy_us(self, pi_t):
+        return int(((pi_t - self.offset_s) * self.rate * 1e6)) % WRAP
+
+    def exchange(self, sync):
+        out, back = self.delays.pop(0)
+        sent = []
+        sync.request(sent.append)
+        seq = sent[0].decode().strip().split("@")[1]
+        t2 = self.teensy_us(self.now + out)
+        t3 = self.teensy_us(self.now + out + 0.0001)
+        self.now += out + 0.0001 + back
+        sync.handle_reply(f"{seq},{t2},{t3}")
+        self.now += 0.5
+
+
+def make(link):
+    return ClockSync(clock=lambda: link.now)
+
+
+def test_fits_offset_and_drift():
+    link = Link(offset_s=900.0, rate=1.0 + 50e-6, delays=[(0.001, 0.001)] * 20)
+    sync = make(link)
+    for _ in range(20):
+        link.exchange(sync)
+    assert sync.synced
+    assert sync.drift_ppm == pytest.approx(50.0, abs=1.0)
+    pi_t = link.now + 1.0
+    assert sync.to_pi(link.teensy_us(pi_t)) == pytest.approx(pi_t, abs=50e-6)
+
+
+def test_slow_exchanges_are_left_out_of_the_fit():
+    # every other reply sat in a buffer for 40 ms on the way back
+    delays = [(0.001, 0.001) if i % 2 else (0.001, 0.041) for i in range(20)]
+    link = Link(offset_s=900.0, rate=1.0, delays=delays)
+    sync = make(link)
+    for _ in range(20):
+        link.exchange(sync)
+    pi_t = link.now
+    assert sync.to_pi(link.teensy_us(pi_t)) == pytest.approx(pi_t, abs=100e-6)
+
+
+def test_unknown_reply_and_identity():
+    sync = ClockSync()
+    assert not sync.handle_reply("7,1,2")
+    assert sync.to_pi("123") is None
+    fixed = ClockSync.identity()
+    assert fixed.to_pi(2_500_000) == pytest.approx(2.5)
+
+
+def test_micros_wrap_keeps_time_moving_forward():
+    sync = ClockSync.identity()
+    before = sync.to_pi(WRAP - 1000)
+    after = sync.to_pi(500)
+    assert after - before == pytest.approx(1500e-6)
+
+
+def test_late_stamps_around_a_wrap_stay_in_order():
+    sync = ClockSync.identity()
+    sync.to_pi(1000)
+    assert sync.to_pi(900) == pytest.approx(900e-6)          # out of order, not a reset
+    assert sync.to_pi(WRAP - 200) == pytest.approx(-200e-6)   # from before the wrap, not 71 min ahead
+    after = sync.to_pi(WRAP - 100)
+    assert sync.to_pi(2000) - after == pytest.approx(2100e-6)
+
+
+def test_teensy_reset_drops_the_fit_instead_of_unwrapping():
+    link = Link(offset_s=900.0, rate=1.0, delays=[(0.001, 0.001)] * 10)
+    sync = make(link)
+    for _ in range(5):
+        link.exchange(sync)
+    assert sync.synced
+    # the Teensy restarts: micros() is back near zero, nowhere near a wrap
+    link.offset_s = link.now - 0.2
+    assert sync.to_pi(link.teensy_us(link.now)) is None
+    assert not sync.synced
+    for _ in range(5):
+        link.exchange(sync)
+    pi_t = link.now
+    assert sync.to_pi(link.teensy_us(pi_t)) == pytest.approx(pi_t, abs=50e-6)
+
+
+def test_split_stamp():
+    assert split_stamp("88.5@123456") == ("88.5", "123456")
+    assert split_stamp("88.5") == ("88.5", None)
@@ -0,0 +1,115 @@
+from command_channel import CommandChannel
+
+
+class Clock:
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def make(**kw):
+    clock = Clock()
+    sent = []
+    ch = CommandChannel(lambda data: sent.append(data.decode()), clock=clock, **kw)
+    return ch, clock, sent
+
+
+def test_wire_format_tags_commands_with_seq():
+    ch, _, sent = make()
+    ch.send("check")
+    ch.send("set", "fan_duty=60")
+    assert sent == ["check@1\n", "set@2 fan_duty=60\n"]
+
+
+def test_ack_clears_pending_and_reports_rtt():
+    ch, clock, _ = make()
+    done = []
+    seq = ch.send("check", on_done=lambda ok, rtt: done.append((ok, rtt)))
+    clock.t = 0.02
+    assert ch.handle_reply("ack", str(seq))
+    assert ch.outstanding == 0
+    assert done == [(True, 0.02)]
+    assert ch.counts["acked"] == 1
+    # a late duplicate ack is swallowed without a second callback
+    assert ch.handle_reply("ack", str(seq))
+    assert len(done) == 1
+
+
+def test_other_keys_are_not_replies():
+    ch, _, _ = make()
+    assert not ch.handle_reply("mtr_t", "40")
+
+
+def test_timeout_retries_then_gives_up():
+    ch, clock, sent = make(timeout_s=0.25, max_retries=2)
+    done = []
+    ch.send("check", on_done=lambda ok, rtt: done.append((ok, rtt)))
+    clock.t = 0.1
+    ch.poll()
+    assert len(sent) == 1                     # not overdue yet
+    for i in range(2):
+        clock.t += 0.25
+        ch.poll()
+        assert len(sent) == 2 + i             # same seq retransmitted
+    assert set(sent) == {"check@1\n"}
+    assert ch.counts["retries"] == 2
+    clock.t += 0.25
+    ch.poll()
+    assert done == [(False, None)]
+    assert ch.counts["failed"] == 1
+    assert ch.outstanding == 0
+
+
+def test_rtt_is_measured_from_the_last_retry():
+    ch, clock, _ = make(timeout_s=0.25)
+    done = []
+    ch.send("check", on_done=lambda ok, rtt: done.append(rtt))
+    clock.t = 0.3
+    ch.poll()
+    clock.t = 0.31
+    ch.handle_reply("ack", "1")
+    assert abs(done[0] - 0.01) < 1e-9
+
+
+def test_nak_fails_without_retry():
+    ch, clock, sent = make()
+    done = []
+    ch.send("set", "fan_duty=200", on_done=lambda ok, rtt: done.append((ok, rtt)))
+    ch.handle_reply("nak", "1")
+    assert done == [(False, None)]
+    assert ch.counts["nacked"] == 1
+    clock.t = 10.0
+    ch.poll()
+    assert len(sent) == 1
+
+
+def test_window_limits_commands_in_flight():
+    ch, _, sent = make(max_outstanding=2)
+    for _ in range(4):
+        ch.send("check")
+    assert sent == ["check@1\n", "check@2\n"]
+    assert ch.outstanding == 4
+    ch.handle_reply("ack", "2")
+    assert sent[-1] == "check@3\n"            # a slot freed, the oldest waiting one goes out
+    ch.handle_reply("nak", "1")
+    assert sent[-1] == "check@4\n"
+    assert len(sent) == 4
+
+
+def test_write_error_is_retried_like_a_lost_ack():
+    clock = Clock()
+    sent = []
+
+    def flaky(data):
+        if not sent:
+            sent.append(None)
+            raise OSError("port gone")
+        sent.append(data.decode())
+
+    ch = CommandChannel(flaky, clock=clock, timeout_s=0.25)
+    ch.send("check")
+    clock.t = 0.3
+    ch.poll()
+    assert sent == [None, "check@1\n"]
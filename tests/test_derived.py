@@ -0,0 +1,78 @@
+import pytest
+
+from derived import CycleError, DerivedGraph, default_graph, vehicle_speed_kmh
+
+
+def counting(fn, calls, name):
+    def wrapped(*args):
+        calls.append(name)
+        return fn(*args)
+    return wrapped
+
+
+def test_only_changed_values_come_back():
+    g = default_graph()
+    g.set("max_v", 4.1)
+    g.set("min_v", 4.0)
+    assert g.evaluate() == {"cell_spread": pytest.approx(0.1)}
+    assert g.evaluate() == {}
+    g.set("min_v", 4.0)                 # same value: nothing to do
+    assert g.evaluate() == {}
+    assert not g.set("gps_lat", 37.3)   # nothing reads it
+
+
+def test_changes_propagate_in_dependency_order():
+    calls = []
+    g = (DerivedGraph()
+         .add("c", ("b", "x"), counting(lambda b, x: b + x, calls, "c"))
+         .add("b", ("a",), counting(lambda a: a * 2, calls, "b")))
+    assert g.names() == ["b", "c"]
+    assert g.inputs() == ["a", "x"]
+    g.set("a", 1.0)
+    g.set("x", 10.0)
+    assert g.evaluate() == {"b": 2.0, "c": 12.0}
+    calls.clear()
+    g.set("x", 20.0)                    # only c reads x
+    assert g.evaluate() == {"c": 22.0}
+    assert calls == ["c"]
+
+
+def test_unchanged_intermediate_stops_propagation():
+    calls = []
+    g = (DerivedGraph()
+         .add("sign", ("a",), counting(lambda a: 1 if a > 0 else -1, calls, "sign"))
+         .add("out", ("sign",), counting(lambda s: s * 100, calls, "out")))
+    g.set("a", 5.0)
+    g.evaluate()
+    calls.clear()
+    g.set("a", 7.0)
+    assert g.evaluate() == {}
+    assert calls == ["sign"]
+
+
+def test_none_clears_a_value():
+    g = default_graph()
+    g.set("acc_v", 400.0)
+    g.set("acc_i", 50.0)
+    g.set("pwr", 18000.0)
+    assert g.evaluate()["eff"] == pytest.approx(0.9)
+    g.set("acc_i", 0.1)                 # 40 W: efficiency is noise
+    assert g.evaluate()["eff"] is None  # reported, so the caller can clear what it shows
+    assert g.get("eff") is None
+    assert g.evaluate() == {}
+
+
+def test_cycle_is_rejected_and_graph_still_works():
+    g = DerivedGraph().add("a", ("b",), lambda b: b).add("c", ("a",), lambda a: a + 1)
+    with pytest.raises(CycleError):
+        g.add("b", ("c",), lambda c: c)
+    g.set("b", 1.0)
+    assert g.evaluate() == {"a": 1.0, "c": 2.0}
+    with pytest.raises(ValueError):
+        g.add("a", ("z",), lambda z: z)
+
+
+def test_vehicle_speed():
+    g = default_graph()
+    g.set("mtr_s", 3000.0)
+    assert g.evaluate()["veh_spd"] == pytest.approx(vehicle_speed_kmh(3000.0))
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from downsample import error_bounds, lttb, minmax, reduce
+
+
+def reference_lttb(t, v, n_out):
+    """Straight-line LTTB as published, for checking the vectorized one."""
+    n = len(v)
+    every = (n - 2) / (n_out - 2)
+    keep = [0]
+    a = 0
+    for i in range(n_out - 2):
+        start, end = int(i * every) + 1, int((i + 1) * every) + 1
+        nstart, nend = end, min(int((i + 2) * every) + 1, n - 1)
+        if i == n_out - 3:
+            ct, cv = t[n - 1], v[n - 1]
+        else:
+            ct, cv = t[nstart:nend].mean(), v[nstart:nend].mean()
+        area = np.abs((t[a] - ct) * (v[start:end] - v[a]) - (t[a] - t[start:end]) * (cv - v[a]))
+        a = start + int(area.argmax())
+        keep.append(a)
+    keep.append(n - 1)
+    return np.array(keep)
+
+
+@pytest.fixture
+def series():
+    rng = np.random.default_rng(3)
+    t = np.arange(10000) * 0.01
+    v = np.sin(t) + rng.normal(0, 0.05, len(t))
+    v[4321] = 9.0      # one-sample spike
+    return t, v
+
+
+def test_minmax_keeps_extremes_in_order(series):
+    t, v = series
+    t_ds, v_ds = minmax(t, v, 200)
+    assert len(t_ds) <= 200
+    assert np.all(np.diff(t_ds) > 0)
+    assert v_ds.max() == 9.0 and v_ds.min() == v.min()
+    # every bucket's extremes survive
+    for chunk in np.array_split(v, 100):
+        assert chunk.max() in v_ds and chunk.min() in v_ds
+
+
+def test_lttb_matches_reference(series):
+    t, v = series
+    # n - 2 samples split evenly over n_out - 2 buckets, so both agree on the bucket edges
+    t, v = np.append(t, [100.0, 100.01]), np.append(v, [0.0, 0.1])
+    n_out = 202
+    t_ds, v_ds = lttb(t, v, n_out)
+    keep = reference_lttb(t, v, n_out)
+    assert len(t_ds) == n_out
+    assert np.array_equal(t_ds, t[keep])
+    assert t_ds[0] == t[0] and t_ds[-1] == t[-1]
+    assert 9.0 in v_ds
+
+
+def test_short_series_pass_through():
+    t, v = np.arange(5.0), np.arange(5.0)
+    for mode in ("lttb", "minmax"):
+        t_ds, v_ds = reduce(t, v, 10, mode)
+        assert np.array_equal(v_ds, v)
+    with pytest.raises(ValueError):
+        reduce(t, v, 10, "average")
+
+
+def test_error_bounds(series):
+    t, v = series
+    assert error_bounds(t, v, t, v)["max_abs"] == 0.0
+    t_ds, v_ds = reduce(t, v, 400, "lttb")
+    err = error_bounds(t, v, t_ds, v_ds)
+    assert 0.0 < err["rms"] <= err["max_abs"]
+    assert err["max_rel"] == pytest.approx(err["max_abs"] / (v.max() - v.min()))
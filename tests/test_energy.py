@@ -0,0 +1,36 @@
+import pytest
+
+from energy import EnergyEstimator, soc_from_ocv
+
+
+def test_lap_time_runs_from_the_lap_count_change():
+    e = EnergyEstimator()
+    e.apply(10.0, "lap", 1)
+    # the Teensy repeats the lap count with every telemetry frame
+    for t in (20.0, 40.0, 60.0):
+        e.apply(t, "lap", 1)
+    e.apply(72.5, "lap", 2)
+    snap = e.snapshot()
+    assert snap["laps"] == 2
+    assert snap["lap_s"] == pytest.approx(62.5)
+    e.apply(80.0, "lap", 2)
+    e.apply(130.0, "lap", 3)
+    assert e.snapshot()["lap_s"] == pytest.approx(57.5)
+
+
+def test_energy_integrates_power_between_samples():
+    e = EnergyEstimator()
+    e.apply(0.0, "acc_v", 500.0)
+    e.apply(0.0, "pwr", 10000.0)
+    e.apply(0.5, "pwr", 10000.0)
+    e.apply(5.0, "pwr", 10000.0)        # gap longer than MAX_SAMPLE_GAP_S isn't integrated
+    snap = e.snapshot()
+    assert snap["wh_used"] == pytest.approx(10000.0 * 0.5 / 3600.0)
+    assert snap["ah_used"] == pytest.approx(20.0 * 0.5 / 3600.0)
+    assert snap["peak_w"] == 10000.0
+
+
+def test_soc_from_ocv_interpolates_and_clamps():
+    assert soc_from_ocv(2.5) == 0.0
+    assert soc_from_ocv(4.3) == 1.0
+    assert soc_from_ocv(3.75) == pytest.approx(0.425)
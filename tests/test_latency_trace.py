@@ -0,0 +1,57 @@
+import time
+
+from latency_trace import LatencyTracer, LoopbackSerial
+from multi_ingest import SerialSource
+
+
+class IdleRoot:
+    def __init__(self):
+        self.idle = []
+
+    def after_idle(self, fn):
+        self.idle.append(fn)
+
+    def run_idle(self):
+        idle, self.idle = self.idle, []
+        for fn in idle:
+            fn()
+
+
+def test_tracer_measures_stages_from_send():
+    now = [10.0]
+    root = IdleRoot()
+    tracer = LatencyTracer(root, clock=lambda: now[0])
+    assert tracer.begin("mtr_t") is None
+    tr = tracer.begin("fault_imd", sent=9.99, read=9.995)
+    now[0] = 10.001
+    tracer.mark(tr, "parse")
+    tracer.mark(tr, "state")
+    tracer.commit(tr)
+    now[0] = 10.011
+    root.run_idle()
+    stats = tracer.stats()["fault_imd"]
+    assert list(stats) == ["read", "parse", "state", "sched", "flush"]
+    assert stats["read"]["p50_ms"] == 5.0
+    assert stats["flush"]["p50_ms"] == 21.0
+
+
+def test_loopback_lines_cross_a_tty():
+    ser = LoopbackSerial(hz=200)
+    src = SerialSource("front", ser=ser).start()
+    try:
+        assert ser.fileno() >= 0
+        ser.write(b"pi_ready\n")
+        ser.write(b"check@7\n")
+        end = time.monotonic() + 2.0
+        while time.monotonic() < end and not {"rodger", "ack=7"} <= {line for _, line in src.lines}:
+            time.sleep(0.01)
+        lines = [line for _, line in src.lines]
+        assert "rodger" in lines and "ack=7" in lines
+        t_read, stamped = next((t, line) for t, line in src.lines if line.startswith("brk="))
+        sent = int(stamped.split("@")[1]) * 1e-6
+        assert 0.0 <= t_read - sent < 1.0      # stamped on the Pi's own clock
+    finally:
+        src.stop()
+        src._thread.join()
+        ser.close()
+    assert not ser.is_open
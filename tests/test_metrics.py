@@ -0,0 +1,73 @@
+import json
+import math
+import urllib.request
+
+import pytest
+
+from metrics import MetricsServer, Registry
+
+
+def buckets(registry, name):
+    return {labels["le"]: value for n, labels, value in registry._metrics[name].samples()
+            if n == name + "_bucket"}
+
+
+def test_value_on_a_bound_lands_in_that_bucket():
+    reg = Registry()
+    h = reg.histogram("lat_seconds", "Latency", buckets=(0.1, 0.5))
+    for v in (0.1, 0.5, 0.50001, 0.0):
+        h.observe(v)
+    assert buckets(reg, "lat_seconds") == {"0.1": 2, "0.5": 3, "+Inf": 4}
+    text = reg.render_prometheus()
+    assert 'lat_seconds_bucket{le="0.1"} 2' in text
+    assert "lat_seconds_count 4" in text
+
+
+def test_label_values_are_escaped():
+    reg = Registry()
+    c = reg.counter("lines_total", "Lines", ("source",))
+    c.labels('rear "B"\\\nx').inc(3)
+    assert 'lines_total{source="rear \\"B\\"\\\\\\nx"} 3' in reg.render_prometheus().splitlines()
+
+
+def test_nan_and_inf_are_null_in_json():
+    reg = Registry()
+    reg.gauge("unset", "Never set")
+    reg.gauge("temps", "Per sensor", lambda: {"a": math.nan, "b": 1.5, "c": math.inf}, ("sensor",))
+    out = reg.to_json()
+    assert out["unset"] is None
+    assert [s["value"] for s in out["temps"]] == [None, 1.5, None]
+    json.loads(json.dumps(out, allow_nan=False))    # strict JSON, no NaN tokens
+    assert "unset NaN" in reg.render_prometheus()
+
+
+def test_failing_callback_drops_only_its_own_metric():
+    reg = Registry()
+    reg.gauge("ok_a", "Fine", lambda: 1)
+    reg.gauge("broken", "Raises", lambda: 1 / 0)
+    reg.counter_fn("ok_b_total", "Fine", lambda: 7)
+    text = reg.render_prometheus()
+    assert "broken" not in text
+    assert "ok_a 1" in text and "ok_b_total 7" in text
+    assert reg.to_json() == {"ok_a": 1, "ok_b_total": 7}
+
+
+def test_duplicate_names_are_refused():
+    reg = Registry()
+    reg.counter("x_total", "X")
+    with pytest.raises(ValueError):
+        reg.gauge("x_total", "X again")
+
+
+def test_server_serves_both_formats():
+    reg = Registry()
+    reg.counter("hits_total", "Hits").inc(2)
+    server = MetricsServer(reg, "127.0.0.1:0").start()
+    try:
+        base = f"http://127.0.0.1:{server.port}"
+        with urllib.request.urlopen(base + "/metrics", timeout=5) as r:
+            assert "hits_total 2" in r.read().decode()
+        with urllib.request.urlopen(base + "/metrics.json", timeout=5) as r:
+            assert json.load(r) == {"hits_total": 2}
+    finally:
+        server.stop()
@@ -0,0 +1,109 @@
+import os
+import time
+
+from multi_ingest import LineFramer, SerialSource
+
+
+def wait_for(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end:
+        time.sleep(0.01)
+    return cond()
+
+
+def test_source_reports_failure_only_after_an_open_attempt(tmp_path):
+    src = SerialSource("front", str(tmp_path / "no_such_tty"))
+    assert not src.connected and not src.failed    # not tried yet: not "down"
+    src.start()
+    try:
+        assert wait_for(lambda: src.failed)
+        assert not src.connected
+    finally:
+        src.stop()
+
+
+def test_source_clears_failure_when_the_port_opens(tmp_path):
+    master, slave = os.openpty()
+    link = tmp_path / "tty"
+    src = SerialSource("front", str(link)).start()
+    try:
+        assert wait_for(lambda: src.failed)
+        link.symlink_to(os.ttyname(slave))
+        assert wait_for(lambda: src.connected and not src.failed, timeout=3.0)
+        os.write(master, b"speed:40\n")
+        assert wait_for(lambda: len(src.lines) == 1)
+        assert src.lines[0][1] == "speed:40"
+    finally:
+        src.stop()
+        os.close(master)
+        os.close(slave)
+
+
+def framer_feed(framer, *chunks):
+    out = []
+    for chunk in chunks:
+        out += framer.feed(chunk)
+    return out
+
+
+def test_framer_splits_lines_across_reads():
+    framer = LineFramer(size=32)
+    assert framer_feed(framer, b"acc_t=4", b"1.5\r\nmtr_", b"t=30\n\n  \ngas=1\nbr") == ["acc_t=41.5", "mtr_t=30", "gas=1"]
+    assert framer.feed(b"k=0\n") == ["brk=0"]
+
+
+def test_framer_raw_lines_are_bytes():
+    framer = LineFramer(size=32, raw=True)
+    assert framer.feed(b"acc_t=41.5\n") == [b"acc_t=41.5"]
+
+
+def test_framer_commit_in_place():
+    framer = LineFramer(size=16)
+    data = b"a=1\nb=2\nc="
+    framer.space()[:len(data)] = data
+    assert framer.commit(len(data)) == ["a=1", "b=2"]
+    assert framer.fill == 2
+    framer.space()[:2] = b"3\n"
+    assert framer.commit(2) == ["c=3"]
+
+
+def test_framer_drops_the_whole_overlong_line():
+    framer = LineFramer(size=16)
+    out = framer_feed(framer, b"x" * 40 + b"=garbage\nacc_t=41.5\n")
+    assert out == ["acc_t=41.5"]
+    assert framer.overruns == 1
+    # a buffer-length run followed straight away by its newline
+    assert framer_feed(framer, b"y" * 16, b"\ngas=1\n") == ["gas=1"]
+
+
+class StandIn:
+    """A port without a file descriptor, like FakeSerial."""
+
+    def __init__(self, data):
+        self.data = data
+        self.fileno_calls = 0
+
+    def fileno(self):
+        self.fileno_calls += 1
+        raise OSError("no fd")
+
+    @property
+    def in_waiting(self):
+        return len(self.data)
+
+    def read(self, n):
+        if not self.data:
+            time.sleep(0.005)
+        chunk, self.data = self.data[:n], self.data[n:]
+        return chunk
+
+
+def test_stand_in_port_is_only_asked_for_an_fd_once():
+    ser = StandIn(b"acc_t=41.5\ngas=1\n")
+    src = SerialSource("front", ser=ser).start()
+    try:
+        assert wait_for(lambda: src.count == 2)
+        time.sleep(0.05)
+        assert ser.fileno_calls == 1
+    finally:
+        src.stop()
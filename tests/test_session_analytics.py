@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import session_log
+from downsample import export
+from session_analytics import MAX_HOLD_S, hold_durations, load_columns, sample_at, time_above
+from session_log import SessionLog
+
+
+@pytest.fixture
+def stamped_log(tmp_path, monkeypatch):
+    """acc_t logged at arrival time until the clock sync lands, then at (earlier) acquisition time."""
+    monkeypatch.setattr(session_log, "BLOCK_LINES", 8)
+    path = str(tmp_path / "s.tlog")
+    log = SessionLog(path, keyframe_s=None)
+    for i in range(40):
+        t = 1000.0 + i * 0.1
+        stamp = t if i < 20 else t - 0.35
+        log.write(f"acc_t={90 + i % 3}", stamp)
+        log.write(f"pwr={1000 * i}", t)
+    log.close()
+    return path
+
+
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_columns_are_sorted_by_time(stamped_log, use_cache):
+    cols = load_columns(stamped_log, use_cache)
+    t, v = cols["acc_t"]
+    assert np.all(np.diff(t) >= 0)
+    assert len(t) == 40
+    # values travel with their times
+    raw = sorted((1000.0 + i * 0.1 if i < 20 else 1000.0 + i * 0.1 - 0.35, 90 + i % 3) for i in range(40))
+    assert np.allclose(t, [r[0] for r in raw], atol=1e-3)
+    assert np.array_equal(v, [r[1] for r in raw])
+
+
+def test_time_above_is_never_negative(stamped_log):
+    t, v = load_columns(stamped_log, use_cache=False)["acc_t"]
+    assert time_above(t, v, 0.0) == pytest.approx(t[-1] - t[0], abs=1e-6)
+    assert np.all(hold_durations(np.array([0.0, 2.0, 1.5, 1.6])) >= 0.0)
+    assert hold_durations(np.array([0.0, 5.0]))[0] == MAX_HOLD_S
+
+
+def test_sample_at_holds_the_last_value():
+    t = np.array([1.0, 2.0, 3.0])
+    v = np.array([10.0, 20.0, 30.0])
+    out = sample_at(t, v, np.array([0.5, 1.0, 2.5, 9.0]))
+    assert np.isnan(out[0])
+    assert out[1:].tolist() == [10.0, 20.0, 30.0]
+
+
+def test_export_interpolates_over_increasing_time(stamped_log, tmp_path):
+    reduced = export(stamped_log, str(tmp_path / "out.json"), n_out=10, keys=["acc_t"])
+    t_ds, v_ds, err, n = reduced["acc_t"]
+    assert n == 40
+    assert np.all(np.diff(t_ds) > 0)
+    assert err["max_abs"] <= 2.0
@@ -0,0 +1,45 @@
+import session_log
+from session_log import SessionLog, block_span, iter_lines, load_index, read_session
+
+
+def write_log(path, rows, monkeypatch, block_lines=4):
+    monkeypatch.setattr(session_log, "BLOCK_LINES", block_lines)
+    log = SessionLog(str(path), keyframe_s=None)
+    for t, line in rows:
+        log.write(line, t)
+    log.close()
+    return str(path)
+
+
+def test_seek_across_blocks(tmp_path, monkeypatch):
+    rows = [(100.0 + i * 0.1, f"mtr_t={i}") for i in range(40)]
+    path = write_log(tmp_path / "s.tlog", rows, monkeypatch)
+    assert len(load_index(path)) == 10
+    got = list(iter_lines(path, 101.05, 102.25))
+    assert got == [(t, line) for t, line in rows if 101.05 <= t <= 102.25]
+    assert [v for _, _, v in read_session(path, t_end=100.25)] == [0.0, 1.0, 2.0]
+
+
+def test_stamped_lines_out_of_order_are_not_skipped(tmp_path, monkeypatch):
+    # arrival-time lines interleaved with Teensy-stamped ones acquired a little earlier
+    rows = []
+    for i in range(20):
+        t = 200.0 + i
+        rows.append((t, f"gas={i}"))
+        rows.append((t - 2.5, f"acc_t={i}"))
+    path = write_log(tmp_path / "s.tlog", rows, monkeypatch)
+    index = load_index(path)
+    assert all(rec[0] <= rec[1] for rec in index)
+    assert any(index[i][1] > index[i + 1][0] for i in range(len(index) - 1))   # ranges overlap
+
+    t0, t1 = 205.0, 210.0
+    got = sorted(iter_lines(path, t0, t1))
+    assert got == sorted((t, line) for t, line in rows if t0 <= t <= t1)
+
+
+def test_block_span_uses_running_bounds():
+    index = [(0.0, 10.0, 0, 0), (5.0, 6.0, 0, 0), (2.0, 20.0, 0, 0), (15.0, 30.0, 0, 0)]
+    assert block_span(index, 7.0, 8.0) == (0, 3)      # block 1 can't hold 7..8 but block 2 can
+    assert block_span(index, 25.0) == (3, 4)
+    assert block_span(index, t_end=1.0) == (0, 1)
+    assert block_span(index, 40.0) == (4, 4)
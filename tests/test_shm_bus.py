@@ -0,0 +1,110 @@
+import os
+import threading
+
+import pytest
+
+from shm_bus import SEQ, ShmChannelBus
+
+
+@pytest.fixture
+def bus_name(request):
+    return f"fsae_test_{os.getpid()}_{request.node.name}"[:30]
+
+
+def crash(bus):
+    """Drops a writer without the close() that marks and unlinks the bus."""
+    bus.buf = None
+    bus.shm.close()
+
+
+def test_reader_sees_writer_updates(bus_name):
+    writer = ShmChannelBus.create(bus_name)
+    reader = ShmChannelBus.attach(bus_name)
+    try:
+        v1 = writer.update("acc_t", 41.5, 10.0)
+        writer.update("mtr_s", 300.0, 10.1)
+        assert reader.get("acc_t") == 41.5
+        assert reader.entry("acc_t") == (10.0, 41.5, v1)
+        assert set(reader.changed_since(v1)) == {"mtr_s"}
+        assert reader.names() == ["acc_t", "mtr_s"]
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_odd_seq_reads_as_torn(bus_name):
+    writer = ShmChannelBus.create(bus_name)
+    reader = ShmChannelBus.attach(bus_name)
+    try:
+        writer.update("acc_t", 41.5, 10.0)
+        off = writer._slot_off(0)
+        SEQ.pack_into(writer.buf, off, writer._seqs[0] + 1)    # writer "mid-update"
+        assert reader.entry("acc_t") is None
+        assert reader.torn_retries > 0
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_concurrent_reads_are_never_torn(bus_name):
+    writer = ShmChannelBus.create(bus_name)
+    reader = ShmChannelBus.attach(bus_name)
+    names = [f"ch{i}" for i in range(16)]
+    for name in names:
+        writer.update(name, 0.0, 0.0)
+    stop = threading.Event()
+
+    def write():
+        n = 0
+        while not stop.is_set():
+            n += 1
+            for name in names:
+                writer.update(name, 2.0 * n, float(n))
+
+    t = threading.Thread(target=write)
+    t.start()
+    try:
+        for _ in range(2000):
+            for tt, value, _ in reader.snapshot().values():
+                assert value == 2.0 * tt
+    finally:
+        stop.set()
+        t.join()
+        reader.close()
+        writer.close()
+
+
+def test_restarted_writer_reuses_crashed_bus(bus_name):
+    writer = ShmChannelBus.create(bus_name)
+    reader = ShmChannelBus.attach(bus_name)
+    v1 = writer.update("acc_t", 1.0, 1.0)
+    SEQ.pack_into(writer.buf, writer._slot_off(0), writer._seqs[0] + 1)   # died mid-update
+    crash(writer)
+    writer = ShmChannelBus.create(bus_name)
+    try:
+        v2 = writer.update("acc_t", 2.0, 2.0)
+        assert v2 > v1
+        assert not reader.stale
+        assert reader.get("acc_t") == 2.0
+        assert set(reader.changed_since(v1)) == {"acc_t"}
+    finally:
+        reader.close()
+        writer.close()
+
+
+def test_reader_reattaches_after_writer_closes(bus_name):
+    writer = ShmChannelBus.create(bus_name)
+    reader = ShmChannelBus.attach(bus_name)
+    writer.update("acc_t", 1.0, 1.0)
+    writer.close()
+    assert reader.stale
+    assert reader.reattach() is None           # no writer yet
+    writer = ShmChannelBus.create(bus_name)
+    try:
+        writer.update("acc_t", 2.0, 2.0)
+        fresh = reader.reattach()
+        assert fresh is not None and not fresh.stale
+        assert fresh.changed_since(0)["acc_t"][1] == 2.0
+        fresh.close()
+    finally:
+        writer.close()
@@ -0,0 +1,30 @@
+import threading
+import time
+
+from shutdown import ShutdownCoordinator
+
+
+def test_overrunning_step_is_cancelled_before_the_next_one():
+    stop = threading.Event()
+    order = []
+
+    def drain():
+        while not stop.is_set():
+            time.sleep(0.005)
+        order.append("drain stopped")
+
+    c = ShutdownCoordinator()
+    c.add_step("drain", drain, 0.05, cancel=stop.set)
+    c.add_step("sync", lambda: order.append("sync"), 1.0)
+    report = c.run()
+    assert order == ["drain stopped", "sync"]
+    assert [(name, status) for name, status, _ in report] == [("drain", "timeout: cancelled"), ("sync", "ok")]
+
+
+def test_failed_and_hung_steps_are_reported():
+    c = ShutdownCoordinator()
+    c.add_step("boom", lambda: 1 / 0, 1.0)
+    c.add_step("hang", lambda: time.sleep(5), 0.05)
+    statuses = [status for _, status, _ in c.run()]
+    assert statuses[0].startswith("failed")
+    assert statuses[1] == "timeout"
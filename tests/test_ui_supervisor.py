@@ -0,0 +1,121 @@
+import pytest
+
+import ui_supervisor
+from ui_supervisor import Supervisor
+from ui_watchdog import SdNotifier
+
+
+class Clock:
+    def __init__(self, t=100.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+class Proc:
+    returncode = None
+
+
+class StandInChild:
+    """Looks like ui_supervisor.Child to the supervisor; records restarts instead of spawning."""
+
+    def __init__(self, clock, name="ui"):
+        self.name = name
+        self._clock = clock
+        self.proc = Proc()
+        self.running = False
+        self.restarts = 0
+        self.reasons = []
+        self.start()
+
+    def start(self):
+        self.running = True
+        self.proc.returncode = None
+        self.started = self._clock()
+        self.last_ping = None
+        self.ready = False
+
+    def alive(self):
+        return self.running
+
+    def exit(self, code):
+        self.running = False
+        self.proc.returncode = code
+
+    def stop(self):
+        self.running = False
+
+    def restart(self, reason):
+        self.reasons.append(reason)
+        self.restarts += 1
+        self.start()
+
+
+@pytest.fixture
+def sup():
+    clock = Clock()
+    s = Supervisor([], ["true"], watchdog_s=3.0, clock=clock)
+    s.clock = clock
+    s.ui = StandInChild(clock)
+    s._running = True
+    yield s
+    s.listener.close()
+
+
+def notify(sup, state):
+    SdNotifier(sup.listener.address).notify(state)
+    sup._handle(sup.listener.recv(1.0))
+
+
+def test_ui_child_reads_the_bus_only():
+    s = Supervisor([], ["true"])
+    try:
+        assert s.ui.env["FSAE_BUS"] == ui_supervisor.BUS_NAME
+        assert s.ui.env["FSAE_SERIAL"] == "none"
+        assert s.ui.env["NOTIFY_SOCKET"] == s.listener.address
+    finally:
+        s.listener.close()
+
+
+def test_restarts_ui_after_missed_pings(sup):
+    notify(sup, "READY=1")
+    assert sup.ui.ready
+    sup.clock.t += 2.0
+    notify(sup, "WATCHDOG=1")
+    sup.clock.t += 2.5
+    sup._check()
+    assert sup.ui.restarts == 0
+    sup.clock.t += 1.0                       # 3.5 s since the last WATCHDOG=1
+    sup._check()
+    assert sup.ui.restarts == 1
+    assert sup.ui.reasons[0].startswith("no WATCHDOG=1")
+    assert sup._running
+
+
+def test_restarts_ui_that_never_gets_ready(sup):
+    sup.clock.t += ui_supervisor.START_GRACE_S + 0.1
+    sup._check()
+    assert sup.ui.reasons == ["no READY=1"]
+
+
+def test_crash_restarts_but_clean_exit_leaves_ui_down(sup):
+    notify(sup, "READY=1")
+    sup.ui.exit(1)
+    sup._check()
+    assert sup.ui.reasons == ["exited with 1"]
+    assert sup._running
+
+    sup.ui.exit(0)                           # ESC / shutdown from the dash
+    sup._check()
+    assert sup.ui.restarts == 1
+    assert not sup.ui.alive()
+    assert not sup._running
+
+
+def test_services_restart_on_exit(sup):
+    svc = StandInChild(sup.clock, "logger")
+    sup.services = [svc]
+    svc.exit(2)
+    sup._check()
+    assert svc.reasons == ["exited with 2"]
@@ -0,0 +1,103 @@
+import time
+
+import pytest
+
+import ui_watchdog
+from fb_render import FbRoot, Framebuffer
+from ui_watchdog import NotifyListener, SdNotifier, UiWatchdog
+
+
+class Clock:
+    def __init__(self, t=0.0):
+        self.t = t
+
+    def __call__(self):
+        return self.t
+
+
+class Recorder:
+    def __init__(self):
+        self.sent = []
+
+    def notify(self, state):
+        self.sent.append(state)
+        return True
+
+    def count(self, state):
+        return self.sent.count(state)
+
+
+def wait_for(cond, timeout=2.0):
+    end = time.monotonic() + timeout
+    while not cond() and time.monotonic() < end:
+        time.sleep(0.01)
+    return cond()
+
+
+@pytest.fixture
+def root():
+    return FbRoot(Framebuffer(bytearray(8 * 8 * 2), 8, 8, 16))
+
+
+def test_late_beat_raises_and_clears_the_alarm(root):
+    clock = Clock()
+    alarms = []
+    wd = UiWatchdog(root, notifier=Recorder(), clock=clock,
+                    on_alarm=lambda active, late: alarms.append((active, round(late, 2))))
+    wd.start()
+    try:
+        clock.t = 0.5                      # due at 0.1: 0.4 s late
+        wd._beat()
+        assert wd.alarm and alarms == [(True, 0.4)]
+        assert wd.late_beats == 1
+        # on-time beats; the alarm holds for CLEAR_S after the last late one
+        while clock.t < 0.5 + ui_watchdog.CLEAR_S:
+            clock.t = round(clock.t + 0.1, 3)
+            wd._beat()
+        clock.t = round(clock.t + 0.1, 3)
+        wd._beat()
+        assert not wd.alarm
+        assert alarms == [(True, 0.4), (False, 0.0)]
+        assert wd.stats()["late_beats"] == 1
+    finally:
+        wd.stop()
+
+
+def test_stall_stops_watchdog_pings(root):
+    clock = Clock()
+    notifier = Recorder()
+    wd = UiWatchdog(root, notifier=notifier, clock=clock).start()
+    try:
+        assert notifier.sent[0] == "READY=1"
+        clock.t = 0.6
+        wd._beat()
+        assert wait_for(lambda: notifier.count("WATCHDOG=1") == 1)
+
+        clock.t = 0.6 + wd.stall_s + 0.5  # the loop stops beating
+        assert wait_for(lambda: wd.stalled)
+        pings = notifier.count("WATCHDOG=1")
+        time.sleep(0.3)
+        assert notifier.count("WATCHDOG=1") == pings
+        assert wd.stalls == 1
+        assert any(s.startswith("STATUS=UI loop stalled") for s in notifier.sent)
+
+        wd._beat()                          # the loop runs again
+        assert wait_for(lambda: not wd.stalled and notifier.count("WATCHDOG=1") > pings)
+    finally:
+        wd.stop()
+    assert notifier.sent[-1] == "STOPPING=1"
+
+
+def test_notifier_reaches_listener():
+    listener = NotifyListener()
+    try:
+        SdNotifier(listener.address).notify("READY=1\nSTATUS=up")
+        assert listener.recv(1.0) == [("READY", "1"), ("STATUS", "up")]
+        assert listener.recv(0.01) == []
+    finally:
+        listener.close()
+
+
+def test_notifier_without_socket_does_nothing(monkeypatch):
+    monkeypatch.delenv("NOTIFY_SOCKET", raising=False)
+    assert not SdNotifier().notify("READY=1")
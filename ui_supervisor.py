@@ -0,0 +1,161 @@
+"""
+    Description: Keeps the car's processes running without systemd. Ingest and
+    the session logger (shm_bus.py) run as long-lived children; the UI runs
+    with NOTIFY_SOCKET pointing at a local listener, and is killed and
+    restarted on its own when its WATCHDOG=1 pings stop or it crashes, so a
+    frozen display never takes data collection down with it.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 ui_supervisor.py --sim                         simulated car, UI reads the bus
+# python3 ui_supervisor.py --port /dev/serial0
+# python3 ui_supervisor.py --sim --ui "python3 ui_watchdog.py --demo-stall 5 --seconds 30"
+#     restart test: the stand-in UI hangs after 2 s and should be restarted
+
+import argparse
+import os
+import shlex
+import signal
+import subprocess
+import sys
+import time
+
+from dash_log import get_logger
+from shm_bus import BUS_NAME
+from ui_watchdog import NotifyListener
+
+log = get_logger("ui_supervisor")
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+WATCHDOG_S = 3.0         # like WatchdogSec=3: no WATCHDOG=1 for this long -> restart the UI
+START_GRACE_S = 15.0     # time the UI gets to send READY=1 (Tk + fonts on a Pi are slow)
+KILL_GRACE_S = 2.0       # SIGTERM, then SIGKILL after this
+RESTART_DELAY_S = 1.0
+
+
+class Child:
+    def __init__(self, name, argv, env=None, clock=time.monotonic):
+        self.name = name
+        self.argv = argv
+        self.env = env
+        self._clock = clock
+        self.proc = None
+        self.restarts = 0
+        self.started = None
+        self.last_ping = None
+        self.ready = False
+
+    def start(self):
+        self.proc = subprocess.Popen(self.argv, env=self.env)
+        self.started = self._clock()
+        self.last_ping = None
+        self.ready = False
+        log.info("child_started", child=self.name, pid=self.proc.pid)
+
+    def alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def stop(self):
+        if not self.alive():
+            return
+        self.proc.terminate()
+        try:
+            self.proc.wait(KILL_GRACE_S)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+            self.proc.wait()
+
+    def restart(self, reason):
+        log.warning("child_restart", child=self.name, reason=reason, restarts=self.restarts + 1)
+        self.stop()
+        time.sleep(RESTART_DELAY_S)
+        self.restarts += 1
+        self.start()
+
+
+class Supervisor:
+    def __init__(self, services, ui_argv, watchdog_s=WATCHDOG_S, clock=time.monotonic):
+        self.listener = NotifyListener()
+        self.services = services
+        # the ingest child owns the boards: the UI reads the bus and opens no serial source of its own
+        env = dict(os.environ, NOTIFY_SOCKET=self.listener.address, FSAE_BUS=BUS_NAME, FSAE_SERIAL="none")
+        self.ui = Child("ui", ui_argv, env, clock)
+        self.watchdog_s = watchdog_s
+        self._clock = clock
+        self._running = False
+
+    def run(self):
+        self._running = True
+        for child in self.services:
+            child.start()
+        time.sleep(0.5)      # the ingest process creates the bus before the UI attaches
+        self.ui.start()
+        try:
+            while self._running:
+                self._handle(self.listener.recv(0.2))
+                self._check()
+        finally:
+            for child in [self.ui] + self.services:
+                child.stop()
+            self.listener.close()
+
+    def stop(self):
+        self._running = False
+
+    def _handle(self, fields):
+        # only the UI gets NOTIFY_SOCKET, so every datagram is from it
+        now = self._clock()
+        for key, value in fields:
+            if key == "READY":
+                self.ui.ready = True
+                self.ui.last_ping = now
+                log.info("ui_ready")
+            elif key == "WATCHDOG":
+                self.ui.last_ping = now
+            elif key == "STATUS":
+                log.info("ui_status", status=value)
+            elif key == "STOPPING":
+                log.info("ui_stopping")
+
+    def _check(self):
+        now = self._clock()
+        for child in self.services:
+            if not child.alive():
+                child.restart(f"exited with {child.proc.returncode}")
+
+        ui = self.ui
+        if not ui.alive():
+            code = ui.proc.returncode
+            if code == 0:
+                log.info("ui_exited")    # ESC / shutdown from the dash: leave it down
+                self._running = False
+            else:
+                ui.restart(f"exited with {code}")
+        elif not ui.ready and now - ui.started > START_GRACE_S:
+            ui.restart("no READY=1")
+        elif ui.ready and now - ui.last_ping > self.watchdog_s:
+            ui.restart(f"no WATCHDOG=1 for {now - ui.last_ping:.1f} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ingest, logger and UI with a UI watchdog")
+    parser.add_argument("--sim", action="store_true", help="ingest from vehicle_sim")
+    parser.add_argument("--port", help="front Teensy serial port")
+    parser.add_argument("--ui", help="UI command (default: driver_ui.py)")
+    parser.add_argument("--watchdog", type=float, default=WATCHDOG_S, help="seconds without WATCHDOG=1 before a restart")
+    args = parser.parse_args()
+
+    py = sys.executable
+    bus = os.path.join(HERE, "shm_bus.py")
+    ingest = [py, bus, "--ingest"] + (["--sim"] if args.sim else ["--port", args.port or "/dev/serial0"])
+    services = [Child("ingest", ingest), Child("logger", [py, bus, "--logger"])]
+    ui = shlex.split(args.ui) if args.ui else [py, os.path.join(HERE, "driver_ui.py")]
+
+    sup = Supervisor(services, ui, args.watchdog)
+    signal.signal(signal.SIGTERM, lambda *_: sup.stop())
+    signal.signal(signal.SIGINT, lambda *_: sup.stop())
+    sup.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+"""
+    Description: UI stall watchdog. A heartbeat scheduled with root.after()
+    measures how late the Tk event loop runs callbacks; a separate thread
+    notices when the heartbeat stops altogether, logs it, and stops sending
+    systemd WATCHDOG=1 pings so the service manager (or ui_supervisor.py)
+    restarts the UI. Late-but-running loops raise an on-screen alarm.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# watchdog = UiWatchdog(root, on_alarm=show_alarm).start()     in the UI process
+# python3 ui_watchdog.py --demo-stall 5     headless demo: runs a loop that hangs for 5 s after 2 s
+#
+# systemd unit for the UI (ingest/logging run as their own services):
+#   [Service]
+#   Type=notify
+#   WatchdogSec=3
+#   Restart=on-failure
+#   ExecStart=/usr/bin/python3 /home/pi/Raspi/driver_ui.py
+
+import argparse
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from collections import deque
+
+from dash_log import get_logger
+
+log = get_logger("ui_watchdog")
+
+BEAT_MS = 100            # heartbeat period on the Tk loop
+BUDGET_S = 0.25          # a callback running this late is an alarm
+STALL_S = 1.0            # no heartbeat for this long -> the loop is stuck
+CLEAR_S = 2.0            # alarm clears after this long without another late beat
+PING_S = 0.5             # WATCHDOG=1 period while healthy (keep < WatchdogSec / 2)
+LATENCY_SAMPLES = 1000
+
+
+# ————————————————————————————————————————
+# sd_notify
+# ————————————————————————————————————————
+class SdNotifier:
+    """Sends sd_notify datagrams to $NOTIFY_SOCKET; does nothing if it isn't set."""
+
+    def __init__(self, address=None):
+        address = address or os.environ.get("NOTIFY_SOCKET")
+        self.address = None
+        self.sock = None
+        if address:
+            # a leading '@' is the abstract namespace
+            self.address = "\0" + address[1:] if address.startswith("@") else address
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+
+    def notify(self, state):
+        if self.sock is None:
+            return False
+        try:
+            self.sock.sendto(state.encode(), self.address)
+            return True
+        except OSError as e:
+            log.warning("sd_notify_error", error=e)
+            return False
+
+
+class NotifyListener:
+    """Local stand-in for systemd's end of NOTIFY_SOCKET: a datagram socket that
+    collects what SdNotifier sends. Children get `address` as NOTIFY_SOCKET."""
+
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(tempfile.mkdtemp(prefix="fsae_notify_"), "notify.sock")
+        self.address = path
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self.sock.bind(path)
+
+    def recv(self, timeout_s):
+        """[(field, value)] from the next datagram, or [] after timeout_s."""
+        self.sock.settimeout(timeout_s)
+        try:
+            data = self.sock.recv(4096)
+        except socket.timeout:
+            return []
+        fields = []
+        for line in data.decode(errors="ignore").splitlines():
+            key, sep, value = line.partition("=")
+            if sep:
+                fields.append((key, value))
+        return fields
+
+    def close(self):
+        self.sock.close()
+        try:
+            os.unlink(self.address)
+            os.rmdir(os.path.dirname(self.address))
+        except OSError:
+            pass
+
+
+# ————————————————————————————————————————
+# Watchdog
+# ————————————————————————————————————————
+class UiWatchdog:
+    def __init__(self, root, budget_s=BUDGET_S, stall_s=STALL_S, beat_ms=BEAT_MS,
+                 notifier=None, on_alarm=None, clock=time.monotonic):
+        self.root = root
+        self.budget_s = budget_s
+        self.stall_s = stall_s
+        self.beat_ms = beat_ms
+        self.notifier = notifier or SdNotifier()
+        self.on_alarm = on_alarm     # called on the Tk thread: on_alarm(active, late_s)
+        self._clock = clock
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.late_beats = 0
+        self.stalls = 0
+        self.stalled = False
+        self.alarm = False
+        self._last_beat = None
+        self._last_late = None
+        self._due = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        now = self._clock()
+        self._last_beat = now
+        self._due = now + self.beat_ms / 1000.0
+        self.root.after(self.beat_ms, self._beat)
+        self._thread = threading.Thread(target=self._watch, name="ui-watchdog", daemon=True)
+        self._thread.start()
+        self.notifier.notify("READY=1")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self.notifier.notify("STOPPING=1")
+
+    # Tk thread
+    def _beat(self):
+        now = self._clock()
+        late = max(0.0, now - self._due)
+        self.latencies.append(late)
+        self._last_beat = now
+        if late > self.budget_s:
+            self.late_beats += 1
+            self._last_late = now
+            log.warning("ui_loop_late", late_ms=round(late * 1000))
+            if not self.alarm:
+                self.alarm = True
+                self._fire(True, late)
+        elif self.alarm and now - self._last_late > CLEAR_S:
+            self.alarm = False
+            self._fire(False, 0.0)
+        self._due = now + self.beat_ms / 1000.0
+        if not self._stop.is_set():
+            self.root.after(self.beat_ms, self._beat)
+
+    def _fire(self, active, late):
+        if self.on_alarm is not None:
+            try:
+                self.on_alarm(active, late)
+            except Exception as e:
+                log.error("alarm_callback_error", error=e)
+
+    # watchdog thread
+    def _watch(self):
+        last_ping = 0.0
+        period = min(PING_S, self.beat_ms / 1000.0)
+        while not self._stop.wait(period):
+            now = self._clock()
+            silent = now - self._last_beat
+            if silent > self.stall_s:
+                if not self.stalled:
+                    self.stalled = True
+                    self.stalls += 1
+                    # the UI can't draw anything now; this log line and the missing
+                    # WATCHDOG=1 pings are what get it restarted
+                    log.error("ui_stall", silent_s=round(silent, 2))
+                    self.notifier.notify(f"STATUS=UI loop stalled for {silent:.1f} s")
+                continue
+            if self.stalled:
+                self.stalled = False
+                log.warning("ui_recovered")
+                self.notifier.notify("STATUS=running")
+            if now - last_ping >= PING_S:
+                self.notifier.notify("WATCHDOG=1")
+                last_ping = now
+
+    def stats(self):
+        """Loop latency percentiles in ms plus alarm counters."""
+        lat = sorted(self.latencies)
+        if not lat:
+            return {"samples": 0, "late_beats": self.late_beats, "stalls": self.stalls}
+        pct = lambda p: round(lat[min(len(lat) - 1, int(p * len(lat)))] * 1000, 2)
+        return {
+            "samples": len(lat),
+            "p50_ms": round(statistics.median(lat) * 1000, 2),
+            "p95_ms": pct(0.95),
+            "p99_ms": pct(0.99),
+            "max_ms": round(lat[-1] * 1000, 2),
+            "late_beats": self.late_beats,
+            "stalls": self.stalls,
+        }
+
+
+# ————————————————————————————————————————
+# Headless demo (also the stand-in UI for ui_supervisor.py tests)
+# ————————————————————————————————————————
+def demo(stall_s, run_s):
+    from fb_render import FbRoot, Framebuffer
+
+    root = FbRoot(Framebuffer(bytearray(8 * 8 * 2), 8, 8, 16))
+    watchdog = UiWatchdog(root, on_alarm=lambda active, late: log.info("alarm", active=active)).start()
+    if stall_s:
+        root.after(2000, time.sleep, stall_s)    # a callback that hangs the loop
+    root.after(int(run_s * 1000), root.destroy)
+    root.mainloop()
+    watchdog.stop()
+    print(watchdog.stats())
+
+def main():
+    parser = argparse.ArgumentParser(description="UI stall watchdog demo")
+    parser.add_argument("--demo-stall", type=float, default=0.0, help="hang the loop this long after 2 s")
+    parser.add_argument("--seconds", type=float, default=6.0, help="how long the demo loop runs")
+    args = parser.parse_args()
+    demo(args.demo_stall, args.seconds)
+
+if __name__ == "__main__":
+    main()
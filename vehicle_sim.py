@@ -0,0 +1,465 @@
+"""
+    Description: Deterministic vehicle / accumulator / thermal simulator on a
+    virtual clock. Same seed -> same telemetry, bit for bit. It runs at 1x for
+    demos (SimSerial stands in for the Teensy port) or as fast as the CPU
+    allows headless to generate long sessions for testing.
+    Author: SCU FSAE Electrical Subteam
+"""
+
+# Usage:
+# python3 vehicle_sim.py --duration 1800 --speed 0 --out logs/sim.tlog   30 min endurance, headless
+#                                                                      (--force to overwrite an existing log)
+# python3 vehicle_sim.py --duration 60 --speed 1                        stream lines to stdout at 1x
+#
+# Or FSAE_SERIAL=sim python3 driver_ui.py   (SimSerial instead of FakeSerial; sim:60 for 60x)
+#    FSAE_SERIAL=simproc:60 ...             same model in a child process (what mem_soak.py uses)
+
+import argparse
+import math
+import os
+import random
+import select
+import subprocess
+import sys
+import time
+from collections import deque
+
+from cell_array import SEGMENTS, CELLS_PER_SEG, THERMS_PER_SEG
+from derived import GEAR_RATIO, PRECHARGE_TARGET, WHEEL_R
+from energy import CELL_OCV_TABLE, PACK_CAPACITY_AH
+
+# ————————————————
+# CONFIG
+# ————————————————
+PHYSICS_DT = 0.01        # s, fixed step so results don't depend on how fast we run
+EMIT_HZ = 20.0           # telemetry rate, like the Teensy publisher
+READ_TIMEOUT_S = 0.1     # SimProcessSerial.readline() gives up after this, like a serial port timeout
+
+MASS_KG = 280.0
+CDA = 1.2
+RHO = 1.2
+CRR = 0.015
+DRIVETRAIN_EFF = 0.92
+MAX_TORQUE_NM = 230.0
+MAX_POWER_W = 80000.0    # FSAE rules limit
+MAX_BRAKE_G = 1.4
+MAX_LAT_G = 1.5
+BRAKE_PLAN_G = 1.1       # deceleration the driver plans corner entries with
+ENDURANCE_THROTTLE = 0.5 # endurance pace, not autocross
+LOOKAHEAD_M = 150.0      # corners further ahead than this never limit speed
+DERATE_CELL_V = 3.2      # BMS starts cutting power below this cell voltage
+CUTOFF_CELL_V = 2.9      # and allows none at this
+REGEN = 0.0              # fraction of braking power recovered
+
+N_SERIES = SEGMENTS * CELLS_PER_SEG
+CELL_R_OHM = 0.0025
+CELL_R_SPREAD = 0.15     # +/- fraction between cells
+CELL_CAP_SPREAD = 0.03
+CELL_HEAT_CAP = 180.0    # J/K per parallel cell group
+CELL_COOLING = 0.6       # W/K per parallel cell group
+
+AMBIENT_C = 25.0
+MOTOR_HEAT_CAP = 8000.0
+MOTOR_LOSS = 0.06        # fraction of shaft power lost as heat
+CNT_HEAT_CAP = 3000.0
+CNT_LOSS = 0.03
+COOLANT_HEAT_CAP = 12000.0
+COOLANT_TO_AIR = 60.0    # W/K at speed 0
+COOLANT_AIR_PER_MS = 8.0 # extra W/K per m/s of airflow
+PART_TO_COOLANT = 120.0  # W/K
+
+PRECHARGE_TAU = 0.6
+READY_AT_S = 4.0         # status=1 this long after power-up
+
+# endurance-style lap: (length m, corner radius m or 0 for straight)
+TRACK = [
+    (120, 0), (40, 15), (80, 0), (30, 9), (60, 0), (50, 25), (150, 0),
+    (35, 12), (70, 0), (45, 8), (90, 0), (60, 30), (40, 0), (30, 10),
+]
+
+
+def ocv_from_soc(soc):
+    table = CELL_OCV_TABLE
+    if soc <= table[0][1]:
+        return table[0][0]
+    for (v0, s0), (v1, s1) in zip(table, table[1:]):
+        if soc <= s1:
+            return v0 + (v1 - v0) * (soc - s0) / (s1 - s0)
+    return table[-1][0]
+
+
+class VirtualClock:
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def advance(self, dt):
+        self.now += dt
+        return self.now
+
+
+class VehicleSim:
+    def __init__(self, seed=0, start_soc=0.95, clock=None, emit_hz=EMIT_HZ):
+        self.rng = random.Random(seed)
+        self.clock = clock or VirtualClock()
+        self.emit_every = max(1, int(round(1.0 / (emit_hz * PHYSICS_DT))))
+        self._step_n = 0
+
+        self.track = TRACK
+        self.lap_len = sum(seg[0] for seg in TRACK)
+        # (start m, length m, grip-limited speed m/s) for every corner on this lap and the next
+        self._corners = []
+        start = 0.0
+        for lap_off in (0.0, self.lap_len):
+            for length, radius in TRACK:
+                if radius:
+                    self._corners.append((start + lap_off, length, math.sqrt(MAX_LAT_G * 9.81 * radius)))
+                start += length
+            start = 0.0
+        self.pos = 0.0            # m along the lap
+        self.lap = 0
+        self.v = 0.0              # m/s
+        self.gas = 0.0
+        self.brk = 0.0
+        self.power_w = 0.0        # electrical, from the pack
+        self.aggression = 0.9
+
+        self.soc = start_soc
+        self.cell_r = [CELL_R_OHM * (1 + self.rng.uniform(-CELL_R_SPREAD, CELL_R_SPREAD)) for _ in range(N_SERIES)]
+        self.cell_dsoc = [self.rng.uniform(-CELL_CAP_SPREAD, 0.0) for _ in range(N_SERIES)]
+        self.pack_r = sum(self.cell_r)
+        # cells share the pack current and cooling law, so every cell temperature is
+        # ambient + decay * (its start offset) + heat * (its resistance): O(1) per step
+        self._cell_t0 = [self.rng.uniform(-1, 1) for _ in range(N_SERIES)]
+        self._decay = 1.0
+        self._heat = 0.0
+        self.current = 0.0
+
+        self.mtr_t = AMBIENT_C
+        self.cnt_t = AMBIENT_C
+        self.cool_t = AMBIENT_C
+        self.ic_v = 0.0
+        self.enabled = False
+        self._seg = 0
+
+    # ————————————————
+    # driver
+    # ————————————————
+    def _target_speed(self):
+        # slowest speed required by any corner within braking distance ahead
+        best = 1e9
+        pos = self.pos
+        for s0, length, v_corner in self._corners:
+            if s0 > pos + LOOKAHEAD_M:
+                break
+            if s0 + length > pos:
+                v = v_corner * self.aggression
+                dist = s0 - pos if s0 > pos else 0.0
+                best = min(best, math.sqrt(v * v + 2 * BRAKE_PLAN_G * 9.81 * dist))
+        return best
+
+    def _drive(self):
+        target = self._target_speed()
+        err = target - self.v
+        if err > 0.3:
+            self.gas, self.brk = min(ENDURANCE_THROTTLE, 0.25 * err + 0.2), 0.0
+        elif err < -0.3:
+            self.gas, self.brk = 0.0, min(1.0, -0.3 * err)
+        else:
+            self.gas, self.brk = 0.15, 0.0
+
+    def _power_limit(self):
+        # BMS derate on the weakest cell under the last step's load
+        weakest = ocv_from_soc(max(0.0, self.soc - CELL_CAP_SPREAD)) - self.current * CELL_R_OHM * (1 + CELL_R_SPREAD)
+        if weakest >= DERATE_CELL_V:
+            return MAX_POWER_W
+        return MAX_POWER_W * max(0.0, (weakest - CUTOFF_CELL_V) / (DERATE_CELL_V - CUTOFF_CELL_V))
+
+    # ————————————————
+    # physics
+    # ————————————————
+    def step(self, dt=PHYSICS_DT):
+        t = self.clock.advance(dt)
+        self._step_n += 1
+        if not self.enabled and t >= READY_AT_S:
+            self.enabled = True
+
+        if self.enabled:
+            self._drive()
+        else:
+            self.gas = self.brk = 0.0
+
+        motor_rpm = self.v / WHEEL_R * GEAR_RATIO * 60 / (2 * math.pi)
+        omega = max(motor_rpm * 2 * math.pi / 60, 1.0)
+        torque = self.gas * min(MAX_TORQUE_NM, self._power_limit() * DRIVETRAIN_EFF / omega)
+        f_drive = torque * GEAR_RATIO / WHEEL_R * DRIVETRAIN_EFF
+        f_brake = self.brk * MAX_BRAKE_G * 9.81 * MASS_KG
+        f_drag = 0.5 * RHO * CDA * self.v * self.v + CRR * MASS_KG * 9.81 * (self.v > 0.01)
+        accel = (f_drive - f_brake - f_drag) / MASS_KG
+        self.v = max(0.0, self.v + accel * dt)
+        self.pos += self.v * dt
+        if self.pos >= self.lap_len:
+            self.pos -= self.lap_len
+            self.lap += 1
+            # the driver isn't a robot: a little variation lap to lap
+            self.aggression = min(1.0, max(0.8, self.aggression + self.rng.gauss(0, 0.02)))
+
+        shaft_w = torque * omega if self.gas else 0.0
+        regen_w = REGEN * f_brake * self.v
+        self.power_w = shaft_w / DRIVETRAIN_EFF - regen_w
+
+        # accumulator
+        ocv = ocv_from_soc(self.soc)
+        pack_ocv = ocv * N_SERIES
+        pack_r = self.pack_r
+        # P = I * (Voc - I R)  ->  solve for I
+        disc = pack_ocv * pack_ocv - 4 * pack_r * self.power_w
+        self.current = (pack_ocv - math.sqrt(max(disc, 0.0))) / (2 * pack_r)
+        self.soc = max(0.0, self.soc - self.current * dt / 3600.0 / PACK_CAPACITY_AH)
+
+        # thermal, one explicit Euler step each
+        lam = CELL_COOLING / CELL_HEAT_CAP
+        self._decay -= lam * self._decay * dt
+        self._heat += (self.current * self.current / CELL_HEAT_CAP - lam * self._heat) * dt
+        air = COOLANT_TO_AIR + COOLANT_AIR_PER_MS * self.v
+        q_mtr = PART_TO_COOLANT * (self.mtr_t - self.cool_t)
+        q_cnt = PART_TO_COOLANT * (self.cnt_t - self.cool_t)
+        self.mtr_t += (MOTOR_LOSS * shaft_w - q_mtr) * dt / MOTOR_HEAT_CAP
+        self.cnt_t += (CNT_LOSS * self.power_w - q_cnt) * dt / CNT_HEAT_CAP
+        self.cool_t += (q_mtr + q_cnt - air * (self.cool_t - AMBIENT_C)) * dt / COOLANT_HEAT_CAP
+
+        self.ic_v = pack_ocv * (1 - math.exp(-t / PRECHARGE_TAU))
+        self.motor_rpm = motor_rpm
+        self.pack_v = pack_ocv - self.current * pack_r
+
+        if self._step_n % self.emit_every == 0:
+            return self.telemetry(t)
+        return None
+
+    @property
+    def cell_t(self):
+        return [AMBIENT_C + self._decay * t0 + self._heat * r for t0, r in zip(self._cell_t0, self.cell_r)]
+
+    def telemetry(self, t):
+        """Teensy-format lines for the current state, each stamped with virtual micros()."""
+        stamp = int(t * 1e6) % (1 << 32)
+        # cells sit within a few % SoC of the pack, so the OCV curve is linear enough around it
+        ocv = ocv_from_soc(self.soc)
+        slope = (ocv_from_soc(self.soc + 0.005) - ocv_from_soc(self.soc - 0.005)) / 0.01
+        cur = self.current
+        cells = [ocv + slope * d - cur * r for d, r in zip(self.cell_dsoc, self.cell_r)]
+        cell_t = self.cell_t
+        pre_done = self.ic_v >= PRECHARGE_TARGET * self.pack_v
+        values = [
+            ("mtr_s", f"{self.motor_rpm:.0f}"),
+            ("pwr", f"{self.power_w:.1f}"),
+            ("acc_v", f"{self.pack_v:.1f}"),
+            ("acc_i", f"{self.current:.1f}"),
+            ("min_v", f"{min(cells):.3f}"),
+            ("max_v", f"{max(cells):.3f}"),
+            ("acc_t", f"{max(cell_t):.1f}"),
+            ("mtr_t", f"{self.mtr_t:.1f}"),
+            ("cnt_t", f"{self.cnt_t:.1f}"),
+            ("cool_t", f"{self.cool_t:.1f}"),
+            ("gas", f"{int(self.gas > 0.05)}"),
+            ("brk", f"{int(self.brk > 0.05)}"),
+            ("lap", f"{self.lap}"),
+            ("ts_v", f"{self.pack_v:.1f}"),
+            ("ic_v", f"{self.ic_v:.1f}"),
+            ("precharge_active", f"{int(not pre_done)}"),
+            ("ts_active", f"{int(pre_done)}"),
+            ("status", f"{int(self.enabled)}"),
+            ("sd", "1"),
+        ]
+        lines = [f"{k}={v}@{stamp}" for k, v in values]
+
+        # one accumulator segment per emission, like the BMS round-robin
+        seg = self._seg
+        self._seg = (self._seg + 1) % SEGMENTS
+        lines.append(f"cv_{seg + 1}=" + ",".join(f"{v:.3f}" for v in cells[seg * CELLS_PER_SEG:(seg + 1) * CELLS_PER_SEG]))
+        therm = cell_t[seg * CELLS_PER_SEG:seg * CELLS_PER_SEG + THERMS_PER_SEG]
+        lines.append(f"ct_{seg + 1}=" + ",".join(f"{v:.1f}" for v in therm))
+        return lines
+
+    def run(self, duration_s, speed=0.0, sink=None):
+        """Steps the model for duration_s of virtual time.
+
+        speed=0 runs flat out; speed=1 paces against the wall clock (10 -> 10x, ...).
+        sink(t, lines) is called for every telemetry emission.
+        """
+        steps = int(round(duration_s / PHYSICS_DT))
+        wall0 = time.monotonic()
+        t0 = self.clock.now
+        for _ in range(steps):
+            lines = self.step()
+            if lines is not None and sink is not None:
+                sink(self.clock.now, lines)
+            if speed > 0:
+                ahead = (self.clock.now - t0) / speed - (time.monotonic() - wall0)
+                if ahead > 0.002:
+                    time.sleep(ahead)
+
+
+class SimSerial:
+    """Drop-in for FakeSerial that streams VehicleSim telemetry at `speed` x real time."""
+
+    def __init__(self, seed=0, speed=1.0):
+        self.sim = VehicleSim(seed)
+        self.speed = speed
+        self._rx = deque()
+        self._wall0 = time.monotonic()
+        self._is_open = True
+
+    def _advance(self):
+        target = (time.monotonic() - self._wall0) * self.speed
+        while self.sim.clock.now + PHYSICS_DT <= target:
+            lines = self.sim.step()
+            if lines:
+                self._rx.extend(f"{line}\n".encode() for line in lines)
+
+    @property
+    def in_waiting(self):
+        self._advance()
+        return len(self._rx)
+
+    def readline(self):
+        self._advance()
+        if not self._rx:
+            time.sleep(0.01)
+            return b""
+        return self._rx.popleft()
+
+    def write(self, data: bytes):
+        text = data.decode(errors="ignore").strip().lower()
+        if "pi_ready" in text:
+            self._rx.append(b"rodger\n")
+        elif text.startswith("sync@"):
+            us = int(self.sim.clock.now * 1e6) % (1 << 32)
+            self._rx.append(f"sync={text[5:]},{us},{us}\n".encode())
+        elif "@" in text:
+            self._rx.append(f"ack={text.split('@', 1)[1].split(' ', 1)[0]}\n".encode())
+
+    def close(self):
+        self._is_open = False
+
+    @property
+    def is_open(self):
+        return self._is_open
+
+
+class SimProcessSerial:
+    """SimSerial with the model running in a child `vehicle_sim.py` piping its
+    lines back, so profiling the dashboard (mem_soak.py) neither slows the
+    simulator down nor counts its allocations."""
+
+    def __init__(self, seed=0, speed=1.0, duration=24 * 3600.0):
+        self.speed = speed
+        self.proc = subprocess.Popen(
+            [sys.executable, __file__, "--seed", str(seed), "--speed", str(speed), "--duration", str(duration)],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, bufsize=0)
+        self._fd = self.proc.stdout.fileno()
+        os.set_blocking(self._fd, False)    # in_waiting must never wait on the child
+        self._buf = bytearray()   # child output not handed out yet, possibly a partial line
+        self._eof = False
+        self._rx = deque()        # replies to our own writes
+        self._wall0 = time.monotonic()
+        self._is_open = True
+
+    def _pump(self):
+        """Moves whatever the child has written so far into _buf, without blocking."""
+        try:
+            chunk = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return
+        if chunk:
+            self._buf += chunk
+        else:
+            self._eof = True
+
+    @property
+    def in_waiting(self):
+        if not self._eof:
+            self._pump()
+        return len(self._rx) + len(self._buf)
+
+    def readline(self, timeout=READ_TIMEOUT_S):
+        """One complete line, or b"" if none arrived within timeout (like a serial port's timeout)."""
+        if self._rx:
+            return self._rx.popleft()
+        deadline = time.monotonic() + timeout
+        while True:
+            nl = self._buf.find(b"\n")
+            if nl >= 0:
+                line = bytes(self._buf[:nl + 1])
+                del self._buf[:nl + 1]
+                return line
+            if self._eof:
+                time.sleep(0.01)      # the child finished or died
+                return b""
+            left = deadline - time.monotonic()
+            if left <= 0 or not select.select([self._fd], [], [], left)[0]:
+                return b""
+            self._pump()
+
+    def write(self, data: bytes):
+        text = data.decode(errors="ignore").strip().lower()
+        if "pi_ready" in text:
+            self._rx.append(b"rodger\n")
+        elif text.startswith("sync@"):
+            us = int((time.monotonic() - self._wall0) * self.speed * 1e6) % (1 << 32)
+            self._rx.append(f"sync={text[5:]},{us},{us}\n".encode())
+        elif "@" in text:
+            self._rx.append(f"ack={text.split('@', 1)[1].split(' ', 1)[0]}\n".encode())
+
+    def close(self):
+        self._is_open = False
+        self.proc.terminate()
+
+    @property
+    def is_open(self):
+        return self._is_open
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deterministic FSAE telemetry simulator")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--duration", type=float, default=60.0, help="virtual seconds to simulate")
+    parser.add_argument("--speed", type=float, default=0.0, help="x real time; 0 = as fast as possible")
+    parser.add_argument("--emit-hz", type=float, default=EMIT_HZ, help="telemetry lines per second")
+    parser.add_argument("--out", help="write a session log (.tlog) instead of printing lines")
+    parser.add_argument("--force", action="store_true", help="overwrite an existing --out log")
+    parser.add_argument("--epoch", type=float, default=1.7e9, help="unix time the session log starts at")
+    args = parser.parse_args()
+    if args.out and os.path.exists(args.out):
+        # SessionLog appends, so writing over an old log would leave two sessions in one file
+        if not args.force:
+            parser.error(f"{args.out} already exists (use --force to overwrite it)")
+        from session_log import INDEX_EXT
+        for path in (args.out, args.out + INDEX_EXT):
+            if os.path.exists(path):
+                os.remove(path)
+
+    sim = VehicleSim(args.seed, emit_hz=args.emit_hz)
+    wall0 = time.perf_counter()
+    if args.out:
+        from session_log import SessionLog
+        log = SessionLog(args.out)
+
+        def sink(t, lines):
+            for line in lines:
+                key, _, value = line.partition("=")
+                log.write(f"{key}={value.partition('@')[0]}", args.epoch + t)
+        sim.run(args.duration, args.speed, sink)
+        log.close()
+    else:
+        out = sys.stdout
+
+        def sink(t, lines):
+            out.write("\n".join(lines) + "\n")
+            out.flush()       # a pipe is block buffered; SimProcessSerial reads line by line
+        sim.run(args.duration, args.speed, sink)
+    dt = time.perf_counter() - wall0
+    print(f"simulated {args.duration:.0f} s in {dt:.2f} s ({args.duration / dt:.0f}x real time), "
+          f"{sim.lap} laps, SoC {sim.soc * 100:.1f}%", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()